@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+搜索结果缓存
+线程安全的TTL + LRU缓存，支持同一键的并发请求合并（single-flight）
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# 缓存未命中的哨兵值（缓存值本身可能为None）
+_MISSING = object()
+
+
+class ResultCache:
+    """线程安全的搜索结果缓存"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大缓存条目数，超出后淘汰最久未使用的条目
+            ttl: 缓存条目的有效期（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，不存在或已过期时返回default"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """写入缓存值"""
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        获取缓存值，未命中时调用compute计算并写入缓存
+
+        同一键已有计算在进行时，直接等待该计算的结果而不重复请求。
+
+        Args:
+            key: 缓存键
+            compute: 计算缓存值的函数
+            cacheable: 判断计算结果是否应写入缓存（例如不缓存错误信息）
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = Future()
+                self._inflight[key] = pending
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+        pending.set_result(value)
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0
+            }
+
+    def save(self, path: Union[str, Path]) -> int:
+        """
+        将未过期的缓存条目保存到JSON Lines文件（先写临时文件再替换，避免写入中断损坏快照）
+        
+        Returns:
+            保存的条目数
+        """
+        path = Path(path)
+        now_monotonic, now_wall = time.monotonic(), time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+        
+        records = []
+        for key, (expires_at, value) in entries:
+            if expires_at < now_monotonic:
+                continue
+            record = {"key": list(key) if isinstance(key, tuple) else key,
+                      "expires_at": now_wall + (expires_at - now_monotonic),
+                      "value": value}
+            try:
+                records.append(json.dumps(record, ensure_ascii=False))
+            except (TypeError, ValueError):
+                continue
+        
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(records))
+        os.replace(tmp_path, path)
+        return len(records)
+    
+    def load(self, path: Union[str, Path]) -> int:
+        """
+        从JSON Lines文件加载缓存条目，跳过已过期和无法解析的条目
+        
+        Returns:
+            加载的条目数
+        """
+        path = Path(path)
+        if not path.is_file():
+            return 0
+        
+        now_wall = time.time()
+        loaded = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = record["key"]
+                    key = tuple(key) if isinstance(key, list) else key
+                    remaining = record["expires_at"] - now_wall
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"跳过无法解析的缓存条目: {path}")
+                    continue
+                if remaining <= 0:
+                    continue
+                with self._lock:
+                    self._store(key, record["value"], min(remaining, self.ttl))
+                loaded += 1
+        return loaded
+    
+    def _lookup(self, key: Hashable) -> Any:
+        """查找未过期的缓存值（调用方需持有锁）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """写入缓存值并淘汰多余条目（调用方需持有锁）"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
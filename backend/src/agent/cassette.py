@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+HTTP录制/回放（cassette）
+record模式下把真实的上游响应（以及SDK调用的结果）写入压缩的cassette文件，
+replay模式下按请求确定性地返回录制内容，不访问网络，可用于离线基准测试和回归测试。
+
+覆盖范围：
+    http   经过http_client.get的请求（arXiv、Wikipedia、Google Scholar工具及SearchAPIs）
+    call   无法在HTTP层拦截的SDK调用（基于Gemini的Google搜索、GeminiAPI），按调用参数录制返回值，
+           同时录制调用期间的LLM token用量，回放时重新计入当前请求的用量统计
+
+请求键为方法 + URL + 排序后的查询参数，api_key等密钥参数不参与匹配也不写入文件。
+同一个键被多次请求时按录制顺序依次返回，用完后重复最后一条。回放时可按录制耗时
+（乘以倍数）注入延迟，复现上游的时序特征。
+
+通过环境变量启用（进程级）：
+    HTTP_CASSETTE_MODE     off（默认）、record或replay
+    HTTP_CASSETTE_PATH     cassette文件路径，默认data/cassettes/default.jsonl.gz
+    HTTP_CASSETTE_LATENCY  回放延迟倍数，0（默认）表示不注入延迟，1表示按录制耗时
+
+或在代码中使用：
+    with cassette.use("data/cassettes/llm.jsonl.gz", "replay", latency_scale=1.0):
+        agent.search("大语言模型")
+"""
+
+import atexit
+import base64
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from . import usage
+
+logger = logging.getLogger(__name__)
+
+# 录制/回放模式
+MODES = ("off", "record", "replay")
+
+# 默认cassette文件
+DEFAULT_CASSETTE_PATH = "data/cassettes/default.jsonl.gz"
+
+# 不参与匹配、不写入文件的密钥参数
+SECRET_PARAMS = {"api_key", "key", "apikey", "access_token", "token"}
+
+# 回放时没有真实密钥的工具使用的占位密钥（请求中的密钥不参与匹配）
+PLACEHOLDER_KEY = "cassette-replay"
+
+# 录制的响应头（响应体已解压，不录制Content-Encoding）
+_RECORDED_HEADERS = ("Content-Type",)
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """回放时cassette中没有对应的录制（按网络错误处理，调用方的错误处理逻辑保持不变）"""
+
+
+def request_key(method: str, url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    """生成请求键：方法、不含密钥的URL和排序后的查询参数"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        for name, value in params.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            query.extend((name, str(v)) for v in values if v is not None)
+    query = sorted((name, value) for name, value in query if name.lower() not in SECRET_PARAMS)
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))}"
+
+
+def call_key(name: str, *args: Any) -> str:
+    """生成SDK调用的键：调用名称和参数的JSON表示"""
+    return f"CALL {name} {json.dumps(args, ensure_ascii=False, sort_keys=True, default=str)}"
+
+
+class Cassette:
+    """一个cassette文件中的全部录制"""
+
+    def __init__(self, path: Union[str, Path], mode: str = "replay", latency_scale: float = 0.0):
+        """
+        打开cassette
+
+        Args:
+            path: cassette文件路径（gzip压缩的JSON Lines）
+            mode: record或replay
+            latency_scale: 回放延迟倍数，0表示不注入延迟
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"未知的cassette模式: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._dirty = False
+        if self.path.exists():
+            self._load()
+        elif mode == "replay":
+            raise FileNotFoundError(f"cassette文件不存在: {self.path}")
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def save(self):
+        """写入cassette文件（仅record模式且有新录制时）"""
+        with self._lock:
+            if self.mode != "record" or not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                for entries in self._entries.values():
+                    for entry in entries:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _add(self, entry: Dict[str, Any]):
+        with self._lock:
+            if entry["key"] not in self._cursors:
+                # 本次录制第一次遇到该键时替换旧录制
+                self._entries[entry["key"]] = []
+                self._cursors[entry["key"]] = 0
+            self._entries[entry["key"]].append(entry)
+            self._dirty = True
+
+    def _next(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"cassette中没有录制: {key}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            entry = entries[min(cursor, len(entries) - 1)]
+        if self.latency_scale > 0:
+            time.sleep(entry.get("elapsed", 0.0) * self.latency_scale)
+        return entry
+
+    # ---- HTTP ----
+
+    def record_http(self, key: str, response: requests.Response, elapsed: float):
+        """录制一个HTTP响应"""
+        self._add({
+            "kind": "http",
+            "key": key,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in _RECORDED_HEADERS if name in response.headers},
+            "body": base64.b64encode(response.content).decode("ascii"),
+            "elapsed": round(elapsed, 6)
+        })
+
+    def replay_http(self, key: str, url: str) -> requests.Response:
+        """回放一个HTTP响应"""
+        entry = self._next(key)
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = base64.b64decode(entry["body"])
+        response.headers.update(entry.get("headers", {}))
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    # ---- SDK调用 ----
+
+    def call(self, key: str, func: Callable[[], Any]) -> Any:
+        """record模式下执行并录制调用结果（需可JSON序列化）和token用量，replay模式下返回录制结果"""
+        if self.mode == "replay":
+            entry = self._next(key)
+            # 回放时不执行SDK调用，按录制的用量计入当前请求
+            for call in entry.get("usage", []):
+                usage.record(**call)
+            return entry["result"]
+        start = time.perf_counter()
+        with usage.capture() as calls:
+            result = func()
+        self._add({"kind": "call", "key": key, "result": result, "usage": calls,
+                   "elapsed": round(time.perf_counter() - start, 6)})
+        return result
+
+
+# 当前生效的cassette（进程级，线程池中的请求同样生效）
+_active: Optional[Cassette] = None
+_env_checked = False
+_activate_lock = threading.Lock()
+
+
+def _from_env() -> Optional[Cassette]:
+    """根据环境变量创建cassette（只检查一次）"""
+    global _active, _env_checked
+    with _activate_lock:
+        if _env_checked:
+            return _active
+        _env_checked = True
+        mode = os.getenv("HTTP_CASSETTE_MODE", "off").lower()
+        if mode not in MODES:
+            logger.error(f"未知的HTTP_CASSETTE_MODE: {mode}，不启用录制/回放")
+            return None
+        if mode != "off" and _active is None:
+            _active = Cassette(os.getenv("HTTP_CASSETTE_PATH", DEFAULT_CASSETTE_PATH), mode,
+                               float(os.getenv("HTTP_CASSETTE_LATENCY", "0")))
+            if mode == "record":
+                atexit.register(_active.save)
+            logger.info(f"HTTP cassette已启用: {mode} {_active.path}")
+        return _active
+
+
+def current() -> Optional[Cassette]:
+    """当前生效的cassette，未启用时返回None"""
+    return _active if _env_checked else _from_env()
+
+
+def is_replaying() -> bool:
+    """当前是否处于回放模式"""
+    active = current()
+    return active is not None and active.mode == "replay"
+
+
+@contextmanager
+def use(path: Union[str, Path], mode: str = "replay", latency_scale: float = 0.0) -> Iterator[Cassette]:
+    """在代码块内启用cassette，record模式在退出时保存"""
+    global _active, _env_checked
+    cassette = Cassette(path, mode, latency_scale)
+    with _activate_lock:
+        previous, previous_checked = _active, _env_checked
+        _active, _env_checked = cassette, True
+    try:
+        yield cassette
+    finally:
+        with _activate_lock:
+            _active, _env_checked = previous, previous_checked
+        cassette.save()
+
+
+def http_get(send: Callable[..., requests.Response], url: str, **kwargs) -> Tuple[requests.Response, bool]:
+    """
+    经过cassette发送GET请求
+
+    Args:
+        send: 实际发送请求的函数
+        url: 请求地址
+
+    Returns:
+        (响应, 是否来自回放)
+    """
+    active = current()
+    if active is None:
+        return send(url, **kwargs), False
+    key = request_key("GET", url, kwargs.get("params"))
+    if active.mode == "replay":
+        return active.replay_http(key, url), True
+    start = time.perf_counter()
+    response = send(url, **kwargs)
+    active.record_http(key, response, time.perf_counter() - start)
+    return response, False
+
+
+def call(name: str, args: Tuple[Any, ...], func: Callable[[], Any]) -> Any:
+    """经过cassette执行SDK调用（未启用时直接执行）"""
+    active = current()
+    if active is None:
+        return func()
+    return active.call(call_key(name, *args), func)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+DEBUG信息收集器
+每次请求使用独立的实例，日志保存在有界环形缓冲区中，只在需要时序列化
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 单个请求最多保留的日志条数，超出后丢弃最早的日志
+DEFAULT_MAX_ENTRIES = 256
+
+
+class DebugInfo:
+    """DEBUG信息收集器"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初始化收集器
+
+        Args:
+            max_entries: 环形缓冲区容量
+        """
+        self.logs = deque(maxlen=max_entries)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add_log(self, stage: str, data: Dict[str, Any]):
+        """添加DEBUG日志（只记录原始数据，不做序列化）"""
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "stage": stage,
+            "data": data
+        }
+        # 同一请求的各搜索源在不同线程中并发写入
+        with self._lock:
+            if len(self.logs) == self.logs.maxlen:
+                self.dropped += 1
+            self.logs.append(entry)
+        # 只有DEBUG日志开启时才序列化
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s: %s", stage, json.dumps(data, ensure_ascii=False, default=str))
+
+    def get_logs(self) -> List[Dict[str, Any]]:
+        """获取缓冲区中的所有日志"""
+        with self._lock:
+            return list(self.logs)
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """将日志序列化为JSON字符串"""
+        return json.dumps({
+            "logs": self.get_logs(),
+            "dropped": self.dropped
+        }, ensure_ascii=False, indent=indent, default=str)
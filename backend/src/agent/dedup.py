@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+跨搜索源的结果去重（实体解析）
+同一篇论文常常同时来自arXiv和Google Scholar（以及本地索引），在并行搜索之后
+把指向同一实体的结果合并为一条记录，合并后的记录保留各来源元数据的并集
+（例如Scholar的cited_by加上arXiv的摘要），减少发送给LLM的重复内容。
+
+判定为同一实体的依据（任一满足即可）：
+    1. 相同的arXiv ID（忽略版本号，可从arxiv_id字段或链接中提取）
+    2. 相同的DOI（可从doi字段、链接或发表信息中提取）
+    3. 相同的规范化标题指纹（NFKC、忽略大小写、标点和空白）
+    4. 标题近似重复：MinHash + LSH分桶找出候选，估计的Jaccard相似度不低于阈值
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 判定标题近似重复的MinHash Jaccard相似度阈值
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# MinHash签名长度和LSH分桶数（每个桶 MINHASH_PERMUTATIONS // LSH_BANDS 行）
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# 过短的标题不做近似匹配（容易误合并）
+MIN_NEAR_DUPLICATE_SHINGLES = 4
+
+# 摘要类字段：合并时只保留最长的一个，避免同一摘要的截断版本重复进入提示
+_TEXT_FIELDS = ("summary", "abstract", "snippet")
+
+# 合并记录时忽略的字段（检索得分等与具体来源相关）
+_SOURCE_SPECIFIC_FIELDS = {"score", "similarity", "fetched_at"}
+
+_ARXIV_ID_PATTERN = re.compile(
+    r'(?:arxiv\.org/(?:abs|pdf)/|arxiv:)\s*([a-z\-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?',
+    re.IGNORECASE
+)
+_BARE_ARXIV_ID_PATTERN = re.compile(r'^([a-z\-]+(?:\.[a-z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?$', re.IGNORECASE)
+_DOI_PATTERN = re.compile(r'\b(10\.\d{4,9}/[^\s"<>]+)', re.IGNORECASE)
+
+# MinHash使用的梅森素数和固定的随机参数（保证跨进程结果一致）
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20250606)
+_HASH_A = _rng.integers(1, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, 1 << 31, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def arxiv_id(item: Dict[str, Any]) -> Optional[str]:
+    """提取arXiv ID（去掉版本号），没有时返回None"""
+    value = str(item.get("arxiv_id") or "").strip()
+    match = _BARE_ARXIV_ID_PATTERN.match(value)
+    if match:
+        return match.group(1).lower()
+    for field in ("link", "pdf_link", "id"):
+        match = _ARXIV_ID_PATTERN.search(str(item.get(field) or ""))
+        if match:
+            return match.group(1).lower()
+    return None
+
+
+def doi(item: Dict[str, Any]) -> Optional[str]:
+    """提取DOI（小写，去掉结尾标点），没有时返回None"""
+    for field in ("doi", "link", "publication_info"):
+        match = _DOI_PATTERN.search(str(item.get(field) or ""))
+        if match:
+            return match.group(1).rstrip(".,;)").lower()
+    return None
+
+
+def title_fingerprint(title: str) -> str:
+    """规范化标题指纹：NFKC、忽略大小写，只保留字母数字（含中文）"""
+    title = unicodedata.normalize("NFKC", title).casefold()
+    return "".join(char for char in title if char.isalnum())
+
+
+def _shingles(fingerprint: str) -> set:
+    """标题指纹的字符三元组"""
+    if len(fingerprint) < 3:
+        return {fingerprint} if fingerprint else set()
+    return {fingerprint[i:i + 3] for i in range(len(fingerprint) - 2)}
+
+
+def minhash(shingles: Iterable[str]) -> np.ndarray:
+    """计算MinHash签名（MINHASH_PERMUTATIONS个最小哈希值）"""
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64)
+    if len(hashes) == 0:
+        return np.full(MINHASH_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    permuted = (np.outer(hashes, _HASH_A) + _HASH_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+class _UnionFind:
+    """合并同一实体的结果下标"""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # 保留较早出现的结果作为代表
+            self.parent[max(a, b)] = min(a, b)
+
+
+def find_duplicates(items: List[Dict[str, Any]],
+                    threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[List[int]]:
+    """
+    把结果分组为实体
+
+    Args:
+        items: 结果列表（顺序即优先级，较早的结果作为合并记录的基础）
+        threshold: 标题近似重复的Jaccard相似度阈值
+
+    Returns:
+        按首个结果下标排序的分组，每组是结果下标列表
+    """
+    groups = _UnionFind(len(items))
+    exact: Dict[Tuple[str, str], int] = {}
+    shingle_sets = []
+    for i, item in enumerate(items):
+        fingerprint = title_fingerprint(str(item.get("title") or ""))
+        keys = [("arxiv", arxiv_id(item)), ("doi", doi(item)), ("title", fingerprint)]
+        for key in keys:
+            if not key[1]:
+                continue
+            if key in exact:
+                groups.union(exact[key], i)
+            else:
+                exact[key] = i
+        shingle_sets.append(_shingles(fingerprint))
+
+    # 近似重复：签名按分桶哈希，同桶的标题再用真实Jaccard相似度确认
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, shingles in enumerate(shingle_sets):
+        if len(shingles) < MIN_NEAR_DUPLICATE_SHINGLES:
+            continue
+        signature = minhash(shingles)
+        for band in range(LSH_BANDS):
+            bucket = buckets.setdefault((band, signature[band * rows:(band + 1) * rows].tobytes()), [])
+            for j in bucket:
+                if groups.find(i) == groups.find(j):
+                    continue
+                a, b = shingle_sets[i], shingle_sets[j]
+                if len(a & b) / len(a | b) >= threshold:
+                    groups.union(i, j)
+            bucket.append(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(items)):
+        clusters.setdefault(groups.find(i), []).append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def merge_records(records: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    合并指向同一实体的结果，保留元数据并集
+
+    Args:
+        records: (搜索源, 结果)列表，第一条作为基础记录
+
+    Returns:
+        合并后的结果，sources字段列出该实体出现过的搜索源
+    """
+    merged: Dict[str, Any] = {}
+    sources: List[str] = []
+    for source, item in records:
+        origin = item.get("origin") or source
+        if origin not in sources:
+            sources.append(origin)
+        for key, value in item.items():
+            if key in _SOURCE_SPECIFIC_FIELDS or key == "origin" or value in (None, "", [], {}, 0):
+                continue
+            current = merged.get(key)
+            if current in (None, "", [], {}, 0):
+                merged[key] = value
+            elif isinstance(value, list) and isinstance(current, list) and len(value) > len(current):
+                merged[key] = value
+            elif key == "cited_by" and isinstance(value, (int, float)) and value > current:
+                merged[key] = value
+
+    # 同一摘要的多个版本只保留最长的一个
+    texts = [field for field in _TEXT_FIELDS if merged.get(field)]
+    if len(texts) > 1:
+        longest = max(texts, key=lambda field: len(str(merged[field])))
+        for field in texts:
+            if field != longest:
+                del merged[field]
+
+    for key in ("arxiv_id", "doi"):
+        if not merged.get(key):
+            value = (arxiv_id if key == "arxiv_id" else doi)(merged)
+            if value:
+                merged[key] = value
+    merged["sources"] = sources
+    return merged
+
+
+def merge_duplicates(search_results: Dict[str, Any],
+                     threshold: float = NEAR_DUPLICATE_THRESHOLD) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    合并各搜索源结果中的重复实体
+
+    合并记录放在该实体首次出现的搜索源下（搜索源按search_results中的顺序），
+    其余搜索源中的重复结果被移除；单独出现的结果保持不变。
+
+    Args:
+        search_results: 按搜索源分组的搜索结果
+        threshold: 标题近似重复的Jaccard相似度阈值
+
+    Returns:
+        (去重后的搜索结果, 统计：合并前后的结果数和被合并的实体数)
+    """
+    flat: List[Tuple[str, Dict[str, Any]]] = []
+    for source, data in search_results.items():
+        if data.get("status") == "success":
+            flat.extend((source, item) for item in data.get("results", []) if isinstance(item, dict))
+
+    clusters = find_duplicates([item for _, item in flat], threshold)
+    merged_results: Dict[str, List[Dict[str, Any]]] = {}
+    merged_entities = 0
+    for members in clusters:
+        source = flat[members[0]][0]
+        if len(members) == 1:
+            merged_results.setdefault(source, []).append(flat[members[0]][1])
+        else:
+            merged_entities += 1
+            merged_results.setdefault(source, []).append(merge_records([flat[i] for i in members]))
+
+    deduplicated = {}
+    for source, data in search_results.items():
+        if data.get("status") == "success":
+            deduplicated[source] = dict(data, results=merged_results.get(source, []))
+        else:
+            deduplicated[source] = data
+    return deduplicated, {
+        "input_results": len(flat),
+        "output_results": len(clusters),
+        "merged_entities": merged_entities
+    }
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+上游服务地址
+各搜索工具和LLM客户端使用的上游地址，可通过环境变量覆盖（例如指向
+benchmarks/stub_servers.py启动的本地替身服务）。在创建工具或客户端时读取，
+修改环境变量后新建的实例即使用新地址。
+
+环境变量：
+    ARXIV_API_URL          arXiv查询接口
+    WIKIPEDIA_API_URL      英文维基百科api.php
+    WIKIPEDIA_ZH_API_URL   中文维基百科api.php
+    SERPAPI_URL            SerpAPI搜索接口（Google Scholar）
+    GEMINI_API_BASE        Gemini API根地址，为空时使用SDK默认地址
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+# 默认地址
+DEFAULT_ARXIV_API_URL = "http://export.arxiv.org/api/query"
+DEFAULT_WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+DEFAULT_WIKIPEDIA_ZH_API_URL = "https://zh.wikipedia.org/w/api.php"
+DEFAULT_SERPAPI_URL = "https://serpapi.com/search"
+
+
+def arxiv_api_url() -> str:
+    """arXiv查询接口地址"""
+    return os.getenv("ARXIV_API_URL") or DEFAULT_ARXIV_API_URL
+
+
+def wikipedia_api_url() -> str:
+    """英文维基百科api.php地址"""
+    return os.getenv("WIKIPEDIA_API_URL") or DEFAULT_WIKIPEDIA_API_URL
+
+
+def wikipedia_zh_api_url() -> str:
+    """中文维基百科api.php地址"""
+    return os.getenv("WIKIPEDIA_ZH_API_URL") or DEFAULT_WIKIPEDIA_ZH_API_URL
+
+
+def serpapi_url() -> str:
+    """SerpAPI搜索接口地址"""
+    return os.getenv("SERPAPI_URL") or DEFAULT_SERPAPI_URL
+
+
+def gemini_api_base() -> Optional[str]:
+    """Gemini API根地址，未覆盖时返回None"""
+    return os.getenv("GEMINI_API_BASE") or None
+
+
+def gemini_http_options() -> Optional[Dict[str, Any]]:
+    """google-genai客户端的http_options（未覆盖地址时为None）"""
+    base = gemini_api_base()
+    return {"base_url": base} if base else None
+
+
+def gemini_client_options() -> Dict[str, Any]:
+    """google-generativeai / langchain-google-genai的客户端参数（未覆盖地址时为空）"""
+    base = gemini_api_base()
+    return {"transport": "rest", "client_options": {"api_endpoint": base}} if base else {}
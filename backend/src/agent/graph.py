@@ -6,22 +6,21 @@
 
 import os
 import sys
-from typing import List, Dict, Any, TypedDict, Annotated, Sequence
+from typing import List, Dict, Any, Optional, TypedDict, Annotated, Sequence
 from datetime import datetime
 import json
+import re
+import time
 import logging
+import operator
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import Graph, StateGraph, END
-from langchain.tools import Tool
-
-# 设置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+
+# 日志由入口（API服务、命令行脚本）配置，库模块只获取logger
 logger = logging.getLogger(__name__)
 
 # 添加项目根目录到Python路径
@@ -34,11 +33,127 @@ from .tools.arxiv_tool import ArxivSearchTool
 from .tools.wikipedia_tool import WikipediaSearchTool
 from .tools.google_scholar_tool import GoogleScholarSearchTool
 from .tools.google_search_tool import GoogleSearchTool
+from .tools.lazy import LazyTool
+from .cache import ResultCache
+from . import endpoints, http_client, metrics, tracing, usage
+
+
+# 反思覆盖度达到该阈值后停止迭代搜索
+COVERAGE_THRESHOLD = 0.8
+
+# 每轮补充搜索最多针对的知识缺口数量
+MAX_GAPS_PER_ROUND = 3
+
+# 单个搜索分支内工具调用的最大尝试次数（工具抛出异常或返回错误信息时重试）
+BRANCH_MAX_ATTEMPTS = 2
+
+# 单一来源直接作答所需的最低置信度
+FAST_PATH_CONFIDENCE = 0.85
+
+# 直接作答时认为内容充分的最短摘要长度（字符）
+FAST_PATH_MIN_EXTRACT = 300
+
+# 直接作答时返回的最长摘要长度（字符）
+FAST_PATH_MAX_EXTRACT = 1500
+
+# 预热时记录的搜索源地址属性（各工具实例上的API地址）
+_TOOL_URL_ATTRS = ("base_url", "zh_base_url", "api_base")
+
+# 定义类问题（适合直接使用百科内容回答）
+_DEFINITION_PATTERN = re.compile(
+    r'是什么|什么是|是谁|的定义|基本原理|简介|介绍一下|^\s*(what|who)\s+(is|are|was|were)\b|^\s*define\b',
+    re.IGNORECASE
+)
+
+# 工具返回的错误信息标记（各工具内部捕获异常并返回错误信息），这类结果不写入缓存
+_TOOL_ERROR_MARKERS = ("时发生错误", "时发生网络错误")
+
+# 计算标题匹配度时忽略的英文停用词
+_STOPWORDS = {"what", "who", "is", "are", "was", "were", "the", "a", "an", "of", "define", "does", "do"}
+
+
+def _terms(text: str) -> set:
+    """提取用于匹配的词项：英文单词和中文二元组"""
+    text = text.lower()
+    terms = set(re.findall(r'[a-z0-9]+', text)) - _STOPWORDS
+    for run in re.findall(r'[\u4e00-\u9fff]+', text):
+        if len(run) == 1:
+            terms.add(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def score_answer_confidence(query: str, page: Dict[str, Any]) -> float:
+    """
+    评估百科页面能否直接回答查询
+    
+    综合标题与查询的匹配度、摘要长度以及查询是否为定义类问题，返回0-1之间的置信度。
+    """
+    extract = page.get("extract") or ""
+    title_terms = _terms(page.get("title") or "")
+    if not title_terms or not extract or extract == "无内容":
+        return 0.0
+    
+    title_match = len(title_terms & _terms(query)) / len(title_terms)
+    extract_adequacy = min(len(extract) / FAST_PATH_MIN_EXTRACT, 1.0)
+    definitional = 1.0 if _DEFINITION_PATTERN.search(query) else 0.6
+    return round(title_match * (0.5 + 0.5 * extract_adequacy) * definitional, 3)
+
+
+def _traced_node(name: str, node):
+    """为图节点记录耗时span"""
+    def traced(state: AgentState) -> Dict[str, Any]:
+        with tracing.span(f"node:{name}"):
+            return node(state)
+    return traced
+
+
+def _source_outcome(result: Any) -> str:
+    """根据工具返回结果判断调用结果（工具内部捕获异常并返回错误信息）"""
+    if _is_cacheable(result):
+        return "success"
+    return "timeout" if "timed out" in str(result).lower() else "error"
+
+
+def _invoke_llm(llm, prompt: str, stage: str) -> str:
+    """调用LLM，并记录耗时、token用量和费用"""
+    start = time.perf_counter()
+    with tracing.span("llm", stage=stage) as span:
+        response = llm.invoke(prompt)
+        usage_metadata = getattr(response, "usage_metadata", None) or {}
+        if usage_metadata:
+            cost = usage.record(getattr(llm, "model", None), usage_metadata.get("input_tokens"),
+                                usage_metadata.get("output_tokens"), stage=stage)
+            span.set(input_tokens=usage_metadata.get("input_tokens"),
+                     output_tokens=usage_metadata.get("output_tokens"), cost_usd=cost)
+    metrics.LLM_DURATION.observe(time.perf_counter() - start, stage=stage)
+    return response.content
+
+
+def _is_tool_error(result: Any) -> bool:
+    """工具是否返回了错误信息"""
+    return not isinstance(result, str) or any(marker in result for marker in _TOOL_ERROR_MARKERS)
+
+
+def _is_cacheable(result: Any) -> bool:
+    """只缓存成功的工具结果"""
+    return not _is_tool_error(result)
 
 
 class AgentState(TypedDict):
     """Agent状态"""
     messages: List[BaseMessage]
+    query: str                # 原始用户查询
+    queries: List[str]        # 本轮待搜索的查询
+    searched: List[str]       # 已搜索过的查询
+    results: Annotated[List[str], operator.add]           # 累积的搜索结果（各分支并行写入）
+    timings: Annotated[List[Dict[str, Any]], operator.add]  # 各搜索分支的耗时记录
+    gaps: List[str]           # 反思得到的知识缺口
+    coverage: float           # 反思得到的覆盖度评分（0-1）
+    iteration: int            # 已完成的搜索轮数
+    max_iterations: int       # 最大搜索轮数
+    allow_fast_path: bool     # 是否允许单一来源直接作答
+    fast_path: bool           # 是否由单一来源直接作答
     next: str
 
 
@@ -46,97 +161,309 @@ class SearchAgent:
     """智能搜索Agent"""
     
     def __init__(self):
-        """初始化Agent"""
-        logger.debug("开始初始化SearchAgent")
+        """
+        初始化Agent
         
-        logger.debug("初始化LLM模型")
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.3,     # 降低温度提高稳定性
-            timeout=30,          # 添加30秒超时
-            max_output_tokens=2048  # 限制输出长度
-        )
+        LLM客户端、各搜索工具实例和工作流图都在第一次使用时才创建，
+        构造Agent本身不导入langchain_google_genai、langgraph等较重的SDK，也不检查API密钥。
+        """
+        logger.debug("开始初始化SearchAgent")
         
-        # 初始化工具
-        logger.debug("开始初始化搜索工具")
-        tool_classes = [
-            ArxivSearchTool(),
-            WikipediaSearchTool(),
-            GoogleScholarSearchTool(),
-            GoogleSearchTool()
+        # 搜索工具（延迟创建实例，缺少某个API密钥只影响对应的搜索分支）
+        self.wikipedia_tool = LazyTool(WikipediaSearchTool, "search_and_get_content")
+        self.tools = [
+            LazyTool(ArxivSearchTool),
+            self.wikipedia_tool,
+            LazyTool(GoogleScholarSearchTool),
+            LazyTool(GoogleSearchTool)
         ]
         
-        # 获取工具实例
-        logger.debug("获取工具实例")
-        self.tools = [tool.get_tool() for tool in tool_classes]
+        # 搜索结果缓存；快速作答后其余搜索源在后台线程中继续完成并写入缓存
+        self.cache = ResultCache()
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="search-prefetch")
         
         # 构建工具映射
         self.tool_map = {
             tool.name: tool for tool in self.tools
         }
         
-        # 构建图结构
-        logger.debug("构建工作流图结构")
-        self.workflow = self._build_graph()
+        self._llm = None
+        self._workflow = None
+        self._init_lock = threading.Lock()
         logger.debug("SearchAgent初始化完成")
     
-    def _build_graph(self) -> Graph:
+    @property
+    def llm(self) -> Any:
+        """LLM客户端，首次使用时创建"""
+        if self._llm is None:
+            with self._init_lock:
+                if self._llm is None:
+                    logger.debug("初始化LLM模型")
+                    from langchain_google_genai import ChatGoogleGenerativeAI
+                    self._llm = ChatGoogleGenerativeAI(
+                        model="gemini-2.0-flash",
+                        temperature=0.3,     # 降低温度提高稳定性
+                        timeout=30,          # 添加30秒超时
+                        max_output_tokens=2048,  # 限制输出长度
+                        **endpoints.gemini_client_options()
+                    )
+        return self._llm
+    
+    @llm.setter
+    def llm(self, llm: Any):
+        """替换LLM客户端"""
+        self._llm = llm
+    
+    @property
+    def wikipedia_search(self) -> WikipediaSearchTool:
+        """Wikipedia工具实例（快速路径直接使用其结构化搜索接口）"""
+        return self.wikipedia_tool.instance()
+    
+    @property
+    def workflow(self) -> Any:
+        """编译后的工作流图，首次使用时构建"""
+        if self._workflow is None:
+            with self._init_lock:
+                if self._workflow is None:
+                    logger.debug("构建工作流图结构")
+                    self._workflow = self._build_graph()
+        return self._workflow
+    
+    def warm_up(self, ping_llm: bool = True, timeout: float = 5) -> Dict[str, Any]:
+        """
+        预热：创建各搜索工具实例、LLM客户端和工作流图，并预先建立到各搜索源主机的连接
+        
+        Args:
+            ping_llm: 是否发送一次极短的LLM请求以建立到LLM服务的连接
+            timeout: 单个预热请求的超时时间（秒）
+            
+        Returns:
+            各预热项的结果（"ok"或错误信息）
+        """
+        results: Dict[str, Any] = {}
+        urls = []
+        for tool in self.tools:
+            try:
+                instance = tool.instance()
+                urls.extend(getattr(instance, attr) for attr in _TOOL_URL_ATTRS if getattr(instance, attr, None))
+                results[f"tool:{tool.name}"] = "ok"
+            except Exception as e:
+                results[f"tool:{tool.name}"] = str(e)
+        
+        try:
+            self.workflow  # 访问属性即触发构建（导入langgraph）
+            results["workflow"] = "ok"
+        except Exception as e:
+            results["workflow"] = str(e)
+        
+        for host, status in http_client.warm_up(urls, timeout=timeout).items():
+            results[f"host:{host}"] = status
+        
+        try:
+            llm = self.llm
+            if ping_llm:
+                _invoke_llm(llm, "ping", "warmup")
+            results["llm"] = "ok"
+        except Exception as e:
+            results["llm"] = str(e)
+        
+        logger.debug(f"预热完成: {results}")
+        return results
+    
+    def _build_graph(self) -> Any:
         """构建Agent的工作流图"""
+        from langgraph.graph import StateGraph, END
+        
+        def should_continue(coverage: float, gaps: List[str], iteration: int, max_iterations: int) -> bool:
+            """覆盖度未达到阈值、仍有知识缺口且未超过最大轮数时继续搜索"""
+            return coverage < COVERAGE_THRESHOLD and bool(gaps) and iteration < max_iterations
         
         # 定义节点
-        def search_node(state: AgentState) -> AgentState:
-            """执行搜索"""
-            logger.debug("进入search_node")
-            messages = state["messages"]
-            
-            # 获取最新的用户消息
-            last_message = messages[-1].content
-            logger.debug(f"处理用户查询: {last_message}")
+        def probe_node(state: AgentState) -> AgentState:
+            """快速路径：其余来源后台预取的同时先查Wikipedia，高置信度时直接作答"""
+            logger.debug("进入probe_node")
+            if not state["allow_fast_path"]:
+                return {"next": "dispatch"}
+            query = state["query"]
             
-            # 选择合适的工具执行搜索
-            results = []
+            # 其余搜索源在后台执行，结果写入缓存供后续搜索分支复用
             for tool in self.tools:
-                try:
-                    logger.debug(f"使用工具 {tool.name} 执行搜索")
-                    result = tool.run(last_message)
-                    logger.debug(f"工具 {tool.name} 返回结果长度: {len(result)}")
-                    results.append(f"{tool.name}: {result}")
-                except Exception as e:
-                    logger.error(f"工具 {tool.name} 执行失败: {str(e)}", exc_info=True)
-            
-            # 将结果添加到消息历史
-            logger.debug(f"搜索完成，共获得 {len(results)} 个结果")
-            messages.append(AIMessage(content="\n\n".join(results)))
+                if tool is not self.wikipedia_tool:
+                    tracing.submit(self.executor, self.cache.get_or_compute, (tool.name, query),
+                                   partial(tool.traced_run, query), _is_cacheable)
+            
+            try:
+                pages = self.wikipedia_search.search_pages(query)
+            except Exception as e:
+                logger.error(f"快速路径查询Wikipedia失败: {str(e)}", exc_info=True)
+                return {"next": "dispatch"}
+            self.cache.set((self.wikipedia_tool.name, query), self.wikipedia_search.format_results(query, pages))
+            
+            confidence = score_answer_confidence(query, pages[0]) if pages else 0.0
+            logger.debug(f"快速路径置信度: {confidence}")
+            if confidence < FAST_PATH_CONFIDENCE:
+                return {"next": "dispatch"}
             
+            page = pages[0]
+            extract = page["extract"]
+            if len(extract) > FAST_PATH_MAX_EXTRACT:
+                extract = extract[:FAST_PATH_MAX_EXTRACT - 3] + "..."
+            answer = f"**{page['title']}**\n\n{extract}\n\n来源: Wikipedia - {page['url']}"
+            
+            messages = state["messages"]
+            messages.append(AIMessage(content=answer))
             return {
                 "messages": messages,
-                "next": "reflect"
+                "searched": [query],
+                "iteration": 1,
+                "coverage": confidence,
+                "fast_path": True,
+                "next": END
+            }
+        
+        def dispatch_node(state: AgentState) -> AgentState:
+            """开始新一轮搜索（首轮使用原始查询，之后只针对知识缺口）"""
+            iteration = state["iteration"] + 1
+            logger.debug(f"第 {iteration} 轮搜索，查询: {state['queries']}")
+            return {
+                "searched": state["searched"] + state["queries"],
+                "iteration": iteration,
+                "next": "search"
             }
         
+        def make_search_branch(tool: LazyTool):
+            """为单个搜索工具创建并行搜索分支"""
+            def search_branch(state: AgentState) -> Dict[str, Any]:
+                logger.debug(f"进入搜索分支 {tool.name}")
+                started_at = datetime.now().isoformat()
+                start = time.perf_counter()
+                attempts = 0
+                
+                results = []
+                for query in state["queries"]:
+                    with tracing.span(f"tool:{tool.name}", query=query, cache_hit=True) as span:
+                        def compute(query=query, span=span):
+                            # 只有真正调用工具时才会执行，否则结果来自缓存
+                            span.set(cache_hit=False)
+                            return tool.run(query)
+                        
+                        # 重试只在本分支内进行，不影响其他已完成的分支
+                        for attempt in range(1, BRANCH_MAX_ATTEMPTS + 1):
+                            attempts += 1
+                            call_start = time.perf_counter()
+                            outcome = "error"
+                            try:
+                                logger.debug(f"使用工具 {tool.name} 搜索: {query}")
+                                result = self.cache.get_or_compute((tool.name, query), compute, _is_cacheable)
+                                logger.debug(f"工具 {tool.name} 返回结果长度: {len(result)}")
+                                span.set(bytes=len(result.encode("utf-8")), retries=attempt - 1)
+                                outcome = _source_outcome(result)
+                                # 返回错误信息时同样重试，最后一次的错误信息仍交给反思节点
+                                if _is_tool_error(result) and attempt < BRANCH_MAX_ATTEMPTS:
+                                    logger.warning(f"工具 {tool.name} 第 {attempt} 次返回错误: {result}")
+                                    continue
+                                results.append(f"{tool.name} ({query}): {result}")
+                                break
+                            except Exception as e:
+                                span.set(retries=attempt - 1)
+                                logger.error(f"工具 {tool.name} 第 {attempt} 次执行失败: {str(e)}", exc_info=True)
+                            finally:
+                                metrics.SOURCE_DURATION.observe(time.perf_counter() - call_start, source=tool.name, outcome=outcome)
+                                if outcome == "error":
+                                    metrics.SOURCE_ERRORS.inc(source=tool.name)
+                                elif outcome == "timeout":
+                                    metrics.SOURCE_TIMEOUTS.inc(source=tool.name)
+                
+                duration = time.perf_counter() - start
+                logger.debug(f"搜索分支 {tool.name} 完成，耗时 {duration:.2f}s，共获得 {len(results)} 个结果")
+                
+                # 只写入带reducer的字段，由LangGraph在汇合时合并各分支结果
+                return {
+                    "results": results,
+                    "timings": [{
+                        "node": tool.name,
+                        "iteration": state["iteration"],
+                        "started_at": started_at,
+                        "duration": round(duration, 3),
+                        "attempts": attempts,
+                        "results_count": len(results)
+                    }]
+                }
+            
+            return search_branch
+        
         def reflect_node(state: AgentState) -> AgentState:
-            """反思和总结"""
+            """反思：评估覆盖度并识别知识缺口"""
             logger.debug("进入reflect_node")
+            search_results = "\n\n".join(state["results"])
+            
+            prompt = f"""请评估以下搜索结果能否完整回答用户问题。
+
+                用户问题：{state["query"]}
+
+                已搜索过的查询：{json.dumps(state["searched"], ensure_ascii=False)}
+
+                搜索结果内容：
+                {search_results}
+
+                请以JSON格式返回评估结果：
+                {{
+                    "coverage": 0到1之间的数字，表示搜索结果对问题的覆盖程度,
+                    "gaps": ["尚缺少的信息，每项写成简洁的英文搜索关键词"]
+                }}
+
+                只返回JSON格式，不要包含其他内容。
+                """
+            
+            try:
+                logger.debug("调用LLM进行反思")
+                response = _invoke_llm(self.llm, prompt, "reflect")
+                json_match = re.search(r'\{[\s\S]*\}', response)
+                reflection = json.loads(json_match.group()) if json_match else {}
+                coverage = float(reflection.get("coverage", 1.0))
+                gaps = [gap.strip() for gap in reflection.get("gaps", []) if isinstance(gap, str) and gap.strip()]
+            except Exception as e:
+                logger.error(f"反思时发生错误: {str(e)}", exc_info=True)
+                # 反思失败时不再继续搜索，直接基于已有结果生成回答
+                coverage, gaps = 1.0, []
+            
+            # 只保留尚未搜索过的知识缺口
+            gaps = [gap for gap in gaps if gap not in state["searched"]][:MAX_GAPS_PER_ROUND]
+            logger.debug(f"反思完成，覆盖度: {coverage}，知识缺口: {gaps}")
+            
+            return {
+                "coverage": coverage,
+                "gaps": gaps,
+                "queries": gaps,
+                "next": "search" if should_continue(coverage, gaps, state["iteration"], state["max_iterations"]) else "answer"
+            }
+        
+        def answer_node(state: AgentState) -> AgentState:
+            """总结所有轮次的搜索结果"""
+            logger.debug("进入answer_node")
             messages = state["messages"]
             
             # 获取所有搜索结果
-            search_results = messages[-1].content
+            search_results = "\n\n".join(state["results"])
             logger.debug(f"开始总结搜索结果，结果长度: {len(search_results)}")
             
             try:
                 # 生成总结
-                prompt = f"""请对以下搜索结果进行简明扼要的总结。要求：
+                prompt = f"""请针对用户问题，对以下搜索结果进行简明扼要的总结。要求：
                 1. 保持客观准确
                 2. 突出最重要的信息点
                 3. 如果有多个来源的信息，注意整合和对比
                 4. 总结控制在1000字以内
                 5. 使用清晰的段落结构
 
+                用户问题：{state["query"]}
+
                 搜索结果内容：
                 {search_results}
                 """
                 
                 logger.debug("调用LLM生成总结")
-                summary = self.llm.invoke(prompt).content
+                summary = _invoke_llm(self.llm, prompt, "answer")
                 logger.debug(f"生成总结完成，总结长度: {len(summary)}")
                 
             except Exception as e:
@@ -155,36 +482,100 @@ class SearchAgent:
         # 构建工作流
         workflow = StateGraph(AgentState)
         
-        # 添加节点
-        workflow.add_node("search", search_node)
-        workflow.add_node("reflect", reflect_node)
+        # 添加节点：每个搜索工具一个并行分支
+        branches = [tool.name for tool in self.tools]
+        workflow.add_node("probe", _traced_node("probe", probe_node))
+        workflow.add_node("dispatch", _traced_node("dispatch", dispatch_node))
+        for tool in self.tools:
+            workflow.add_node(tool.name, _traced_node(tool.name, make_search_branch(tool)))
+        workflow.add_node("reflect", _traced_node("reflect", reflect_node))
+        workflow.add_node("answer", _traced_node("answer", answer_node))
         
-        # 设置边
-        workflow.set_entry_point("search")
-        workflow.add_edge("search", "reflect")
-        workflow.add_edge("reflect", END)
+        # 设置边：probe可直接结束；dispatch扇出到各分支，全部分支完成后汇合到reflect
+        workflow.set_entry_point("probe")
+        workflow.add_conditional_edges(
+            "probe",
+            lambda state: state["next"],
+            {"dispatch": "dispatch", END: END}
+        )
+        for branch in branches:
+            workflow.add_edge("dispatch", branch)
+        workflow.add_edge(branches, "reflect")
+        workflow.add_conditional_edges(
+            "reflect",
+            lambda state: state["next"],
+            {"search": "dispatch", "answer": "answer"}
+        )
+        workflow.add_edge("answer", END)
         
         return workflow.compile()
     
-    def search(self, query: str, max_iterations: int = 3) -> str:
-        """执行搜索"""
+    def search_with_details(self, query: str, max_iterations: int = 3,
+                            allow_fast_path: bool = True,
+                            trace: Optional[str] = None) -> Dict[str, Any]:
+        """
+        执行搜索并返回迭代详情
+        
+        Args:
+            query: 用户查询
+            max_iterations: 最大搜索轮数
+            allow_fast_path: 是否允许单一来源高置信度时跳过总结直接作答
+            trace: 返回各阶段耗时追踪的格式（"tree"或"chrome"），为空时不追踪
+            
+        Returns:
+            包含回答、实际迭代次数、覆盖度、剩余知识缺口、各搜索分支耗时以及
+            是否走快速路径的字典，以及按阶段/搜索源/模型汇总的LLM用量和费用；
+            开启追踪时另含trace
+        """
+        with usage.track() as tracker:
+            if trace:
+                with tracing.trace() as tracer:
+                    details = self._search_with_details(query, max_iterations, allow_fast_path)
+                details["trace"] = tracer.export(trace)
+            else:
+                details = self._search_with_details(query, max_iterations, allow_fast_path)
+        details["usage"] = tracker.summary()
+        return details
+    
+    def _search_with_details(self, query: str, max_iterations: int, allow_fast_path: bool) -> Dict[str, Any]:
+        """执行一次完整的搜索工作流"""
         logger.debug(f"开始执行搜索，查询: {query}, 最大迭代次数: {max_iterations}")
+        max_iterations = max(1, max_iterations)
         
         # 初始化状态
         state = {
             "messages": [HumanMessage(content=query)],
-            "next": "search"
+            "query": query,
+            "queries": [query],
+            "searched": [],
+            "results": [],
+            "timings": [],
+            "gaps": [],
+            "coverage": 0.0,
+            "iteration": 0,
+            "max_iterations": max_iterations,
+            "allow_fast_path": allow_fast_path,
+            "fast_path": False,
+            "next": "probe"
         }
         
-        # 执行工作流
-        for i in range(max_iterations):
-            logger.debug(f"开始第 {i+1} 次迭代")
-            state = self.workflow.invoke(state)
-            if state["next"] == END:
-                logger.debug("工作流执行完成")
-                break
+        # 执行工作流（每轮包含dispatch、并行搜索分支和reflect三个步骤，另加answer节点）
+        with tracing.span("search", query=query):
+            state = self.workflow.invoke(state, {"recursion_limit": 3 * max_iterations + 5})
+        logger.debug(f"工作流执行完成，共 {state['iteration']} 轮，覆盖度: {state['coverage']}")
         
         # 返回最终结果
         final_result = state["messages"][-1].content
         logger.debug(f"搜索完成，返回结果长度: {len(final_result)}")
-        return final_result 
\ No newline at end of file
+        return {
+            "answer": final_result,
+            "iterations": state["iteration"],
+            "coverage": state["coverage"],
+            "gaps": state["gaps"],
+            "timings": state["timings"],
+            "fast_path": state["fast_path"]
+        }
+    
+    def search(self, query: str, max_iterations: int = 3) -> str:
+        """执行搜索"""
+        return self.search_with_details(query, max_iterations)["answer"]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+共享HTTP客户端
+每个线程使用独立的requests.Session，所有Session挂载同一个线程安全的连接池，
+既避免并发请求共享Session状态，又能复用到各上游主机的连接
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import cassette, metrics, tracing
+
+# 默认请求头，设置User-Agent避免被封禁
+DEFAULT_HEADERS = {
+    'User-Agent': 'LangChain-Agent/1.0 (Educational Research Assistant) Python/3.x'
+}
+
+# 所有线程共享的连接池（urllib3的PoolManager是线程安全的）
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """获取当前线程的Session"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount("http://", _adapter)
+        session.mount("https://", _adapter)
+        _local.session = session
+    return session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    使用当前线程的Session发送GET请求，并记录耗时、状态码、响应字节数及错误/超时指标
+    
+    启用cassette时按录制/回放模式处理（见cassette模块）
+    """
+    host = urlsplit(url).netloc
+    start = time.perf_counter()
+    with tracing.span("http.get", host=host) as span:
+        try:
+            response, replayed = cassette.http_get(get_session().get, url, **kwargs)
+        except requests.exceptions.Timeout:
+            metrics.UPSTREAM_TIMEOUTS.inc(host=host)
+            raise
+        except requests.exceptions.RequestException:
+            metrics.UPSTREAM_ERRORS.inc(host=host)
+            raise
+        finally:
+            metrics.UPSTREAM_DURATION.observe(time.perf_counter() - start, host=host)
+        if response.status_code >= 400:
+            metrics.UPSTREAM_ERRORS.inc(host=host)
+        span.set(status=response.status_code, bytes=len(response.content), replayed=replayed)
+        return response
+
+
+def warm_up(urls: Iterable[str], connections_per_host: int = 2, timeout: float = 5) -> Dict[str, str]:
+    """
+    预先建立到各主机的连接（DNS解析、TCP和TLS握手），连接保留在共享连接池中供后续请求复用
+
+    Args:
+        urls: 需要预热的地址
+        connections_per_host: 每个主机并发建立的连接数
+        timeout: 单个请求的超时时间（秒）
+
+    Returns:
+        主机 -> "ok"或错误信息
+    """
+    hosts = {}
+    for url in urls:
+        parts = urlsplit(url)
+        hosts.setdefault(parts.netloc, f"{parts.scheme}://{parts.netloc}/")
+
+    def connect(url: str) -> None:
+        # 只关心连接建立，响应状态码（例如404/405）不影响预热效果
+        get_session().head(url, timeout=timeout, allow_redirects=False)
+
+    results = {}
+    if not hosts:
+        return results
+    with ThreadPoolExecutor(max_workers=len(hosts) * connections_per_host,
+                            thread_name_prefix="http-warmup") as executor:
+        futures = {host: [executor.submit(connect, url) for _ in range(connections_per_host)]
+                   for host, url in hosts.items()}
+        for host, host_futures in futures.items():
+            errors = [str(future.exception()) for future in host_futures if future.exception()]
+            results[host] = errors[0] if errors else "ok"
+    return results
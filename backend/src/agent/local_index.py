@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+本地全文索引
+把所有搜索源取回的文档（论文、百科条目、摘要片段）写入SQLite FTS5索引，
+作为`local`搜索源在毫秒级内回答查询，并在上游不可达时继续提供结果。
+
+分词：英文/数字按单词切分并转小写，中文按二元组切分（单字的中文片段保留单字），
+预先切分后的词项以空格连接写入FTS5，查询时使用相同的切分方式。
+
+命令行用法：
+    python -m backend.src.agent.local_index search "大语言模型"
+    python -m backend.src.agent.local_index stats
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# 项目根目录（默认索引文件相对于项目根目录，而不是当前工作目录）
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# 默认索引文件
+DEFAULT_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH") or str(_PROJECT_ROOT / "data" / "local_index.sqlite")
+
+# 本地搜索默认返回的结果数量
+DEFAULT_LIMIT = 5
+
+# 作为正文写入索引的结果字段
+_BODY_FIELDS = ("summary", "snippet", "abstract", "extract", "content", "description")
+
+# 查询时忽略的常见英文词
+_STOPWORDS = {"a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "what", "how", "why"}
+
+# 中文字符片段
+_CJK_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_key TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_source ON documents(source);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, tokenize='unicode61');
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """切分索引/查询词项：英文单词转小写，中文切分为二元组"""
+    text = text.lower()
+    tokens = re.findall(r'[a-z0-9]+', _CJK_PATTERN.sub(" ", text))
+    for run in _CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def document_key(item: Dict[str, Any]) -> str:
+    """文档去重键：优先使用链接，其次使用规范化的标题"""
+    link = str(item.get("link") or "").strip()
+    if link:
+        return link
+    return " ".join(str(item.get("title") or "").split()).casefold()
+
+
+def _document_body(item: Dict[str, Any]) -> str:
+    """拼接文档正文：摘要类字段和作者"""
+    parts = [str(item[field]) for field in _BODY_FIELDS if item.get(field)]
+    authors = item.get("authors")
+    if isinstance(authors, list):
+        parts.append(" ".join(str(author) for author in authors))
+    elif authors:
+        parts.append(str(authors))
+    return "\n".join(parts)
+
+
+def _iso_time(epoch: float) -> str:
+    """Unix时间戳转换为ISO时间字符串（秒精度）"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(epoch))
+
+
+class LocalIndex:
+    """已获取文档的本地全文索引"""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_INDEX_PATH):
+        """
+        打开（或创建）索引
+
+        Args:
+            path: SQLite索引文件路径（":memory:"表示仅在内存中）
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            self._db.executescript(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            self._db.close()
+            raise RuntimeError(f"当前SQLite不支持FTS5全文索引: {e}") from e
+
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "LocalIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_documents(self, source: str, results: Iterable[Dict[str, Any]]) -> int:
+        """
+        写入一个搜索源返回的结果，已存在的文档（相同链接或标题）会被更新
+
+        Args:
+            source: 结果所属的搜索源
+            results: 搜索结果列表
+
+        Returns:
+            写入的文档数量
+        """
+        now = time.time()
+        rows = []
+        for item in results:
+            if not isinstance(item, dict):
+                continue
+            key = document_key(item)
+            title = str(item.get("title") or "")
+            if not key or not title:
+                continue
+            rows.append((key, title, item))
+
+        with self._lock, self._db:
+            for key, title, item in rows:
+                existing = self._db.execute(
+                    "SELECT id FROM documents WHERE doc_key = ?", (key,)
+                ).fetchone()
+                data = json.dumps(item, ensure_ascii=False)
+                if existing:
+                    doc_id = existing[0]
+                    self._db.execute(
+                        "UPDATE documents SET source = ?, title = ?, link = ?, data = ?, fetched_at = ? WHERE id = ?",
+                        (source, title, item.get("link"), data, now, doc_id)
+                    )
+                    self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                else:
+                    doc_id = self._db.execute(
+                        "INSERT INTO documents (doc_key, source, title, link, data, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, source, title, item.get("link"), data, now)
+                    ).lastrowid
+                self._db.execute(
+                    "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                    (doc_id, " ".join(tokenize(title)), " ".join(tokenize(_document_body(item))))
+                )
+        return len(rows)
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """
+        按BM25相关度检索文档（标题权重更高）
+
+        Args:
+            query: 查询
+            limit: 返回的最大结果数量
+
+        Returns:
+            原始结果字典，附加origin（原始搜索源）、fetched_at和score字段
+        """
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term not in _STOPWORDS]
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT d.source, d.data, d.fetched_at, bm25(documents_fts, 2.0, 1.0) AS rank "
+                "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid "
+                "WHERE documents_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit)
+            ).fetchall()
+
+        results = []
+        for source, data, fetched_at, rank in rows:
+            item = json.loads(data)
+            item.update({
+                "origin": source,
+                "fetched_at": _iso_time(fetched_at),
+                "score": round(-rank, 6)
+            })
+            results.append(item)
+        return results
+
+    def count(self) -> int:
+        """索引中的文档数量"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计：文档总数和各搜索源的文档数"""
+        with self._lock:
+            by_source = dict(self._db.execute(
+                "SELECT source, COUNT(*) FROM documents GROUP BY source ORDER BY source"
+            ).fetchall())
+        return {"path": self.path, "documents": sum(by_source.values()), "by_source": by_source}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="本地全文索引")
+    parser.add_argument("--path", default=DEFAULT_INDEX_PATH, help="索引文件路径")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="检索索引")
+    search_parser.add_argument("query", help="查询")
+    search_parser.add_argument("--limit", type=int, default=10, help="返回的最大结果数量")
+
+    subparsers.add_parser("stats", help="显示索引统计")
+
+    args = parser.parse_args(argv)
+    with LocalIndex(args.path) as index:
+        if args.command == "search":
+            for item in index.search(args.query, args.limit):
+                sys.stdout.write(json.dumps(item, ensure_ascii=False) + "\n")
+        else:
+            print(json.dumps(index.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
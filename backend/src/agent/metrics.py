@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+运行指标
+轻量级的Prometheus文本格式指标注册表：计数器、仪表和直方图。
+每次记录只有一次加锁和一次二分查找，可在满负载下常开；序列化只在抓取/metrics时进行。
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 抓取/metrics时返回的Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认的耗时直方图分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """格式化标签部分，例如 {source="arxiv",le="0.5"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """格式化数值（整数不带小数点）"""
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """指标基类"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set_function(self, function: Callable[[], float]):
+        """抓取时调用function获取当前值（仅适用于无标签的指标）"""
+        self._function = function
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """生成该指标的文本格式行"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        if self._function is not None:
+            try:
+                lines.append(f"{self.name} {_format_value(self._function())}")
+            except Exception:
+                pass
+            return lines
+        return lines + self._samples()
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """增加计数"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """可增可减的仪表"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        """设置当前值"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        """增加当前值"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """减少当前值"""
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签对应 [各分桶计数(含+Inf), 总和]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        """记录一次观测值"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标，同名指标只保留第一个"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """按名称获取指标"""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """生成Prometheus文本格式的全部指标"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局注册表
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    """在全局注册表中创建计数器"""
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    """在全局注册表中创建仪表"""
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (),
+              buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    """在全局注册表中创建直方图"""
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# API请求
+HTTP_REQUEST_DURATION = histogram(
+    "search_agent_http_request_duration_seconds", "API请求耗时", ("method", "endpoint", "status"))
+HTTP_REQUESTS_IN_FLIGHT = gauge(
+    "search_agent_http_requests_in_flight", "正在处理的API请求数")
+WEBSOCKET_CONNECTIONS = gauge(
+    "search_agent_websocket_connections", "当前WebSocket连接数")
+
+# 搜索执行
+SEARCH_DURATION = histogram(
+    "search_agent_search_duration_seconds", "单次搜索的执行耗时（不含排队）", ("endpoint", "outcome"))
+SEARCHES_ACTIVE = gauge(
+    "search_agent_searches_active", "正在执行的搜索数")
+SEARCH_QUEUE_DEPTH = gauge(
+    "search_agent_search_queue_depth", "等待并发名额的搜索数")
+
+# 搜索源
+SOURCE_DURATION = histogram(
+    "search_agent_source_duration_seconds", "单个搜索源调用耗时（含缓存命中）", ("source", "outcome"))
+SOURCE_ERRORS = counter(
+    "search_agent_source_errors_total", "搜索源调用失败次数", ("source",))
+SOURCE_TIMEOUTS = counter(
+    "search_agent_source_timeouts_total", "搜索源调用超时次数", ("source",))
+
+# 上游HTTP请求
+UPSTREAM_DURATION = histogram(
+    "search_agent_upstream_request_duration_seconds", "上游HTTP请求耗时", ("host",))
+UPSTREAM_ERRORS = counter(
+    "search_agent_upstream_errors_total", "上游HTTP请求失败次数（含非2xx响应）", ("host",))
+UPSTREAM_TIMEOUTS = counter(
+    "search_agent_upstream_timeouts_total", "上游HTTP请求超时次数", ("host",))
+
+# LLM
+LLM_TOKENS = counter(
+    "search_agent_llm_tokens_total", "LLM token用量", ("stage", "type"))
+LLM_DURATION = histogram(
+    "search_agent_llm_duration_seconds", "LLM调用耗时", ("stage",))
+LLM_COST = counter(
+    "search_agent_llm_cost_usd_total", "按价格表估算的LLM费用（美元）", ("stage", "model"))
+
+# 搜索结果缓存（抓取时从缓存统计信息中读取）
+CACHE_HITS = counter("search_agent_cache_hits_total", "搜索结果缓存命中次数")
+CACHE_MISSES = counter("search_agent_cache_misses_total", "搜索结果缓存未命中次数")
+CACHE_ENTRIES = gauge("search_agent_cache_entries", "搜索结果缓存条目数")
+CACHE_HIT_RATIO = gauge("search_agent_cache_hit_ratio", "搜索结果缓存命中率")
+
+
+def bind_cache(cache) -> None:
+    """将缓存指标绑定到指定的ResultCache实例"""
+    CACHE_HITS.set_function(lambda: cache.stats()["hits"])
+    CACHE_MISSES.set_function(lambda: cache.stats()["misses"])
+    CACHE_ENTRIES.set_function(lambda: cache.stats()["entries"])
+    CACHE_HIT_RATIO.set_function(lambda: cache.stats()["hit_ratio"])
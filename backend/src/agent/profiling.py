@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+按需性能剖析
+对单个被标记的请求运行性能剖析器，返回最耗时的函数列表并保存可下载的剖析文件；
+未标记的请求完全不经过本模块。
+
+两种模式：
+    cprofile  确定性剖析（cProfile），只覆盖执行请求的线程，结果保存为.prof（可用pstats/snakeviz查看）
+    sampling  采样剖析，周期性采集进程内所有线程的调用栈，覆盖线程池中的搜索分支；
+              结果保存为折叠栈文本（可用speedscope/flamegraph.pl查看）。
+              采样覆盖整个进程，并发请求较多时结果中会包含其他请求的调用栈。
+
+剖析需要特权令牌：环境变量PROFILE_TOKEN未设置时剖析功能关闭。
+"""
+
+import cProfile
+import hmac
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 剖析模式
+PROFILE_MODES = ("cprofile", "sampling")
+
+# 允许剖析的特权令牌
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+
+# 项目根目录：默认剖析目录相对于项目根目录（而不是当前工作目录）；
+# 采样时只保留经过项目代码的调用栈，忽略空闲的线程池线程
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+
+# 剖析文件保存目录
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(_PROJECT_ROOT) / "profiles")
+
+# 采样间隔（秒）
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# 返回的热点函数数量
+TOP_FUNCTIONS = 20
+
+# 剖析文件ID格式（防止下载接口被用于路径穿越）
+_PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# 剖析文件扩展名
+_ARTIFACT_SUFFIXES = {"cprofile": ".prof", "sampling": ".collapsed.txt"}
+
+# 同一时间只剖析一个请求，避免剖析器互相干扰
+_profile_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    """是否配置了剖析令牌"""
+    return bool(PROFILE_TOKEN)
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """校验剖析令牌"""
+    if not PROFILE_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+
+
+def artifact_path(profile_id: str) -> Optional[Path]:
+    """根据剖析ID查找剖析文件，不存在或ID非法时返回None"""
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    for suffix in _ARTIFACT_SUFFIXES.values():
+        path = PROFILE_DIR / f"{profile_id}{suffix}"
+        if path.is_file():
+            return path
+    return None
+
+
+def _format_function(filename: str, lineno: int, name: str) -> str:
+    """格式化函数位置"""
+    return f"{name} ({filename}:{lineno})"
+
+
+class SamplingProfiler:
+    """基于sys._current_frames()的采样剖析器"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        """
+        初始化采样剖析器
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台采样线程"""
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                in_project = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_project = in_project or code.co_filename.startswith(_PROJECT_ROOT)
+                    stack.append(_format_function(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                if in_project:
+                    stack.reverse()
+                    self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def top(self, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+        """按包含子调用的采样数排序的热点函数"""
+        inclusive: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            for function in set(stack):
+                inclusive[function] += count
+            own[stack[-1]] += count
+        total = sum(self.stacks.values()) or 1
+        return [{
+            "function": function,
+            "samples": count,
+            "self_samples": own[function],
+            "percent": round(count * 100 / total, 2)
+        } for function, count in inclusive.most_common(limit)]
+
+    def dump(self, path: Path):
+        """保存为折叠栈格式（每行：frame1;frame2;... 采样数）"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.items():
+                f.write(f"{';'.join(stack)} {count}\n")
+
+
+def _cprofile_top(profiler: cProfile.Profile, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """按累计耗时排序的热点函数"""
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        "function": _format_function(*func),
+        "calls": nc,
+        "total_time": round(tt, 6),
+        "cumulative_time": round(ct, 6)
+    } for func, (cc, nc, tt, ct, callers) in rows]
+
+
+def run_profiled(mode: str, func: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """
+    在剖析器下执行函数
+
+    Args:
+        mode: 剖析模式（cprofile或sampling）
+        func: 被剖析的函数
+
+    Returns:
+        (函数返回值, 剖析报告)，报告包含模式、耗时、热点函数和剖析文件ID
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"未知的剖析模式: {mode}")
+
+    profile_id = uuid.uuid4().hex
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{profile_id}{_ARTIFACT_SUFFIXES[mode]}"
+
+    with _profile_lock:
+        start = time.perf_counter()
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(func, *args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                profiler.dump_stats(str(path))
+            top = _cprofile_top(profiler)
+            extra = {}
+        else:
+            profiler = SamplingProfiler()
+            profiler.start()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.stop()
+                duration = time.perf_counter() - start
+                profiler.dump(path)
+            top = profiler.top()
+            extra = {"samples": profiler.samples, "interval": profiler.interval}
+
+    return result, {
+        "id": profile_id,
+        "mode": mode,
+        "duration": round(duration, 3),
+        "top": top,
+        **extra
+    }
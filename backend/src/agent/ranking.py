@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+跨搜索源的融合排序
+把按搜索源分组的结果合并为一个全局排序列表，供汇总提示打包和前端展示使用，
+排序结果与子查询完成的先后无关。
+
+得分 = 倒数排名融合（RRF）+ 加权特征：
+    RRF      每个搜索源内的排名贡献 1 / (k + rank)；合并过的实体按其出现过的每个搜索源各计一次
+    相似度   与查询的哈希向量余弦相似度（作为一个额外的排序列表参与RRF）
+    时效性   arXiv的published或Wikipedia的timestamp，按半衰期指数衰减
+    引用数   Google Scholar的cited_by（对数归一化）
+    篇幅     Wikipedia的wordcount（对数归一化）
+特征取值归一化到0-1，乘以权重后再乘以排名第一的RRF贡献 1 / (k + 1)，与RRF处于同一量级。
+所有得分在候选集上用NumPy向量化计算。
+
+多样化：在全局排序之后用最大边际相关性（MMR）贪心选出一个较小的子集，
+兼顾相关性（融合得分）和与已选结果的差异（哈希向量余弦相似度），按结果数量或
+token预算截断，减少相互重复的摘要进入汇总提示。
+"""
+
+import json
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .vector_index import document_text, embed
+
+# RRF平滑常数
+RRF_K = 60
+
+# 默认特征权重
+DEFAULT_WEIGHTS = {
+    "similarity": 1.0,
+    "recency": 0.5,
+    "citations": 0.5,
+    "wordcount": 0.25,
+}
+
+# 时效性半衰期（年）
+RECENCY_HALF_LIFE_YEARS = 3.0
+
+# MMR中相关性的权重（1为只看相关性，0为只看多样性）
+MMR_LAMBDA = 0.5
+
+# 估算token数：中文字符每个约1个token，其他字符约4个字符1个token
+_CJK_CHAR_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_CHARS_PER_TOKEN = 4
+
+# 各特征读取的结果字段
+_DATE_FIELDS = ("published", "timestamp")
+
+
+def _parse_time(value: Any) -> float:
+    """解析ISO时间字符串为Unix时间戳，无法解析时返回NaN"""
+    if not isinstance(value, str) or not value:
+        return math.nan
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _item_time(item: Dict[str, Any]) -> float:
+    """结果的发布时间或修改时间，没有时返回NaN"""
+    for field in _DATE_FIELDS:
+        parsed = _parse_time(item.get(field))
+        if not math.isnan(parsed):
+            return parsed
+    return math.nan
+
+
+def _number(value: Any) -> float:
+    """读取数值特征，缺失或非法时返回0"""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _log_normalize(values: np.ndarray) -> np.ndarray:
+    """对数归一化到0-1"""
+    logged = np.log1p(values)
+    peak = logged.max(initial=0.0)
+    return logged / peak if peak > 0 else np.zeros_like(logged)
+
+
+def fuse(search_results: Dict[str, Any], query: Optional[str] = None,
+         weights: Optional[Dict[str, float]] = None, k: int = RRF_K,
+         now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    把各搜索源的结果融合为一个全局排序列表
+
+    Args:
+        search_results: 按搜索源分组的搜索结果（结果顺序即该搜索源内的排名）
+        query: 用户查询，为空时不计算相似度特征
+        weights: 特征权重，覆盖DEFAULT_WEIGHTS中的同名项（权重为0表示关闭该特征）
+        k: RRF平滑常数
+        now: 计算时效性的当前时间（Unix时间戳），默认为当前时间
+
+    Returns:
+        按得分从高到低排序的结果副本，附加source（所在搜索源）、rank和rank_score字段；
+        得分相同时保持搜索源和源内顺序
+    """
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    candidates = []
+    source_ranks = []
+    for source, data in search_results.items():
+        if data.get("status") != "success":
+            continue
+        for rank, item in enumerate(data.get("results", []), start=1):
+            candidates.append((source, item))
+            source_ranks.append(rank)
+    if not candidates:
+        return []
+
+    items = [item for _, item in candidates]
+    ranks = np.asarray(source_ranks, dtype=np.float64)
+    # 合并过的实体在每个出现过的搜索源中各贡献一次
+    appearances = np.asarray([max(len(item.get("sources") or []), 1) for item in items], dtype=np.float64)
+    scores = appearances / (k + ranks)
+    unit = 1.0 / (k + 1)
+
+    if query and weights.get("similarity"):
+        similarity = embed([document_text(item) for item in items]) @ embed([query])[0]
+        order = np.argsort(-similarity, kind="stable")
+        similarity_ranks = np.empty(len(items))
+        similarity_ranks[order] = np.arange(1, len(items) + 1)
+        scores += weights["similarity"] / (k + similarity_ranks)
+
+    if weights.get("recency"):
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        times = np.asarray([_item_time(item) for item in items])
+        age_years = np.clip((now - times) / (365.25 * 86400), 0.0, None)
+        recency = np.where(np.isnan(times), 0.0, np.exp2(-age_years / RECENCY_HALF_LIFE_YEARS))
+        scores += weights["recency"] * unit * recency
+
+    if weights.get("citations"):
+        citations = np.asarray([_number(item.get("cited_by")) for item in items])
+        scores += weights["citations"] * unit * _log_normalize(citations)
+
+    if weights.get("wordcount"):
+        wordcount = np.asarray([_number(item.get("wordcount")) for item in items])
+        scores += weights["wordcount"] * unit * _log_normalize(wordcount)
+
+    ranked = []
+    for position, index in enumerate(np.argsort(-scores, kind="stable"), start=1):
+        source, item = candidates[index]
+        ranked.append({**item, "source": source, "rank": position, "rank_score": round(float(scores[index]), 6)})
+    return ranked
+
+
+def estimate_tokens(item: Any) -> int:
+    """粗略估算结果序列化后占用的token数"""
+    text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False)
+    cjk = len(_CJK_CHAR_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / _CHARS_PER_TOKEN)
+
+
+def diversify(ranked: List[Dict[str, Any]], max_results: Optional[int] = None,
+              token_budget: Optional[int] = None, mmr_lambda: float = MMR_LAMBDA) -> List[Dict[str, Any]]:
+    """
+    用最大边际相关性从排序结果中选出多样化的子集
+
+    每一步选择 mmr_lambda * 相关性 - (1 - mmr_lambda) * 与已选结果的最大相似度 最高的结果；
+    相关性为rank_score的最小-最大归一化（没有rank_score时按排名递减）。
+
+    Args:
+        ranked: 按相关性排序的结果（fuse的输出）
+        max_results: 最多选出的结果数量，为空时不限
+        token_budget: 选出结果的估算token总数上限，放不下的结果被跳过，为空时不限
+        mmr_lambda: 相关性权重
+
+    Returns:
+        按被选中的先后顺序排列的结果
+    """
+    if not ranked:
+        return []
+    limit = len(ranked) if max_results is None else min(max_results, len(ranked))
+    if limit <= 0:
+        return []
+
+    scores = np.asarray([item.get("rank_score", -position) for position, item in enumerate(ranked)],
+                        dtype=np.float64)
+    spread = scores.max() - scores.min()
+    relevance = (scores - scores.min()) / spread if spread > 0 else np.ones(len(ranked))
+    vectors = embed([document_text(item) for item in ranked])
+    tokens = np.asarray([estimate_tokens(item) for item in ranked])
+
+    available = np.ones(len(ranked), dtype=bool)
+    if token_budget is not None:
+        available &= tokens <= token_budget
+    max_similarity = np.zeros(len(ranked))
+    remaining_budget = token_budget
+    selected = []
+    while len(selected) < limit and available.any():
+        mmr = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        index = int(np.argmax(np.where(available, mmr, -np.inf)))
+        selected.append(index)
+        available[index] = False
+        max_similarity = np.maximum(max_similarity, vectors @ vectors[index])
+        if remaining_budget is not None:
+            remaining_budget -= int(tokens[index])
+            available &= tokens <= remaining_budget
+    return [ranked[index] for index in selected]
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+搜索结果存储
+只追加的压缩分段文件 + SQLite索引，取代每次查询写一个带时间戳的JSON文件。
+
+存储目录结构：
+    segment-000001.gz ...  分段文件，每条记录（含记录ID）是一个独立的gzip member，整个文件仍是合法的gzip流
+    index.sqlite           索引：记录ID、查询、时间戳、搜索源及其在分段文件中的位置
+
+支持按查询快速查找、按时间范围/搜索源扫描、压缩整理（去除已删除记录并合并分段）
+以及流式导出全部历史（JSON Lines）。同一目录只应由一个进程写入。
+
+命令行用法：
+    python -m backend.src.agent.result_store find --query "大语言模型" --since 2025-06-01
+    python -m backend.src.agent.result_store export > history.jsonl
+    python -m backend.src.agent.result_store import search_result_*.json
+    python -m backend.src.agent.result_store compact --keep-latest
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+# 项目根目录（默认存储目录相对于项目根目录，而不是当前工作目录）
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# 默认存储目录
+DEFAULT_STORE_DIR = os.getenv("RESULT_STORE_DIR") or str(_PROJECT_ROOT / "data" / "results")
+
+# 单个分段文件的最大字节数，超出后写入新分段
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+# 分段文件名格式
+_SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.gz$')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_records_query ON records(query_key, timestamp);
+CREATE INDEX IF NOT EXISTS idx_records_timestamp ON records(timestamp);
+CREATE TABLE IF NOT EXISTS record_sources (
+    record_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (source, record_id)
+);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询用于索引（忽略大小写和多余空白）"""
+    return " ".join(query.split()).casefold()
+
+
+def _to_epoch(value: Union[None, float, int, str, datetime]) -> Optional[float]:
+    """将时间戳、ISO时间字符串或datetime转换为Unix时间戳"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+class ResultStore:
+    """只追加的搜索结果存储"""
+
+    def __init__(self, directory: Union[str, Path] = DEFAULT_STORE_DIR,
+                 segment_max_bytes: int = SEGMENT_MAX_BYTES):
+        """
+        打开（或创建）存储目录
+
+        Args:
+            directory: 存储目录
+            segment_max_bytes: 单个分段文件的最大字节数
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.directory / "index.sqlite"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        segments = self._segment_numbers()
+        self._active_segment = segments[-1] if segments else 1
+
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ---- 写入 ----
+
+    def append(self, query: str, record: Dict[str, Any],
+               timestamp: Union[None, float, str, datetime] = None,
+               sources: Optional[Iterable[str]] = None) -> int:
+        """
+        追加一条搜索结果
+
+        Args:
+            query: 用户查询
+            record: 搜索结果（需可JSON序列化）
+            timestamp: 记录时间，默认取record中的timestamp字段或当前时间
+            sources: 记录涉及的搜索源，默认取record中search_results的键
+
+        Returns:
+            记录ID
+        """
+        epoch = _to_epoch(timestamp if timestamp is not None else record.get("timestamp")) or time.time()
+        if sources is None:
+            search_results = record.get("search_results")
+            sources = search_results.keys() if isinstance(search_results, dict) else []
+        sources = sorted(set(sources))
+
+        with self._lock, self._db:
+            # 先分配记录ID并随记录写入分段，重建索引时可以恢复原ID；写入失败时整个事务回滚
+            cursor = self._db.execute(
+                "INSERT INTO records (query, query_key, timestamp, segment, offset, length) VALUES (?, ?, ?, 0, 0, 0)",
+                (query, normalize_query(query), epoch)
+            )
+            record_id = cursor.lastrowid
+            envelope = {"id": record_id, "query": query, "timestamp": epoch, "sources": sources, "data": record}
+            member = gzip.compress(json.dumps(envelope, ensure_ascii=False).encode("utf-8") + b"\n")
+            segment, offset = self._write_member(member)
+            self._db.execute("UPDATE records SET segment = ?, offset = ?, length = ? WHERE id = ?",
+                             (segment, offset, len(member), record_id))
+            self._db.executemany("INSERT INTO record_sources (record_id, source) VALUES (?, ?)",
+                                 [(record_id, source) for source in sources])
+        return record_id
+
+    def delete(self, record_id: int) -> bool:
+        """标记删除记录（数据在下次压缩整理时移除）"""
+        with self._lock, self._db:
+            cursor = self._db.execute("UPDATE records SET deleted = 1 WHERE id = ? AND deleted = 0", (record_id,))
+        return cursor.rowcount > 0
+
+    # ---- 查询 ----
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """按ID读取记录，返回包含id/query/timestamp/sources/data的字典"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, segment, offset, length FROM records WHERE id = ? AND deleted = 0", (record_id,)
+            ).fetchone()
+        return self._read(row) if row else None
+
+    def latest(self, query: str) -> Optional[Dict[str, Any]]:
+        """获取某个查询最近一次的结果"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, segment, offset, length FROM records "
+                "WHERE query_key = ? AND deleted = 0 ORDER BY timestamp DESC, id DESC LIMIT 1",
+                (normalize_query(query),)
+            ).fetchone()
+        return self._read(row) if row else None
+
+    def find(self, query: Optional[str] = None, source: Optional[str] = None,
+             since: Union[None, float, str, datetime] = None,
+             until: Union[None, float, str, datetime] = None,
+             limit: Optional[int] = None, newest_first: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        按条件扫描记录（逐条读取，不会一次加载全部结果）
+
+        Args:
+            query: 查询（规范化后精确匹配）
+            source: 搜索源
+            since: 起始时间（含）
+            until: 结束时间（不含）
+            limit: 最多返回的记录数
+            newest_first: 是否按时间倒序返回
+        """
+        for row in self._select(query, source, since, until, limit, newest_first):
+            record = self._read(row)
+            if record is not None:
+                yield record
+
+    def count(self) -> int:
+        """有效记录数"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records WHERE deleted = 0").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """存储统计信息"""
+        with self._lock:
+            live, deleted = self._db.execute(
+                "SELECT COALESCE(SUM(deleted = 0), 0), COALESCE(SUM(deleted = 1), 0) FROM records"
+            ).fetchone()
+            sources = dict(self._db.execute(
+                "SELECT s.source, COUNT(*) FROM record_sources s JOIN records r ON r.id = s.record_id "
+                "WHERE r.deleted = 0 GROUP BY s.source"
+            ).fetchall())
+        segments = self._segment_numbers()
+        return {
+            "records": live,
+            "deleted": deleted,
+            "segments": len(segments),
+            "bytes": sum(self._segment_path(n).stat().st_size for n in segments),
+            "sources": sources
+        }
+
+    # ---- 导出 ----
+
+    def iter_export(self, since: Union[None, float, str, datetime] = None,
+                    until: Union[None, float, str, datetime] = None) -> Iterator[str]:
+        """按时间顺序逐条生成JSON Lines格式的历史记录"""
+        for record in self.find(since=since, until=until):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+    def export(self, fp: IO[str], since: Union[None, float, str, datetime] = None,
+               until: Union[None, float, str, datetime] = None) -> int:
+        """将历史记录流式写入文件对象，返回写入的记录数"""
+        count = 0
+        for line in self.iter_export(since, until):
+            fp.write(line)
+            count += 1
+        return count
+
+    # ---- 维护 ----
+
+    def compact(self, keep_latest_per_query: bool = False,
+                before: Union[None, float, str, datetime] = None) -> Dict[str, int]:
+        """
+        压缩整理：把有效记录按时间顺序重写到新分段，移除已删除记录和分段中的无效数据
+
+        Args:
+            keep_latest_per_query: 是否只保留每个查询最近一次的结果
+            before: 删除该时间之前的记录（保留期）
+
+        Returns:
+            整理前后的记录数和字节数
+        """
+        with self._lock:
+            before_stats = self.stats()
+            with self._db:
+                if before is not None:
+                    self._db.execute("UPDATE records SET deleted = 1 WHERE timestamp < ?", (_to_epoch(before),))
+                if keep_latest_per_query:
+                    self._db.execute(
+                        "UPDATE records SET deleted = 1 WHERE deleted = 0 AND id NOT IN ("
+                        "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                        "PARTITION BY query_key ORDER BY timestamp DESC, id DESC) AS rank "
+                        "FROM records WHERE deleted = 0) WHERE rank = 1)"
+                    )
+
+            old_segments = self._segment_numbers()
+            rows = self._db.execute(
+                "SELECT id, segment, offset, length FROM records WHERE deleted = 0 ORDER BY timestamp, id"
+            ).fetchall()
+
+            # 新分段编号接在现有分段之后，写完并更新索引后才删除旧分段
+            self._active_segment = (old_segments[-1] + 1) if old_segments else 1
+            moves = []
+            for record_id, segment, offset, length in rows:
+                member = self._read_member(segment, offset, length)
+                new_segment, new_offset = self._write_member(member)
+                moves.append((new_segment, new_offset, record_id))
+
+            with self._db:
+                self._db.executemany("UPDATE records SET segment = ?, offset = ? WHERE id = ?", moves)
+                self._db.execute("DELETE FROM record_sources WHERE record_id IN (SELECT id FROM records WHERE deleted = 1)")
+                self._db.execute("DELETE FROM records WHERE deleted = 1")
+            for number in old_segments:
+                self._segment_path(number).unlink(missing_ok=True)
+            self._db.execute("VACUUM")
+
+            after_stats = self.stats()
+        return {
+            "records_before": before_stats["records"] + before_stats["deleted"],
+            "records_after": after_stats["records"],
+            "bytes_before": before_stats["bytes"],
+            "bytes_after": after_stats["bytes"]
+        }
+
+    def rebuild_index(self) -> int:
+        """
+        根据分段文件重建索引（索引丢失或损坏时使用）
+
+        记录ID从分段中的记录恢复（同一ID出现多次时以后面的分段为准）；旧版本写入的不带ID的记录
+        在其后分配新ID。标记删除但尚未压缩整理的记录只在索引中标记，重建后会恢复。
+
+        Returns:
+            索引的记录数
+        """
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM record_sources")
+                self._db.execute("DELETE FROM records")
+                without_id = []
+                for number in self._segment_numbers():
+                    for offset, length, envelope in self._scan_segment(number):
+                        if isinstance(envelope.get("id"), int):
+                            self._index_envelope(envelope, number, offset, length)
+                        else:
+                            without_id.append((dict(envelope, id=None), number, offset, length))
+                for envelope, number, offset, length in without_id:
+                    self._index_envelope(envelope, number, offset, length)
+            return self.count()
+
+    # ---- 内部实现 ----
+
+    def _index_envelope(self, envelope: Dict[str, Any], segment: int, offset: int, length: int):
+        """把分段中的一条记录写入索引（id为None时分配新ID，调用方需持有锁并开启事务）"""
+        cursor = self._db.execute(
+            "INSERT OR REPLACE INTO records (id, query, query_key, timestamp, segment, offset, length) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (envelope["id"], envelope["query"], normalize_query(envelope["query"]), envelope["timestamp"],
+             segment, offset, length)
+        )
+        self._db.executemany("INSERT OR IGNORE INTO record_sources (record_id, source) VALUES (?, ?)",
+                             [(cursor.lastrowid, source) for source in envelope.get("sources", [])])
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"segment-{number:06d}.gz"
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for path in self.directory.iterdir():
+            match = _SEGMENT_PATTERN.match(path.name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _write_member(self, member: bytes) -> Tuple[int, int]:
+        """把一个gzip member追加到活动分段，返回(分段编号, 偏移量)（调用方需持有锁）"""
+        path = self._segment_path(self._active_segment)
+        size = path.stat().st_size if path.exists() else 0
+        if size and size + len(member) > self.segment_max_bytes:
+            self._active_segment += 1
+            path = self._segment_path(self._active_segment)
+            size = 0
+        with open(path, "ab") as f:
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+        return self._active_segment, size
+
+    def _read_member(self, segment: int, offset: int, length: int) -> bytes:
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def _read(self, row: Tuple[int, int, int, int]) -> Optional[Dict[str, Any]]:
+        """读取并解压一条记录"""
+        record_id, segment, offset, length = row
+        try:
+            envelope = json.loads(gzip.decompress(self._read_member(segment, offset, length)))
+        except (OSError, ValueError, EOFError):
+            return None
+        return {**envelope, "id": record_id}
+
+    def _select(self, query, source, since, until, limit, newest_first) -> List[Tuple[int, int, int, int]]:
+        clauses, params = ["r.deleted = 0"], []
+        join = ""
+        if query is not None:
+            clauses.append("r.query_key = ?")
+            params.append(normalize_query(query))
+        if source is not None:
+            join = "JOIN record_sources s ON s.record_id = r.id AND s.source = ?"
+            params.insert(0, source)
+        if since is not None:
+            clauses.append("r.timestamp >= ?")
+            params.append(_to_epoch(since))
+        if until is not None:
+            clauses.append("r.timestamp < ?")
+            params.append(_to_epoch(until))
+        order = "DESC" if newest_first else "ASC"
+        sql = (f"SELECT r.id, r.segment, r.offset, r.length FROM records r {join} "
+               f"WHERE {' AND '.join(clauses)} ORDER BY r.timestamp {order}, r.id {order}")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _scan_segment(self, number: int) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+        """逐个解析分段中的gzip member，返回(偏移量, 长度, 记录)，遇到截断的尾部数据时停止"""
+        data = self._segment_path(number).read_bytes()
+        offset = 0
+        while offset < len(data):
+            decompressor = zlib.decompressobj(wbits=31)
+            try:
+                payload = decompressor.decompress(data[offset:])
+            except zlib.error:
+                break
+            if not decompressor.eof:
+                break
+            length = len(data) - offset - len(decompressor.unused_data)
+            try:
+                yield offset, length, json.loads(payload)
+            except ValueError:
+                pass
+            offset += length
+
+
+def import_legacy_file(store: ResultStore, path: Union[str, Path]) -> int:
+    """导入旧版的单条查询JSON结果文件（search_result_*.json等），返回记录ID"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # run_gemini_search_agent.py的旧格式把结果包在results字段中
+    record = data.get("results", data) if isinstance(data.get("results"), dict) else data
+    query = data.get("query") or record.get("query", "")
+    return store.append(query, record, timestamp=data.get("timestamp") or record.get("timestamp"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="搜索结果存储工具")
+    parser.add_argument("--dir", default=DEFAULT_STORE_DIR, help="存储目录")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    find_parser = subparsers.add_parser("find", help="按条件查找记录")
+    find_parser.add_argument("--query")
+    find_parser.add_argument("--source")
+    find_parser.add_argument("--since", help="起始时间（ISO格式）")
+    find_parser.add_argument("--until", help="结束时间（ISO格式）")
+    find_parser.add_argument("--limit", type=int, default=20)
+
+    export_parser = subparsers.add_parser("export", help="以JSON Lines格式导出历史记录到标准输出")
+    export_parser.add_argument("--since")
+    export_parser.add_argument("--until")
+
+    import_parser = subparsers.add_parser("import", help="导入旧版的单条查询JSON结果文件")
+    import_parser.add_argument("files", nargs="+")
+
+    compact_parser = subparsers.add_parser("compact", help="压缩整理存储")
+    compact_parser.add_argument("--keep-latest", action="store_true", help="只保留每个查询最近一次的结果")
+    compact_parser.add_argument("--before", help="删除该时间之前的记录（ISO格式）")
+
+    subparsers.add_parser("stats", help="显示存储统计信息")
+    subparsers.add_parser("rebuild-index", help="根据分段文件重建索引")
+
+    args = parser.parse_args(argv)
+    with ResultStore(args.dir) as store:
+        if args.command == "find":
+            for record in store.find(args.query, args.source, args.since, args.until, args.limit, newest_first=True):
+                timestamp = datetime.fromtimestamp(record["timestamp"]).isoformat(timespec="seconds")
+                print(f"{record['id']}\t{timestamp}\t{','.join(record['sources'])}\t{record['query']}")
+        elif args.command == "export":
+            store.export(sys.stdout, args.since, args.until)
+        elif args.command == "import":
+            for path in args.files:
+                print(f"{path} -> {import_legacy_file(store, path)}")
+        elif args.command == "compact":
+            print(json.dumps(store.compact(args.keep_latest, args.before), ensure_ascii=False))
+        elif args.command == "stats":
+            print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+        elif args.command == "rebuild-index":
+            print(f"已索引 {store.rebuild_index()} 条记录")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,12 @@ from .arxiv_tool import ArxivSearchTool
 from .wikipedia_tool import WikipediaSearchTool
 from .google_scholar_tool import GoogleScholarSearchTool
 from .google_search_tool import GoogleSearchTool
+from .lazy import LazyTool
 
 __all__ = [
     'ArxivSearchTool',
     'WikipediaSearchTool',
     'GoogleScholarSearchTool',
-    'GoogleSearchTool'
+    'GoogleSearchTool',
+    'LazyTool'
 ] 
\ No newline at end of file
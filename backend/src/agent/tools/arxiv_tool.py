@@ -4,18 +4,102 @@ arXiv搜索工具
 封装arXiv API搜索功能，实现为LangChain工具
 """
 
-import urllib.request
 import xml.etree.ElementTree as ET
 import time
-from typing import Dict, Any, List, Optional
-from langchain.tools import BaseTool, Tool
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+from .. import endpoints, http_client
+
+if TYPE_CHECKING:
+    from langchain.tools import Tool
+
+# arXiv Atom feed使用的命名空间
+NAMESPACES = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'opensearch': 'http://a9.com/-/spec/opensearch/1.1/',
+    'arxiv': 'http://arxiv.org/schemas/atom'
+}
+
+
+def parse_feed(data: bytes) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    解析arXiv API返回的Atom feed
+
+    Args:
+        data: 响应体
+
+    Returns:
+        (总结果数, 论文列表)，每篇论文包含title、authors、summary、published（日期）、pdf_link和primary_category
+    """
+    root = ET.fromstring(data)
+    
+    papers = []
+    for entry in root.findall('.//atom:entry', NAMESPACES):
+        # 获取PDF链接
+        pdf_link = None
+        for link in entry.findall('./atom:link', NAMESPACES):
+            if link.get('title') == 'pdf':
+                pdf_link = link.get('href')
+                break
+        
+        # 提取主要分类
+        categories = [category.get('term') for category in entry.findall('./atom:category', NAMESPACES)]
+        
+        papers.append({
+            "title": entry.find('./atom:title', NAMESPACES).text.strip(),
+            "authors": [author.find('./atom:name', NAMESPACES).text for author in entry.findall('./atom:author', NAMESPACES)],
+            "summary": entry.find('./atom:summary', NAMESPACES).text.strip(),
+            "published": entry.find('./atom:published', NAMESPACES).text.split('T')[0],  # 只保留日期部分
+            "pdf_link": pdf_link,
+            "primary_category": categories[0] if categories else "N/A"
+        })
+    
+    # 获取总结果数（feed中缺少时按本页论文数计）
+    total_element = root.find('.//opensearch:totalResults', NAMESPACES)
+    total_results = total_element.text if total_element is not None and total_element.text else str(len(papers))
+    return total_results, papers
+
+
+def format_papers(query: str, papers: List[Dict[str, Any]], total_results: str) -> str:
+    """将parse_feed的结果格式化为字符串"""
+    # 如果没有结果，返回提示
+    if not papers:
+        return f"在arXiv上没有找到与'{query}'相关的论文。"
+    
+    results = []
+    for i, paper in enumerate(papers, 1):
+        authors = paper["authors"]
+        summary = paper["summary"]
+        
+        # 构建论文信息字符串
+        paper_info = (
+            f"论文 {i}:\n"
+            f"标题: {paper['title']}\n"
+            f"作者: {', '.join(authors[:3])}{'...' if len(authors) > 3 else ''}\n"
+            f"发布日期: {paper['published']}\n"
+            f"主要分类: {paper['primary_category']}\n"
+            f"摘要: {summary[:300]}{'...' if len(summary) > 300 else ''}\n"
+            f"链接: {paper['pdf_link'] or 'N/A'}\n"
+        )
+        results.append(paper_info)
+    
+    # 合并结果
+    return (
+        f"在arXiv上找到了{len(papers)}篇与'{query}'相关的论文（共{total_results}个结果）：\n\n" + 
+        "\n".join(results)
+    )
+
 
 class ArxivSearchTool:
     """封装arXiv API搜索功能的工具类"""
     
+    # LangChain工具名称和描述
+    NAME = "arXiv_search"
+    DESCRIPTION = "在arXiv上搜索学术论文。适用于查找关于科学和学术主题的最新研究论文。输入应为搜索关键词，例如'large language models'。"
+    
     def __init__(self):
         """初始化arXiv API工具"""
-        self.base_url = "http://export.arxiv.org/api/query"
+        self.base_url = endpoints.arxiv_api_url()
         
     def search(self, query: str, max_results: int = 5) -> str:
         """
@@ -37,76 +121,21 @@ class ArxivSearchTool:
             url = f'{self.base_url}?{search_query}'
             
             # 发送请求
-            with urllib.request.urlopen(url) as response:
-                data = response.read().decode('utf-8')
-            
-            # 解析XML响应
-            root = ET.fromstring(data)
-            
-            # 提取命名空间
-            namespaces = {
-                'atom': 'http://www.w3.org/2005/Atom',
-                'opensearch': 'http://a9.com/-/spec/opensearch/1.1/',
-                'arxiv': 'http://arxiv.org/schemas/atom'
-            }
-            
-            # 获取总结果数
-            total_results = root.find('.//opensearch:totalResults', namespaces).text
-            
-            # 获取文章条目
-            entries = root.findall('.//atom:entry', namespaces)
-            
-            # 如果没有结果，返回提示
-            if not entries:
-                return f"在arXiv上没有找到与'{query}'相关的论文。"
-            
-            # 格式化结果
-            results = []
-            for i, entry in enumerate(entries, 1):
-                title = entry.find('./atom:title', namespaces).text.strip()
-                authors = [author.find('./atom:name', namespaces).text for author in entry.findall('./atom:author', namespaces)]
-                summary = entry.find('./atom:summary', namespaces).text.strip()
-                published = entry.find('./atom:published', namespaces).text.split('T')[0]  # 只保留日期部分
-                
-                # 获取PDF链接
-                pdf_link = None
-                links = entry.findall('./atom:link', namespaces)
-                for link in links:
-                    if link.get('title') == 'pdf':
-                        pdf_link = link.get('href')
-                        break
-                
-                # 提取主要分类
-                categories = [category.get('term') for category in entry.findall('./atom:category', namespaces)]
-                primary_category = categories[0] if categories else "N/A"
-                
-                # 构建论文信息字符串
-                paper_info = (
-                    f"论文 {i}:\n"
-                    f"标题: {title}\n"
-                    f"作者: {', '.join(authors[:3])}{'...' if len(authors) > 3 else ''}\n"
-                    f"发布日期: {published}\n"
-                    f"主要分类: {primary_category}\n"
-                    f"摘要: {summary[:300]}{'...' if len(summary) > 300 else ''}\n"
-                    f"链接: {pdf_link or 'N/A'}\n"
-                )
-                results.append(paper_info)
-            
-            # 合并结果
-            response = (
-                f"在arXiv上找到了{len(entries)}篇与'{query}'相关的论文（共{total_results}个结果）：\n\n" + 
-                "\n".join(results)
-            )
+            response = http_client.get(url, timeout=20)
+            response.raise_for_status()
+            data = response.content
             
-            return response
+            total_results, papers = parse_feed(data)
+            return format_papers(query, papers, total_results)
             
         except Exception as e:
             return f"搜索arXiv时发生错误: {str(e)}"
     
-    def get_tool(self) -> Tool:
+    def get_tool(self) -> "Tool":
         """获取LangChain工具实例"""
+        from langchain.tools import Tool  # 延迟导入，导入工具模块时不加载langchain
         return Tool(
-            name="arXiv_search",
+            name=self.NAME,
             func=self.search,
-            description="在arXiv上搜索学术论文。适用于查找关于科学和学术主题的最新研究论文。输入应为搜索关键词，例如'large language models'。"
+            description=self.DESCRIPTION
         ) 
\ No newline at end of file
@@ -6,9 +6,13 @@ Google Scholar搜索工具
 
 import os
 import requests
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from dotenv import load_dotenv
-from langchain.tools import BaseTool, Tool
+
+from .. import cassette, endpoints, http_client
+
+if TYPE_CHECKING:
+    from langchain.tools import Tool
 
 # 加载环境变量
 load_dotenv()
@@ -16,15 +20,19 @@ load_dotenv()
 class GoogleScholarSearchTool:
     """封装Google Scholar搜索功能的工具类"""
     
+    # LangChain工具名称和描述
+    NAME = "Google_Scholar_search"
+    DESCRIPTION = "在Google Scholar上搜索学术文献。适用于查找关于科研、学术研究的高引用量文章和综述。可以获取包括引用次数在内的丰富学术信息。输入应为搜索关键词，例如'language model evaluation'。"
+    
     def __init__(self):
         """初始化Google Scholar搜索工具"""
-        # 获取API密钥
-        self.api_key = os.getenv("SERP_API_KEY")
+        # 获取API密钥（回放cassette时不需要真实密钥）
+        self.api_key = os.getenv("SERP_API_KEY") or (cassette.PLACEHOLDER_KEY if cassette.is_replaying() else None)
         if not self.api_key:
             raise ValueError("未找到SERP_API_KEY环境变量")
             
         # 设置API基础URL
-        self.api_base = "https://serpapi.com/search"
+        self.api_base = endpoints.serpapi_url()
         
     def search(self, query: str, max_results: int = 5) -> str:
         """
@@ -47,7 +55,7 @@ class GoogleScholarSearchTool:
             }
             
             # 发送请求
-            response = requests.get(self.api_base, params=params)
+            response = http_client.get(self.api_base, params=params, timeout=20)
             response.raise_for_status()
             
             # 解析响应
@@ -100,10 +108,11 @@ class GoogleScholarSearchTool:
         except Exception as e:
             return f"搜索Google Scholar时发生错误: {str(e)}"
     
-    def get_tool(self) -> Tool:
+    def get_tool(self) -> "Tool":
         """获取LangChain工具实例"""
+        from langchain.tools import Tool  # 延迟导入，导入工具模块时不加载langchain
         return Tool(
-            name="Google_Scholar_search",
+            name=self.NAME,
             func=self.search,
-            description="在Google Scholar上搜索学术文献。适用于查找关于科研、学术研究的高引用量文章和综述。可以获取包括引用次数在内的丰富学术信息。输入应为搜索关键词，例如'language model evaluation'。"
+            description=self.DESCRIPTION
         ) 
\ No newline at end of file
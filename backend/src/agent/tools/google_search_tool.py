@@ -6,10 +6,13 @@ Google搜索工具
 
 import os
 import json
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
-from langchain.tools import BaseTool, Tool
+
+from .. import cassette, endpoints, usage
+
+if TYPE_CHECKING:
+    from langchain.tools import Tool
 
 # 加载环境变量
 load_dotenv()
@@ -17,16 +20,28 @@ load_dotenv()
 class GoogleSearchTool:
     """封装Google搜索功能的工具类"""
     
+    # LangChain工具名称和描述
+    NAME = "Google_Search"
+    DESCRIPTION = "使用Google搜索获取互联网上的最新信息。适用于查找新闻、时事、产品信息和其他实时数据。比Wikipedia更新，但可能不如学术数据库权威。输入应为简洁明确的搜索关键词。"
+    
     def __init__(self):
         """初始化Google搜索工具"""
+        # google_search工具需要Gemini 2.0及以上的模型
+        self.model_name = 'gemini-2.0-flash'
+        
         # 获取API密钥
         self.api_key = os.getenv("GOOGLE_API_KEY")
         if not self.api_key:
+            if cassette.is_replaying():
+                # 回放cassette时不调用SDK，不需要密钥
+                self.client = None
+                return
             raise ValueError("未找到GOOGLE_API_KEY环境变量")
         
-        # 初始化Gemini
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+        # 初始化Gemini客户端（SDK较重，在构造工具时才导入；
+        # google-generativeai不支持google_search工具，使用google-genai）
+        from google import genai
+        self.client = genai.Client(api_key=self.api_key, http_options=endpoints.gemini_http_options())
         
     def search(self, query: str) -> str:
         """
@@ -38,15 +53,28 @@ class GoogleSearchTool:
         Returns:
             包含搜索结果的字符串
         """
+        # SDK调用无法在HTTP层录制，按查询录制整个搜索结果
         try:
+            return cassette.call("google_search", (self.model_name, query), lambda: self._search(query))
+        except cassette.CassetteMiss as e:
+            return f"使用Google搜索时发生错误: {str(e)}"
+    
+    def _search(self, query: str) -> str:
+        """调用Gemini的google_search工具执行搜索"""
+        try:
+            from google.genai import types
+            
             # 使用Gemini模型进行搜索
-            response = self.model.generate_content(
+            response = self.client.models.generate_content(
+                model=self.model_name,
                 contents=f"请搜索并总结以下问题的最新信息: {query}",
-                generation_config={
-                    "temperature": 0.1
-                },
-                tools=[{"google_search": {}}]
+                config=types.GenerateContentConfig(
+                    temperature=0.1,
+                    tools=[types.Tool(google_search=types.GoogleSearch())]
+                )
             )
+            # 搜索本身消耗LLM token，归属到search阶段的Google_Search来源
+            usage.record_gemini(self.model_name, response, stage="search", source="Google_Search")
             
             if not response or not response.text:
                 return f"使用Google搜索'{query}'时没有获得结果。"
@@ -55,18 +83,14 @@ class GoogleSearchTool:
             
             # 提取搜索元数据（如果有）
             sources = []
-            if (hasattr(response, 'candidates') and response.candidates and
-                hasattr(response.candidates[0], 'grounding_metadata') and 
-                response.candidates[0].grounding_metadata):
-                metadata = response.candidates[0].grounding_metadata
-                if hasattr(metadata, 'grounding_chunks') and metadata.grounding_chunks:
-                    for chunk in metadata.grounding_chunks:
-                        if hasattr(chunk, 'web'):
-                            source = {
-                                "title": chunk.web.title,
-                                "url": chunk.web.url
-                            }
-                            sources.append(source)
+            metadata = response.candidates[0].grounding_metadata if response.candidates else None
+            if metadata and metadata.grounding_chunks:
+                for chunk in metadata.grounding_chunks:
+                    if chunk.web:
+                        sources.append({
+                            "title": chunk.web.title,
+                            "url": chunk.web.uri
+                        })
             
             # 添加来源信息
             if sources:
@@ -79,10 +103,11 @@ class GoogleSearchTool:
         except Exception as e:
             return f"使用Google搜索时发生错误: {str(e)}"
     
-    def get_tool(self) -> Tool:
+    def get_tool(self) -> "Tool":
         """获取LangChain工具实例"""
+        from langchain.tools import Tool  # 延迟导入，导入工具模块时不加载langchain
         return Tool(
-            name="Google_Search",
+            name=self.NAME,
             func=self.search,
-            description="使用Google搜索获取互联网上的最新信息。适用于查找新闻、时事、产品信息和其他实时数据。比Wikipedia更新，但可能不如学术数据库权威。输入应为简洁明确的搜索关键词。"
+            description=self.DESCRIPTION
         ) 
\ No newline at end of file
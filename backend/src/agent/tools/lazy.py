@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+延迟构造的搜索工具
+工具实例（及其依赖的SDK、API密钥检查）在第一次调用时才创建；
+构造失败只影响该工具自身的调用，不会导致Agent启动失败。
+"""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+from .. import tracing
+
+if TYPE_CHECKING:
+    from langchain.tools import Tool
+
+logger = logging.getLogger(__name__)
+
+
+class LazyTool:
+    """首次调用时才创建底层工具实例的搜索工具"""
+
+    def __init__(self, tool_class: Callable[[], Any], method: str = "search"):
+        """
+        初始化延迟工具
+
+        Args:
+            tool_class: 工具类，需提供NAME和DESCRIPTION类属性
+            method: 执行搜索的方法名
+        """
+        self.tool_class = tool_class
+        self.method = method
+        self.name = tool_class.NAME
+        self.description = tool_class.DESCRIPTION
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def instance(self) -> Any:
+        """获取工具实例，首次调用时创建（构造失败时抛出异常，下次调用会重试）"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    logger.debug(f"创建工具实例 {self.name}")
+                    self._instance = self.tool_class()
+        return self._instance
+
+    def run(self, query: str) -> str:
+        """执行搜索；工具无法创建时返回错误信息（与工具内部的错误格式一致，不会被缓存）"""
+        try:
+            tool = self.instance()
+        except Exception as e:
+            logger.error(f"创建工具 {self.name} 失败: {e}")
+            return f"初始化{self.name}时发生错误: {str(e)}"
+        return getattr(tool, self.method)(query)
+
+    def get_tool(self) -> "Tool":
+        """获取LangChain工具实例（不会触发底层工具的创建）"""
+        from langchain.tools import Tool
+        return Tool(name=self.name, func=self.traced_run, description=self.description)
+
+    def traced_run(self, query: str) -> str:
+        """执行搜索并记录tool:<名称>计时区间（供由框架调度工具的Agent使用）"""
+        with tracing.span(f"tool:{self.name}", query=query) as span:
+            result = self.run(query)
+            span.set(bytes=len(result.encode("utf-8")))
+            return result
@@ -4,107 +4,153 @@ Wikipedia搜索工具
 封装Wikipedia API搜索功能，实现为LangChain工具
 """
 
+import re
 import requests
-from typing import Dict, Any, List, Optional
-from langchain.tools import BaseTool, Tool
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+from .. import endpoints, http_client
+
+if TYPE_CHECKING:
+    from langchain.tools import Tool
+
+# 中日韩统一表意文字
+_CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+def strip_snippet_html(snippet: str) -> str:
+    """去掉搜索结果摘要中的搜索词高亮标签"""
+    return snippet.replace('<span class="searchmatch">', '').replace('</span>', '')
+
 
 class WikipediaSearchTool:
     """封装Wikipedia API搜索功能的工具类"""
     
+    # LangChain工具名称和描述
+    NAME = "Wikipedia_search"
+    DESCRIPTION = "在Wikipedia上搜索百科知识。适用于查找关于概念、人物、历史事件等基础知识。输入应为简洁明确的搜索关键词，例如'Albert Einstein'。"
+    
     def __init__(self):
         """初始化Wikipedia API工具"""
-        self.base_url = "https://en.wikipedia.org/w/api.php"  # 英文维基百科API
-        self.session = requests.Session()
-        # 设置User-Agent避免被封禁
-        self.session.headers.update({
-            'User-Agent': 'LangChain-Agent/1.0 (Educational Research Assistant) Python/3.x'
-        })
+        self.base_url = endpoints.wikipedia_api_url()  # 英文维基百科API
+        self.zh_base_url = endpoints.wikipedia_zh_api_url()  # 中文维基百科API
+    
+    def _api_url(self, query: str) -> str:
+        """根据查询语言选择维基百科站点：包含中文时使用中文维基百科"""
+        return self.zh_base_url if _CJK_PATTERN.search(query) else self.base_url
         
-    def search_and_get_content(self, query: str, max_results: int = 3) -> str:
+    def search_pages(self, query: str, max_results: int = 3) -> List[Dict[str, Any]]:
         """
-        搜索并获取Wikipedia内容
+        搜索Wikipedia并获取页面介绍部分
         
         Args:
             query: 搜索查询
             max_results: 最大结果数量
             
         Returns:
-            包含搜索结果的字符串
+            页面列表，每项包含title、page_id、extract和url
+            
+        Raises:
+            requests.exceptions.RequestException: 网络请求失败
         """
-        try:
-            # 首先进行搜索
-            search_params = {
+        api_url = self._api_url(query)
+        
+        # 首先进行搜索
+        search_params = {
+            'action': 'query',
+            'format': 'json',
+            'list': 'search',
+            'srsearch': query,
+            'srlimit': max_results,
+            'srprop': 'snippet'
+        }
+        
+        search_response = http_client.get(api_url, params=search_params, timeout=10)
+        search_response.raise_for_status()
+        
+        search_data = search_response.json()
+        search_results = search_data.get('query', {}).get('search', [])
+        
+        # 获取页面详细内容
+        pages = []
+        for result in search_results:
+            title = result.get('title')
+            page_id = result.get('pageid')
+            
+            # 获取页面内容
+            content_params = {
                 'action': 'query',
                 'format': 'json',
-                'list': 'search',
-                'srsearch': query,
-                'srlimit': max_results,
-                'srprop': 'snippet'
+                'pageids': page_id,
+                'prop': 'extracts',
+                'exintro': True,  # 只获取介绍部分
+                'explaintext': True,  # 纯文本格式
+                'exsectionformat': 'plain'
             }
             
-            search_response = self.session.get(self.base_url, params=search_params, timeout=10)
-            search_response.raise_for_status()
-            
-            search_data = search_response.json()
-            search_results = search_data.get('query', {}).get('search', [])
+            content_response = http_client.get(api_url, params=content_params, timeout=10)
+            content_response.raise_for_status()
             
-            if not search_results:
-                return f"在Wikipedia上没有找到与'{query}'相关的内容。"
+            content_data = content_response.json()
+            page_data = content_data.get('query', {}).get('pages', {}).get(str(page_id), {})
+            extract = page_data.get('extract', '无内容')
             
-            # 获取页面详细内容
-            results = []
-            for i, result in enumerate(search_results, 1):
-                title = result.get('title')
-                page_id = result.get('pageid')
-                
-                # 获取页面内容
-                content_params = {
-                    'action': 'query',
-                    'format': 'json',
-                    'pageids': page_id,
-                    'prop': 'extracts',
-                    'exintro': True,  # 只获取介绍部分
-                    'explaintext': True,  # 纯文本格式
-                    'exsectionformat': 'plain'
-                }
-                
-                content_response = self.session.get(self.base_url, params=content_params, timeout=10)
-                content_response.raise_for_status()
-                
-                content_data = content_response.json()
-                page_data = content_data.get('query', {}).get('pages', {}).get(str(page_id), {})
-                extract = page_data.get('extract', '无内容')
-                
-                # 裁剪过长的内容
-                if len(extract) > 1000:
-                    extract = extract[:997] + "..."
-                
-                # 构建页面信息字符串
-                page_url = f"https://en.wikipedia.org/?curid={page_id}"
-                page_info = (
-                    f"结果 {i}: {title}\n"
-                    f"内容摘要: {extract}\n"
-                    f"链接: {page_url}\n"
-                )
-                results.append(page_info)
+            pages.append({
+                "title": title,
+                "page_id": page_id,
+                "extract": extract,
+                "url": f"{api_url.rsplit('/w/', 1)[0]}/?curid={page_id}"
+            })
+        
+        return pages
+    
+    def format_results(self, query: str, pages: List[Dict[str, Any]]) -> str:
+        """将search_pages的结果格式化为字符串"""
+        if not pages:
+            return f"在Wikipedia上没有找到与'{query}'相关的内容。"
+        
+        results = []
+        for i, page in enumerate(pages, 1):
+            # 裁剪过长的内容
+            extract = page["extract"]
+            if len(extract) > 1000:
+                extract = extract[:997] + "..."
             
-            # 合并结果
-            response = (
-                f"在Wikipedia上找到了{len(search_results)}个与'{query}'相关的结果：\n\n" + 
-                "\n".join(results)
+            # 构建页面信息字符串
+            page_info = (
+                f"结果 {i}: {page['title']}\n"
+                f"内容摘要: {extract}\n"
+                f"链接: {page['url']}\n"
             )
+            results.append(page_info)
+        
+        # 合并结果
+        return (
+            f"在Wikipedia上找到了{len(pages)}个与'{query}'相关的结果：\n\n" + 
+            "\n".join(results)
+        )
+        
+    def search_and_get_content(self, query: str, max_results: int = 3) -> str:
+        """
+        搜索并获取Wikipedia内容
+        
+        Args:
+            query: 搜索查询
+            max_results: 最大结果数量
             
-            return response
-            
+        Returns:
+            包含搜索结果的字符串
+        """
+        try:
+            return self.format_results(query, self.search_pages(query, max_results))
         except requests.exceptions.RequestException as e:
             return f"搜索Wikipedia时发生网络错误: {str(e)}"
         except Exception as e:
             return f"搜索Wikipedia时发生错误: {str(e)}"
     
-    def get_tool(self) -> Tool:
+    def get_tool(self) -> "Tool":
         """获取LangChain工具实例"""
+        from langchain.tools import Tool  # 延迟导入，导入工具模块时不加载langchain
         return Tool(
-            name="Wikipedia_search",
+            name=self.NAME,
             func=self.search_and_get_content,
-            description="在Wikipedia上搜索百科知识。适用于查找关于概念、人物、历史事件等基础知识。输入应为简洁明确的搜索关键词，例如'Albert Einstein'。"
+            description=self.DESCRIPTION
         ) 
\ No newline at end of file
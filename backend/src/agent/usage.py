@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+LLM用量与费用统计
+从每次LLM响应中提取输入/输出token数，按处理阶段、搜索源和模型汇总到当前请求，
+并根据可配置的价格表计算费用。
+
+价格表可通过环境变量覆盖：
+    LLM_PRICING       JSON字符串，例如 {"gemini-2.0-flash": {"input": 0.1, "output": 0.4}}
+    LLM_PRICING_FILE  同格式的JSON文件路径
+价格单位为美元/百万token，模型名按最长前缀匹配。
+未配置价格的模型费用记为0，首次出现时记录警告，并列入用量汇总的unpriced_models。
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 默认价格表（美元/百万token）
+DEFAULT_PRICING = {
+    "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
+    "gemini-2.0-pro": {"input": 1.25, "output": 10.00},
+    "gemini-pro": {"input": 0.50, "output": 1.50},
+    "claude-3-7-sonnet": {"input": 3.00, "output": 15.00},
+}
+
+# 当前请求的用量统计和当前处理阶段
+_current_tracker: contextvars.ContextVar = contextvars.ContextVar("search_agent_usage", default=None)
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("search_agent_stage", default="unknown")
+
+# 当前上下文中收集的每次调用用量（cassette录制SDK调用时使用）
+_current_capture: contextvars.ContextVar = contextvars.ContextVar("search_agent_usage_capture", default=None)
+
+# 已警告过未配置价格的模型（每个模型只警告一次）
+_warned_unpriced: set = set()
+
+
+def load_pricing() -> Dict[str, Dict[str, float]]:
+    """加载价格表：默认值，依次被LLM_PRICING_FILE和LLM_PRICING覆盖"""
+    pricing = {model: dict(price) for model, price in DEFAULT_PRICING.items()}
+    path = os.getenv("LLM_PRICING_FILE")
+    raw = os.getenv("LLM_PRICING")
+    try:
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                pricing.update(json.load(f))
+        if raw:
+            pricing.update(json.loads(raw))
+    except (OSError, ValueError) as e:
+        logger.error(f"加载LLM价格表失败，使用默认价格: {e}")
+    return pricing
+
+
+PRICING = load_pricing()
+
+
+def normalize_model(model: Optional[str]) -> str:
+    """规范化模型名（去掉models/前缀）"""
+    model = model or "unknown"
+    return model[len("models/"):] if model.startswith("models/") else model
+
+
+def price_for(model: str) -> Optional[Dict[str, float]]:
+    """按最长前缀匹配模型价格，未配置时返回None"""
+    matches = [name for name in PRICING if model.startswith(name)]
+    return PRICING[max(matches, key=len)] if matches else None
+
+
+def compute_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """计算一次调用的费用（美元），未配置价格的模型记为0"""
+    price = price_for(model)
+    if price is None:
+        return 0.0
+    return (input_tokens * price.get("input", 0.0) + output_tokens * price.get("output", 0.0)) / 1_000_000
+
+
+class UsageTracker:
+    """单个请求的LLM用量统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = self._empty()
+        self.by_stage: Dict[str, Dict[str, Any]] = {}
+        self.by_source: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self.unpriced_models: set = set()
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {"calls": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+
+    def add(self, stage: str, model: str, source: Optional[str],
+            input_tokens: int, output_tokens: int, cost: float, priced: bool = True):
+        """累加一次调用的用量（priced为False表示模型未配置价格，费用按0计）"""
+        with self._lock:
+            if not priced:
+                self.unpriced_models.add(model)
+            buckets = [self.total,
+                       self.by_stage.setdefault(stage, self._empty()),
+                       self.by_model.setdefault(model, self._empty())]
+            if source:
+                buckets.append(self.by_source.setdefault(source, self._empty()))
+            for bucket in buckets:
+                bucket["calls"] += 1
+                bucket["input_tokens"] += input_tokens
+                bucket["output_tokens"] += output_tokens
+                bucket["total_tokens"] += input_tokens + output_tokens
+                bucket["cost_usd"] += cost
+
+    def summary(self) -> Dict[str, Any]:
+        """导出用量汇总"""
+        def rounded(bucket: Dict[str, Any]) -> Dict[str, Any]:
+            return dict(bucket, cost_usd=round(bucket["cost_usd"], 6))
+
+        with self._lock:
+            return {
+                **rounded(self.total),
+                "by_stage": {name: rounded(b) for name, b in self.by_stage.items()},
+                "by_source": {name: rounded(b) for name, b in self.by_source.items()},
+                "by_model": {name: rounded(b) for name, b in self.by_model.items()},
+                "unpriced_models": sorted(self.unpriced_models)
+            }
+
+
+@contextmanager
+def track() -> Iterator[UsageTracker]:
+    """在当前上下文中开启请求级用量统计"""
+    tracker = UsageTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+@contextmanager
+def capture() -> Iterator[List[Dict[str, Any]]]:
+    """收集代码块内记录的每次调用用量，可原样传回record重新计入"""
+    calls: List[Dict[str, Any]] = []
+    token = _current_capture.set(calls)
+    try:
+        yield calls
+    finally:
+        _current_capture.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """设置当前处理阶段，之后的LLM调用归属于该阶段"""
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def record(model: Optional[str], input_tokens: Optional[int], output_tokens: Optional[int],
+           stage: Optional[str] = None, source: Optional[str] = None) -> float:
+    """
+    记录一次LLM调用的用量
+
+    Args:
+        model: 模型名
+        input_tokens: 输入（提示）token数
+        output_tokens: 输出（生成）token数
+        stage: 处理阶段，为空时使用当前上下文中的阶段
+        source: 调用LLM的搜索源（例如基于Gemini的Google搜索）
+
+    Returns:
+        本次调用的费用（美元）
+    """
+    model = normalize_model(model)
+    stage = stage or _current_stage.get()
+    input_tokens = int(input_tokens or 0)
+    output_tokens = int(output_tokens or 0)
+    cost = compute_cost(model, input_tokens, output_tokens)
+    priced = price_for(model) is not None
+    if not priced and model not in _warned_unpriced:
+        _warned_unpriced.add(model)
+        logger.warning(f"模型 {model} 未配置价格，费用按0计（可通过LLM_PRICING或LLM_PRICING_FILE配置）")
+
+    metrics.LLM_TOKENS.inc(input_tokens, stage=stage, type="input")
+    metrics.LLM_TOKENS.inc(output_tokens, stage=stage, type="output")
+    if cost:
+        metrics.LLM_COST.inc(cost, stage=stage, model=model)
+
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.add(stage, model, source, input_tokens, output_tokens, cost, priced)
+    calls = _current_capture.get()
+    if calls is not None:
+        calls.append({"model": model, "input_tokens": input_tokens, "output_tokens": output_tokens,
+                      "stage": stage, "source": source})
+    return cost
+
+
+def record_gemini(model: Optional[str], response: Any, stage: Optional[str] = None,
+                  source: Optional[str] = None) -> float:
+    """从google-genai / google-generativeai响应的usage_metadata中记录用量"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0.0
+    return record(model, getattr(usage, "prompt_token_count", 0),
+                  getattr(usage, "candidates_token_count", 0), stage, source)
+
+
+def record_openai(model: Optional[str], response: Any, stage: Optional[str] = None,
+                  source: Optional[str] = None) -> float:
+    """从OpenAI兼容响应的usage中记录用量"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0.0
+    return record(getattr(response, "model", None) or model, getattr(usage, "prompt_tokens", 0),
+                  getattr(usage, "completion_tokens", 0), stage, source)
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+哈希向量语义检索
+把搜索源取回的文档编码为哈希字符n-gram向量，存放在内存映射的NumPy矩阵中，
+使用批量余弦相似度检索top-k；同一套编码也用作融合排序（ranking）的相似度特征。
+
+编码：文本规范化后提取字符n-gram（英文2-4字符，中文单字和二元组），
+通过稳定哈希（crc32，带符号）映射到固定维度，词频取对数后L2归一化。
+IDF只在查询端加权（查询向量乘以IDF的平方），追加文档时无需重算已存储的行。
+
+存储目录结构：
+    vectors.f32   float32矩阵（容量按倍数增长，行数以索引数据库中的文档数为准）
+    df.npy        各维度的文档频次
+    assign.i16    各行所属的IVF簇（训练后有效）
+    centroids.npy IVF质心（训练后生成）
+    index.sqlite  行号、文档键、搜索源和原始结果
+
+检索默认为暴力矩阵乘法，按块扫描以限制内存，耗时随文档数线性增长，受内存带宽限制
+（100万文档、256维的矩阵约1GB）。文档较多时运行train建立IVF粗划分：k-means质心把文档
+分到若干簇，查询只扫描最接近的几个簇（默认1024个簇中的8个），扫描的行数约为暴力检索的
+探测簇数/总簇数；训练后追加的文档按最近质心直接归簇。批量查询可摊薄扫描开销。同一目录只应由一个进程写入；
+进程内多次打开同一目录得到同一个实例。
+
+命令行用法：
+    python -m backend.src.agent.vector_index search "large language model"
+    python -m backend.src.agent.vector_index stats
+    python -m backend.src.agent.vector_index train
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .local_index import document_key
+
+# 项目根目录（默认索引目录相对于项目根目录，而不是当前工作目录）
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# 默认索引目录
+DEFAULT_VECTOR_DIR = os.getenv("VECTOR_INDEX_DIR") or str(_PROJECT_ROOT / "data" / "vector_index")
+
+# 向量维度
+DEFAULT_DIM = 256
+
+# 检索默认返回的结果数量
+DEFAULT_LIMIT = 5
+
+# 低于该相似度的结果不返回
+MIN_SIMILARITY = 0.1
+
+# 初始容量（行）
+INITIAL_CAPACITY = 1024
+
+# 按块扫描矩阵的行数
+SCAN_CHUNK_ROWS = 65536
+
+# IVF簇数量和查询时扫描的簇数量
+IVF_LISTS = 1024
+IVF_PROBES = 8
+
+# 训练IVF质心时的采样文档数和k-means迭代次数
+IVF_TRAIN_SAMPLE = 50000
+KMEANS_ITERATIONS = 10
+
+# 作为文档文本的结果字段
+_TEXT_FIELDS = ("title", "summary", "snippet", "abstract", "extract", "content", "description")
+
+# 中文字符片段
+_CJK_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    row INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+# 进程内已打开的索引（按目录共享实例，避免多个实例各自维护文档数和文档频次而互相覆盖）
+_open_indexes: Dict[Path, "VectorIndex"] = {}
+_open_indexes_lock = threading.Lock()
+
+
+def document_text(item: Dict[str, Any]) -> str:
+    """拼接结果中用于编码的文本字段"""
+    return "\n".join(str(item[field]) for field in _TEXT_FIELDS if item.get(field))
+
+
+@lru_cache(maxsize=65536)
+def _word_hashes(word: str) -> np.ndarray:
+    """英文单词（两端补空格）的2-4字符n-gram哈希"""
+    padded = f" {word} "
+    grams = [padded[i:i + n] for n in (2, 3, 4) for i in range(len(padded) - n + 1)]
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint32, count=len(grams))
+
+
+@lru_cache(maxsize=65536)
+def _cjk_hashes(run: str) -> np.ndarray:
+    """中文片段的单字和二元组哈希"""
+    grams = list(run) + [run[i:i + 2] for i in range(len(run) - 1)]
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint32, count=len(grams))
+
+
+def _text_hashes(text: str) -> np.ndarray:
+    """文本全部字符n-gram的哈希（按单词/中文片段缓存）"""
+    text = text.casefold()
+    parts = [_word_hashes(word) for word in re.findall(r'[a-z0-9]+', _CJK_PATTERN.sub(" ", text))]
+    parts.extend(_cjk_hashes(run) for run in _CJK_PATTERN.findall(text))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+
+
+def _hashed_counts(texts: Sequence[str], dim: int) -> np.ndarray:
+    """批量计算带符号的哈希词频矩阵（对数词频，未归一化）"""
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    hashes = [_text_hashes(text) for text in texts]
+    if not any(len(h) for h in hashes):
+        return matrix
+    rows = np.repeat(np.arange(len(texts)), [len(h) for h in hashes])
+    hashes = np.concatenate(hashes)
+    buckets = (hashes % dim).astype(np.intp)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    np.add.at(matrix, (rows, buckets), signs)
+    return np.sign(matrix) * np.log1p(np.abs(matrix))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """按行L2归一化（零向量保持为零）"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def embed(texts: Sequence[str], dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    将文本编码为L2归一化的哈希n-gram向量
+
+    Args:
+        texts: 文本列表
+        dim: 向量维度
+
+    Returns:
+        形状为(len(texts), dim)的float32矩阵
+    """
+    return _normalize(_hashed_counts(texts, dim))
+
+
+class VectorIndex:
+    """内存映射的哈希向量索引，支持增量追加"""
+
+    def __new__(cls, directory: Union[str, Path] = DEFAULT_VECTOR_DIR, dim: int = DEFAULT_DIM):
+        key = Path(directory).resolve()
+        with _open_indexes_lock:
+            index = _open_indexes.get(key)
+            if index is None:
+                index = super().__new__(cls)
+                index._open(directory, dim)
+                index._key = key
+                index._refs = 0
+                _open_indexes[key] = index
+            elif index.dim != dim:
+                raise ValueError(f"索引维度为{index.dim}，与请求的维度{dim}不一致")
+            index._refs += 1
+        return index
+
+    def __init__(self, directory: Union[str, Path] = DEFAULT_VECTOR_DIR, dim: int = DEFAULT_DIM):
+        """
+        打开（或创建）索引目录；进程内已打开该目录时返回同一个实例，全部close后才真正关闭
+
+        Args:
+            directory: 索引目录
+            dim: 向量维度（打开已有索引时必须与创建时一致）
+        """
+        # 打开索引在__new__中持有注册表锁完成
+
+    def _open(self, directory: Union[str, Path], dim: int):
+        """打开索引文件和数据库"""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(str(self.directory / "index.sqlite"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._count = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+        self._vectors_path = self.directory / "vectors.f32"
+        self._assign_path = self.directory / "assign.i16"
+        self._centroids_path = self.directory / "centroids.npy"
+        self._df_path = self.directory / "df.npy"
+        self._df = np.load(self._df_path) if self._df_path.exists() else np.zeros(dim, dtype=np.int64)
+        if self._df.shape != (dim,):
+            raise ValueError(f"索引维度为{self._df.shape[0]}，与请求的维度{dim}不一致")
+        self._centroids = np.load(self._centroids_path) if self._centroids_path.exists() else None
+        self._open_arrays(max(INITIAL_CAPACITY, self._count))
+
+    @staticmethod
+    def _open_array(path: Path, dtype: Any, width: int, capacity: int) -> np.memmap:
+        """以读写方式映射数组文件，文件不足capacity行时扩展"""
+        row_bytes = np.dtype(dtype).itemsize * width
+        with open(path, "ab") as f:
+            if f.tell() < capacity * row_bytes:
+                f.truncate(capacity * row_bytes)
+        rows = os.path.getsize(path) // row_bytes
+        return np.memmap(path, dtype=dtype, mode="r+", shape=(rows, width) if width > 1 else (rows,))
+
+    def _open_arrays(self, capacity: int):
+        """映射向量矩阵和簇分配数组"""
+        self._matrix = self._open_array(self._vectors_path, np.float32, self.dim, capacity)
+        self._assign = self._open_array(self._assign_path, np.int16, 1, capacity)
+
+    def close(self):
+        """写回向量并关闭索引（同一目录的其他打开者都关闭后才真正关闭）"""
+        with _open_indexes_lock:
+            if self._refs == 0:
+                return
+            self._refs -= 1
+            if self._refs:
+                return
+            _open_indexes.pop(self._key, None)
+        with self._lock:
+            self._matrix.flush()
+            self._assign.flush()
+            self._db.close()
+
+    def __enter__(self) -> "VectorIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add_documents(self, source: str, results: Iterable[Dict[str, Any]]) -> int:
+        """
+        追加一个搜索源返回的结果，已存在的文档（相同链接或标题）就地更新
+
+        Args:
+            source: 结果所属的搜索源
+            results: 搜索结果列表
+
+        Returns:
+            写入的文档数量
+        """
+        docs = {}
+        for item in results:
+            if isinstance(item, dict) and document_key(item) and document_text(item):
+                docs[document_key(item)] = item
+        if not docs:
+            return 0
+
+        items = list(docs.values())
+        raw = _hashed_counts([document_text(item) for item in items], self.dim)
+        vectors = _normalize(raw)
+        now = time.time()
+
+        with self._lock:
+            rows = []
+            for key, item in docs.items():
+                existing = self._db.execute("SELECT row FROM documents WHERE doc_key = ?", (key,)).fetchone()
+                if existing:
+                    row = existing[0]
+                    self._df -= self._matrix[row] != 0
+                else:
+                    row = self._count
+                    self._count += 1
+                rows.append(row)
+
+            if self._count > self._matrix.shape[0]:
+                self._matrix.flush()
+                self._assign.flush()
+                self._open_arrays(max(self._count, self._matrix.shape[0] * 2))
+
+            self._matrix[rows] = vectors
+            if self._centroids is not None:
+                self._assign[rows] = np.argmax(vectors @ self._centroids.T, axis=1)
+            self._df += (raw != 0).sum(axis=0)
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO documents (row, doc_key, source, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    [(row, key, source, json.dumps(item, ensure_ascii=False), now)
+                     for row, (key, item) in zip(rows, docs.items())]
+                )
+            np.save(self._df_path, self._df)
+        return len(items)
+
+    def _query_vectors(self, queries: Sequence[str]) -> np.ndarray:
+        """查询向量：词频乘以IDF的平方后归一化（相当于文档端也按IDF加权）"""
+        idf = np.log((1 + self._count) / (1 + self._df)).astype(np.float32) + 1.0
+        raw = _hashed_counts(queries, self.dim)
+        return _normalize(raw * idf * idf)
+
+    def train(self, lists: int = IVF_LISTS, sample: int = IVF_TRAIN_SAMPLE,
+              iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> Dict[str, Any]:
+        """
+        训练IVF质心（球面k-means）并为全部文档分配簇
+
+        Args:
+            lists: 簇数量（不超过文档数和32767）
+            sample: 训练使用的采样文档数
+            iterations: k-means迭代次数
+            seed: 随机种子
+
+        Returns:
+            训练统计：簇数量、采样数和各簇大小的范围
+        """
+        with self._lock:
+            count = self._count
+            if count == 0:
+                raise ValueError("索引为空，无法训练")
+            rng = np.random.default_rng(seed)
+            picked = np.sort(rng.choice(count, size=min(sample, count), replace=False))
+            data = np.asarray(self._matrix[picked])
+            lists = min(lists, len(data), np.iinfo(np.int16).max)
+            centroids = data[rng.choice(len(data), size=lists, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(data @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, data)
+                empty = np.bincount(labels, minlength=lists) == 0
+                sums[empty] = centroids[empty]
+                centroids = _normalize(sums)
+
+            for start in range(0, count, SCAN_CHUNK_ROWS):
+                stop = min(start + SCAN_CHUNK_ROWS, count)
+                self._assign[start:stop] = np.argmax(self._matrix[start:stop] @ centroids.T, axis=1)
+            self._assign.flush()
+            self._centroids = centroids.astype(np.float32)
+            np.save(self._centroids_path, self._centroids)
+            sizes = np.bincount(self._assign[:count], minlength=lists)
+        return {"lists": lists, "sample": len(data), "min_list": int(sizes.min()), "max_list": int(sizes.max())}
+
+    @staticmethod
+    def _merge_top(best_scores: np.ndarray, best_rows: np.ndarray,
+                   scores: np.ndarray, rows: np.ndarray, limit: int):
+        """合并一块候选的得分，保留每个查询的前limit个"""
+        k = min(limit, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+        best_rows = np.concatenate([best_rows, rows[top]], axis=1)
+        if best_scores.shape[1] > limit:
+            keep = np.argpartition(-best_scores, limit - 1, axis=1)[:, :limit]
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+        return best_scores, best_rows
+
+    def search_batch(self, queries: Sequence[str], limit: int = DEFAULT_LIMIT,
+                     min_similarity: float = MIN_SIMILARITY,
+                     probes: int = IVF_PROBES) -> List[List[Dict[str, Any]]]:
+        """
+        批量检索：一次扫描同时计算所有查询的余弦相似度top-k
+
+        Args:
+            queries: 查询列表
+            limit: 每个查询返回的最大结果数量
+            min_similarity: 最低相似度
+            probes: 训练过IVF时扫描的簇数量，0表示扫描全部文档
+
+        Returns:
+            每个查询的结果列表（原始结果字典，附加origin和similarity字段）
+        """
+        if not queries:
+            return []
+        with self._lock:
+            count = self._count
+            if count == 0:
+                return [[] for _ in queries]
+            query_matrix = self._query_vectors(queries)
+            best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+            best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+            if self._centroids is not None and probes:
+                # 只扫描与任一查询最接近的probes个簇
+                probes = min(probes, len(self._centroids))
+                nearest = np.argpartition(-(query_matrix @ self._centroids.T), probes - 1, axis=1)[:, :probes]
+                selected = np.zeros(len(self._centroids), dtype=bool)
+                selected[nearest.ravel()] = True
+                candidates = np.flatnonzero(selected[self._assign[:count]])
+                if len(candidates):
+                    scores = query_matrix @ self._matrix[candidates].T
+                    best_scores, best_rows = self._merge_top(best_scores, best_rows, scores, candidates, limit)
+            else:
+                for start in range(0, count, SCAN_CHUNK_ROWS):
+                    stop = min(start + SCAN_CHUNK_ROWS, count)
+                    scores = query_matrix @ self._matrix[start:stop].T
+                    best_scores, best_rows = self._merge_top(
+                        best_scores, best_rows, scores, np.arange(start, stop), limit
+                    )
+
+            order = np.argsort(-best_scores, axis=1, kind="stable")
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            best_rows = np.take_along_axis(best_rows, order, axis=1)
+
+            wanted = {int(row) for row in best_rows.ravel()}
+            placeholders = ",".join("?" * len(wanted))
+            payloads = {
+                row: (source, data) for row, source, data in self._db.execute(
+                    f"SELECT row, source, data FROM documents WHERE row IN ({placeholders})", sorted(wanted)
+                )
+            }
+
+        all_results = []
+        for scores, rows in zip(best_scores, best_rows):
+            results = []
+            for score, row in zip(scores, rows):
+                if score < min_similarity or int(row) not in payloads:
+                    continue
+                source, data = payloads[int(row)]
+                item = json.loads(data)
+                item.update({"origin": source, "similarity": round(float(score), 4)})
+                results.append(item)
+            all_results.append(results)
+        return all_results
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT,
+               min_similarity: float = MIN_SIMILARITY) -> List[Dict[str, Any]]:
+        """检索单个查询，参数同search_batch"""
+        return self.search_batch([query], limit, min_similarity)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计：文档数、容量、维度和各搜索源的文档数"""
+        with self._lock:
+            by_source = dict(self._db.execute(
+                "SELECT source, COUNT(*) FROM documents GROUP BY source ORDER BY source"
+            ).fetchall())
+            return {
+                "directory": str(self.directory),
+                "documents": self._count,
+                "capacity": self._matrix.shape[0],
+                "dim": self.dim,
+                "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+                "by_source": by_source
+            }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="哈希向量语义检索")
+    parser.add_argument("--dir", default=DEFAULT_VECTOR_DIR, help="索引目录")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="向量维度")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="检索索引")
+    search_parser.add_argument("query", help="查询")
+    search_parser.add_argument("--limit", type=int, default=10, help="返回的最大结果数量")
+
+    subparsers.add_parser("stats", help="显示索引统计")
+
+    train_parser = subparsers.add_parser("train", help="训练IVF质心（文档较多时加速检索）")
+    train_parser.add_argument("--lists", type=int, default=IVF_LISTS, help="簇数量")
+    train_parser.add_argument("--sample", type=int, default=IVF_TRAIN_SAMPLE, help="训练采样文档数")
+
+    args = parser.parse_args(argv)
+    with VectorIndex(args.dir, args.dim) as index:
+        if args.command == "search":
+            for item in index.search(args.query, args.limit):
+                sys.stdout.write(json.dumps(item, ensure_ascii=False) + "\n")
+        elif args.command == "train":
+            print(json.dumps(index.train(args.lists, args.sample), ensure_ascii=False, indent=2))
+        else:
+            print(json.dumps(index.stats(), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,13 +6,17 @@ FastAPI服务器 - 提供搜索Agent的API接口
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Literal, Optional
 from datetime import datetime
 import json
+import asyncio
 import logging
+import time
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -27,13 +31,14 @@ sys.path.insert(0, str(project_root))
 
 # 导入本地Agent
 from backend.src.agent.graph import SearchAgent
+from backend.src.agent import metrics, profiling
 
 # 加载环境变量
 load_dotenv()
 
-# 设置日志
+# 设置日志（默认INFO，设置LOG_LEVEL=DEBUG查看调试日志）
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
@@ -54,13 +59,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 全局Agent实例
+# 全局Agent实例（只持有客户端、工具、图结构等共享资源，可被多个请求并发调用）
 agent = None
 
+# 同时执行的搜索数量上限
+MAX_CONCURRENT_SEARCHES = int(os.getenv("MAX_CONCURRENT_SEARCHES", "8"))
+search_slots = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+
+# 启动预热的最长时间（秒），超时后仍标记为就绪，避免上游故障导致服务永远无法就绪
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "15"))
+
+# 预热时是否发送一次极短的LLM请求
+WARMUP_PING_LLM = os.getenv("WARMUP_PING_LLM", "1") == "1"
+
+# 搜索结果缓存的持久化文件（启动时加载，关闭时保存；设为空字符串可关闭）
+CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", str(project_root / "data" / "search_cache.jsonl"))
+
+# 预热状态
+warmup_state: Dict[str, Any] = {"ready": False}
+
 class SearchRequest(BaseModel):
     """搜索请求模型"""
     query: str
     max_iterations: Optional[int] = 3
+    trace: Optional[Literal["tree", "chrome"]] = None  # 返回各阶段耗时追踪
+    profile: Optional[Literal["cprofile", "sampling"]] = None  # 性能剖析模式（需要剖析令牌）
 
 class SearchResponse(BaseModel):
     """搜索响应模型"""
@@ -70,18 +93,109 @@ class SearchResponse(BaseModel):
     error: Optional[str] = None
     search_results: Optional[Dict[str, Any]] = None
     iterations: Optional[int] = None
+    coverage: Optional[float] = None
+    branch_timings: Optional[List[Dict[str, Any]]] = None
+    fast_path: Optional[bool] = None
+    trace: Optional[Any] = None
+    usage: Optional[Dict[str, Any]] = None
+    profile: Optional[Dict[str, Any]] = None
     timestamp: str = None
 
+async def run_search(query: str, max_iterations: int, trace: Optional[str] = None,
+                     endpoint: str = "/api/search", profile: Optional[str] = None) -> Dict[str, Any]:
+    """在线程池中执行搜索，避免阻塞事件循环"""
+    metrics.SEARCH_QUEUE_DEPTH.inc()
+    try:
+        await search_slots.acquire()
+    finally:
+        metrics.SEARCH_QUEUE_DEPTH.dec()
+    
+    metrics.SEARCHES_ACTIVE.inc()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        if profile:
+            details, report = await run_in_threadpool(
+                profiling.run_profiled, profile, agent.search_with_details,
+                query, max_iterations=max_iterations, trace=trace
+            )
+            details["profile"] = dict(report, artifact=f"/api/profiles/{report['id']}")
+        else:
+            details = await run_in_threadpool(agent.search_with_details, query, max_iterations=max_iterations, trace=trace)
+        outcome = "fast_path" if details["fast_path"] else "success"
+        return details
+    finally:
+        metrics.SEARCH_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, outcome=outcome)
+        metrics.SEARCHES_ACTIVE.dec()
+        search_slots.release()
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """记录各接口的请求耗时和正在处理的请求数"""
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # 使用路由模板作为标签，避免路径参数和404路径造成标签膨胀
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=request.method,
+                                              endpoint=endpoint, status=str(status))
+        metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+
+async def warm_up():
+    """预热连接池、LLM客户端和工作流，最长WARMUP_TIMEOUT秒，完成或超时后标记为就绪"""
+    start = time.perf_counter()
+    warmup_state.update(started_at=datetime.now().isoformat(), timed_out=False)
+    try:
+        warmup_state["results"] = await asyncio.wait_for(
+            run_in_threadpool(agent.warm_up, ping_llm=WARMUP_PING_LLM), WARMUP_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"预热超过 {WARMUP_TIMEOUT}s，停止等待")
+        warmup_state["timed_out"] = True
+    except Exception as e:
+        logger.error(f"预热失败: {e}", exc_info=True)
+        warmup_state["error"] = str(e)
+    warmup_state.update(ready=True, duration=round(time.perf_counter() - start, 3))
+    logger.info(f"预热完成，耗时 {warmup_state['duration']}s")
+
 @app.on_event("startup")
 async def startup_event():
-    """启动时初始化Agent"""
+    """启动时初始化Agent，加载持久化缓存，并在后台预热"""
     global agent
     try:
         agent = SearchAgent()
+        metrics.bind_cache(agent.cache)
         logger.info("Search Agent initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Search Agent: {e}")
         raise
+    
+    if CACHE_PATH:
+        try:
+            loaded = await run_in_threadpool(agent.cache.load, CACHE_PATH)
+            warmup_state["cache_entries_loaded"] = loaded
+            logger.info(f"从 {CACHE_PATH} 加载了 {loaded} 条缓存")
+        except Exception as e:
+            logger.error(f"加载缓存失败: {e}")
+    
+    # 预热在后台进行，服务可以立即响应健康检查，/api/health在预热完成后报告ready
+    warmup_state["task"] = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭时保存搜索结果缓存"""
+    if agent and CACHE_PATH:
+        try:
+            saved = await run_in_threadpool(agent.cache.save, CACHE_PATH)
+            logger.info(f"已保存 {saved} 条缓存到 {CACHE_PATH}")
+        except Exception as e:
+            logger.error(f"保存缓存失败: {e}")
 
 @app.get("/")
 async def root():
@@ -92,6 +206,7 @@ async def root():
         "endpoints": {
             "search": "/api/search",
             "health": "/api/health",
+            "metrics": "/metrics",
             "websocket": "/ws"
         }
     }
@@ -102,16 +217,39 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "agent_ready": agent is not None
+        "agent_ready": agent is not None,
+        "ready": agent is not None and warmup_state["ready"],
+        "warmup": {key: value for key, value in warmup_state.items() if key != "task"}
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus格式的运行指标"""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/api/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """下载性能剖析文件"""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+    path = profiling.artifact_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=path.name, media_type="application/octet-stream")
+
 @app.post("/api/search", response_model=SearchResponse)
-async def search(request: SearchRequest):
-    """执行搜索"""
+async def search(request: SearchRequest,
+                 x_profile: Optional[Literal["cprofile", "sampling"]] = Header(None),
+                 x_profile_token: Optional[str] = Header(None)):
+    """执行搜索；携带剖析令牌时可通过profile字段或X-Profile请求头开启性能剖析"""
     if not agent:
         logger.error("Agent not initialized")
         raise HTTPException(status_code=503, detail="Agent not initialized")
     
+    profile = request.profile or x_profile
+    if profile and not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+    
     try:
         logger.info(f"开始处理搜索请求: {request.query}")
         logger.debug(f"搜索参数: max_iterations={request.max_iterations}")
@@ -120,8 +258,9 @@ async def search(request: SearchRequest):
         logger.debug("准备调用Agent搜索方法")
         
         # 运行Agent
-        logger.debug("开始执行Agent.search()")
-        result = agent.search(request.query, max_iterations=request.max_iterations)
+        logger.debug("开始执行Agent.search_with_details()")
+        details = await run_search(request.query, request.max_iterations, request.trace, profile=profile)
+        result = details["answer"]
         logger.debug(f"Agent.search()执行完成，返回结果长度: {len(str(result)) if result else 0}")
         
         # 构建响应
@@ -129,7 +268,13 @@ async def search(request: SearchRequest):
             success=True,
             query=request.query,
             answer=result,
-            iterations=request.max_iterations,
+            iterations=details["iterations"],
+            coverage=details["coverage"],
+            branch_timings=details["timings"],
+            fast_path=details["fast_path"],
+            trace=details.get("trace"),
+            usage=details["usage"],
+            profile=details.get("profile"),
             timestamp=datetime.now().isoformat()
         )
         
@@ -150,6 +295,7 @@ async def search(request: SearchRequest):
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket端点，支持流式响应"""
     await websocket.accept()
+    metrics.WEBSOCKET_CONNECTIONS.inc()
     
     try:
         while True:
@@ -174,14 +320,16 @@ async def websocket_endpoint(websocket: WebSocket):
             
             try:
                 # 执行搜索
-                result = agent.search(query, max_iterations=max_iterations)
+                details = await run_search(query, max_iterations, endpoint="/ws")
+                result = details["answer"]
                 
                 # 发送结果
                 await websocket.send_json({
                     "type": "result",
                     "data": {
                         "answer": result,
-                        "success": True
+                        "success": True,
+                        "usage": details["usage"]
                     }
                 })
                 
@@ -199,6 +347,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 
     except WebSocketDisconnect:
         logger.info("WebSocket disconnected")
+    finally:
+        metrics.WEBSOCKET_CONNECTIONS.dec()
 
 if __name__ == "__main__":
     import uvicorn
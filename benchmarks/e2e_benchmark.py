@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+端到端延迟基准
+用固定的查询集依次测量SearchAgent.search（LangGraph工作流）、Gemini版IntelligentSearchAgent.search
+（默认模式和推测执行模式）和LangChainSearchAgent.run的端到端耗时。上游默认由benchmarks/stub_servers.py的本地替身服务提供，
+不访问网络、不消耗API配额，结果可在不同版本之间比较。
+
+每个Agent在独立的子进程中运行（峰值内存互不影响），报告：
+    latency_ms     p50/p95/p99/平均/最小/最大耗时（毫秒）
+    throughput_rps 按并发数闭环请求时的吞吐量
+    stages         按span名称汇总的各阶段耗时（每个请求内同名span耗时相加，见tracing模块）
+    peak_rss_mb    子进程的峰值常驻内存，以及完成构造和预热后的峰值
+
+用法：
+    python benchmarks/e2e_benchmark.py
+    python benchmarks/e2e_benchmark.py --agents gemini --runs 5 --concurrency 4 --output e2e.json
+    python benchmarks/e2e_benchmark.py --agents gemini,gemini-speculative    # 对比推测执行模式
+    python benchmarks/e2e_benchmark.py --latency-scale 0 --baseline e2e-previous.json
+    python benchmarks/e2e_benchmark.py --external      # 使用当前环境的上游配置（例如cassette回放）
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 默认查询集（取自保存的搜索结果中的查询及分析出的关键词）
+DEFAULT_QUERIES = [
+    "大语言模型的最新研究进展",
+    "大语言模型",
+    "最新研究",
+    "LLM",
+    "transformer",
+    "large language model",
+]
+
+# 可测量的Agent：名称 -> 说明
+AGENTS = {
+    "search": "SearchAgent.search",
+    "gemini": "IntelligentSearchAgent.search (gemini_search_agent)",
+    "gemini-speculative": "IntelligentSearchAgent.search(speculative=True) (gemini_search_agent)",
+    "langchain": "LangChainSearchAgent.run",
+}
+
+# 报告的延迟分位数
+PERCENTILES = (50, 95, 99)
+
+# 使用替身服务时为缺失的API密钥填入的占位值（请求只发往本地替身服务）
+STUB_API_KEYS = ("GOOGLE_API_KEY", "SERP_API_KEY")
+
+# 子进程输出结果的标记
+_MARKER = "__E2E__"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值分位数（q为0-100）"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_latencies(values: List[float]) -> Dict[str, float]:
+    """耗时样本（秒）的分位数和平均值，单位毫秒"""
+    if not values:
+        return {}
+    summary = {f"p{q}": round(percentile(values, q) * 1000, 3) for q in PERCENTILES}
+    summary.update({
+        "mean": round(statistics.fmean(values) * 1000, 3),
+        "min": round(min(values) * 1000, 3),
+        "max": round(max(values) * 1000, 3),
+    })
+    return summary
+
+
+def load_queries(patterns: List[str]) -> List[str]:
+    """从保存的搜索结果文件中读取查询及分析出的关键词（去重，保持顺序）"""
+    queries: List[str] = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            candidates = [data.get("query")] + list((data.get("analysis") or {}).get("search_keywords") or [])
+            queries.extend(q for q in candidates if isinstance(q, str) and q.strip() and q not in queries)
+    return queries
+
+
+def _peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _stage_totals(spans: List[Dict[str, Any]], totals: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """把耗时树中同名span的耗时相加（毫秒）"""
+    totals = {} if totals is None else totals
+    for span in spans:
+        totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration_ms"]
+        _stage_totals(span["children"], totals)
+    return totals
+
+
+# ---- 子进程：构造并运行单个Agent ----
+
+def _search_agent() -> Tuple[Callable[[str], bool], Callable[[], None]]:
+    from backend.src.agent.graph import SearchAgent
+    agent = SearchAgent()
+
+    def run(query: str) -> bool:
+        agent.search_with_details(query)
+        return True
+
+    return run, agent.cache.clear
+
+
+def _gemini_agent(speculative: bool = False) -> Tuple[Callable[[str], bool], Callable[[], None]]:
+    from gemini_search_agent import IntelligentSearchAgent
+    agent = IntelligentSearchAgent()
+
+    def run(query: str) -> bool:
+        return agent.search(query, speculative=speculative).get("status") == "success"
+
+    return run, lambda: None
+
+
+def _langchain_agent() -> Tuple[Callable[[str], bool], Callable[[], None]]:
+    from langchain_search_agent import LangChainSearchAgent
+    agent = LangChainSearchAgent()
+
+    def run(query: str) -> bool:
+        return bool(agent.run(query).get("success"))
+
+    return run, lambda: None
+
+
+# Agent名称 -> 构造函数（返回执行单个查询的函数和清空结果缓存的函数）
+_FACTORIES = {
+    "search": _search_agent,
+    "gemini": _gemini_agent,
+    "gemini-speculative": lambda: _gemini_agent(speculative=True),
+    "langchain": _langchain_agent,
+}
+
+
+def run_worker(name: str, queries: List[str], runs: int, warmup: int,
+               concurrency: int, warm_cache: bool) -> Dict[str, Any]:
+    """
+    在当前进程中测量一个Agent
+
+    Args:
+        name: Agent名称（AGENTS中的键）
+        queries: 查询集
+        runs: 查询集重复的轮数
+        warmup: 正式测量前预热的轮数（不计入结果）
+        concurrency: 并发请求数（闭环：每个工作线程完成一个请求后立即发起下一个）
+        warm_cache: 是否保留Agent的结果缓存（默认每个请求前清空，测量的是上游完整路径）
+
+    Returns:
+        延迟分位数、吞吐量、各阶段耗时和峰值内存
+    """
+    from backend.src.agent import tracing
+
+    start = time.perf_counter()
+    run, clear_cache = _FACTORIES[name]()
+    construct_s = time.perf_counter() - start
+
+    for _ in range(warmup):
+        for query in queries:
+            run(query)
+    rss_before = _peak_rss_mb()
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def measure(query: str):
+        nonlocal errors
+        if not warm_cache:
+            clear_cache()
+        request_start = time.perf_counter()
+        with tracing.trace() as tracer:
+            try:
+                ok = run(query)
+            except Exception:
+                ok = False
+        elapsed = time.perf_counter() - request_start
+        totals = _stage_totals(tracer.to_tree())
+        with lock:
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+            for stage, duration_ms in totals.items():
+                stages.setdefault(stage, []).append(duration_ms / 1000)
+
+    workload = [query for _ in range(runs) for query in queries]
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(measure, workload))
+    else:
+        for query in workload:
+            measure(query)
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "agent": AGENTS[name],
+        "requests": len(workload),
+        "errors": errors,
+        "concurrency": concurrency,
+        "construct_ms": round(construct_s * 1000, 3),
+        "latency_ms": summarize_latencies(latencies),
+        "throughput_rps": round(len(workload) / wall, 3) if wall > 0 else 0.0,
+        "stages": {
+            stage: dict(summarize_latencies(values), count=len(values))
+            for stage, values in sorted(stages.items())
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_rss_after_warmup_mb": rss_before,
+    }
+
+
+# ---- 主进程：启动替身服务并逐个运行Agent子进程 ----
+
+def _worker_env(upstream_env: Dict[str, str], data_dir: str) -> Dict[str, str]:
+    """子进程环境：从项目根目录导入，本地索引写入临时目录，关闭警告输出"""
+    env = dict(os.environ)
+    env.update(upstream_env)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    env["PYTHONWARNINGS"] = "ignore"
+    env["LOCAL_INDEX_PATH"] = os.path.join(data_dir, "local_index.sqlite")
+    env["VECTOR_INDEX_DIR"] = os.path.join(data_dir, "vector_index")
+    return env
+
+
+def run_agent(name: str, args: argparse.Namespace, queries: List[str],
+              upstream_env: Dict[str, str]) -> Dict[str, Any]:
+    """在新进程中测量一个Agent"""
+    with tempfile.TemporaryDirectory(prefix=f"e2e-{name}-") as data_dir:
+        command = [
+            sys.executable, str(Path(__file__).resolve()), "--worker", name,
+            "--runs", str(args.runs), "--warmup", str(args.warmup), "--concurrency", str(args.concurrency),
+            "--queries-json", json.dumps(queries, ensure_ascii=False)
+        ]
+        if args.warm_cache:
+            command.append("--warm-cache")
+        completed = subprocess.run(command, cwd=PROJECT_ROOT, env=_worker_env(upstream_env, data_dir),
+                                   capture_output=True, text=True)
+    marker = next((line for line in completed.stdout.splitlines() if line.startswith(_MARKER)), None)
+    if completed.returncode != 0 or marker is None:
+        raise RuntimeError(f"Agent {name} 基准执行失败\n{completed.stderr[-2000:]}")
+    return json.loads(marker[len(_MARKER):])
+
+
+def _git_commit() -> Optional[str]:
+    """当前代码版本"""
+    completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True)
+    return completed.stdout.strip() or None if completed.returncode == 0 else None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """
+    与基线报告比较并打印差异
+
+    Args:
+        report: 本次报告
+        baseline: 基线报告
+        max_regression: 允许的p95延迟退化比例（例如0.2表示20%）
+
+    Returns:
+        是否没有超出允许范围的退化
+    """
+    ok = True
+    print(f"\n{'agent':<18} {'metric':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in report["agents"].items():
+        previous = baseline.get("agents", {}).get(name)
+        if not previous:
+            continue
+        rows = [(f"latency {key}", previous["latency_ms"].get(key), current["latency_ms"].get(key))
+                for key in (f"p{q}" for q in PERCENTILES)]
+        rows.append(("throughput_rps", previous["throughput_rps"], current["throughput_rps"]))
+        rows.append(("peak_rss_mb", previous["peak_rss_mb"], current["peak_rss_mb"]))
+        for metric, before, after in rows:
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            print(f"{name:<18} {metric:<16} {before:>10.1f} {after:>10.1f} {change:>+8.1%}")
+            if metric == "latency p95" and change > max_regression:
+                ok = False
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """运行端到端基准"""
+    parser = argparse.ArgumentParser(description="端到端延迟基准")
+    parser.add_argument("--agents", default=",".join(AGENTS), help=f"要测量的Agent，逗号分隔（{', '.join(AGENTS)}）")
+    parser.add_argument("--queries-from", nargs="+", metavar="GLOB",
+                        help="从保存的搜索结果文件中读取查询集（例如 'search_result_*.json'）")
+    parser.add_argument("--runs", type=int, default=3, help="查询集重复的轮数")
+    parser.add_argument("--warmup", type=int, default=1, help="预热轮数")
+    parser.add_argument("--concurrency", type=int, default=1, help="并发请求数")
+    parser.add_argument("--warm-cache", action="store_true", help="保留Agent的结果缓存（默认每个请求前清空）")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="替身服务的延迟倍数")
+    parser.add_argument("--stub-config", help="替身服务配置JSON文件（见stub_servers.py）")
+    parser.add_argument("--external", action="store_true", help="不启动替身服务，使用当前环境的上游配置")
+    parser.add_argument("--output", help="把JSON报告写入文件")
+    parser.add_argument("--baseline", help="与之比较的基线JSON报告")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的p95延迟退化比例")
+    parser.add_argument("--worker", choices=list(AGENTS), help=argparse.SUPPRESS)
+    parser.add_argument("--queries-json", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_worker(args.worker, json.loads(args.queries_json), args.runs, args.warmup,
+                            args.concurrency, args.warm_cache)
+        print(_MARKER + json.dumps(result, ensure_ascii=False))
+        return 0
+
+    queries = load_queries(args.queries_from) if args.queries_from else list(DEFAULT_QUERIES)
+    if not queries:
+        parser.error("查询集为空")
+    names = [name.strip() for name in args.agents.split(",") if name.strip()]
+    unknown = [name for name in names if name not in AGENTS]
+    if unknown:
+        parser.error(f"未知的Agent: {', '.join(unknown)}")
+
+    stubs = None
+    upstream_env: Dict[str, str] = {}
+    if not args.external:
+        sys.path.insert(0, str(PROJECT_ROOT))
+        from benchmarks.stub_servers import StubServers
+
+        config = None
+        if args.stub_config:
+            with open(args.stub_config, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        stubs = StubServers(config=config, latency_scale=args.latency_scale).start()
+        upstream_env = stubs.env()
+        upstream_env["NO_PROXY"] = "127.0.0.1,localhost"
+        for key in STUB_API_KEYS:
+            if not os.getenv(key):
+                upstream_env[key] = "stub"
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "upstreams": "external" if args.external else "stubs",
+            "latency_scale": None if args.external else args.latency_scale,
+            "queries": queries,
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "warm_cache": args.warm_cache,
+        },
+        "agents": {}
+    }
+    try:
+        for name in names:
+            print(f"测量 {AGENTS[name]} ...", file=sys.stderr)
+            report["agents"][name] = run_agent(name, args, queries, upstream_env)
+    finally:
+        if stubs is not None:
+            stubs.stop()
+            report["meta"]["stub_requests"] = stubs.stats
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{'agent':<18} {'requests':>8} {'errors':>6} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} "
+          f"{'rps':>7} {'peak RSS(MB)':>13}")
+    for name, result in report["agents"].items():
+        latency = result["latency_ms"]
+        print(f"{name:<18} {result['requests']:>8} {result['errors']:>6} {latency['p50']:>9.1f} "
+              f"{latency['p95']:>9.1f} {latency['p99']:>9.1f} {result['throughput_rps']:>7.2f} "
+              f"{result['peak_rss_mb']:>13.1f}")
+    if not args.output:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
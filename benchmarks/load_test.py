@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+API服务并发压测
+对FastAPI服务的POST /api/search和/ws施加逐级增加的负载，找出单个服务进程在延迟失控前
+能承受的并发量。默认在本地启动上游替身服务（benchmarks/stub_servers.py）和一个指向它们的
+API服务子进程，不访问网络。
+
+两种负载模型：
+    open     开环：按泊松过程以固定到达率发起请求，不等待之前的请求完成；
+             延迟从计划发起时间算起（不受协调遗漏影响），达到的吞吐低于到达率即视为饱和
+    closed   闭环：N个虚拟用户各自循环“发起请求-等待响应-思考时间”；
+             吞吐不再随用户数增长或延迟超出SLO即视为饱和
+
+/ws闭环时每个虚拟用户保持一个连接依次发送查询；开环时每个请求新建连接（包含握手耗时）。
+延迟取到收到complete（或error）消息为止，另报告到收到start消息的首包延迟。
+
+每一级报告延迟分位数、错误率（按类型）和达到的吞吐；整体报告饱和点（第一个不健康的级别）
+和最大可持续负载（最后一个健康的级别）。结果保存为JSON，--baseline可与之前的结果比较。
+
+用法：
+    python benchmarks/load_test.py --mode closed --users 1,2,4,8,16
+    python benchmarks/load_test.py --mode open --rates 0.5,1,2,4 --endpoint ws --duration 30
+    python benchmarks/load_test.py --target http://127.0.0.1:8000 --mode closed --users 4
+    python benchmarks/load_test.py --baseline benchmarks/results/load-20250606-120000.json
+
+注意：压测客户端与服务在同一台机器上运行时会争用CPU，单核机器上的结果偏保守。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.e2e_benchmark import DEFAULT_QUERIES, STUB_API_KEYS, _git_commit, summarize_latencies
+
+# 默认结果目录
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+# 默认负载级别：开环为每秒到达数，闭环为虚拟用户数
+DEFAULT_RATES = "0.5,1,2,4,8"
+DEFAULT_USERS = "1,2,4,8,16"
+
+# 判定饱和的默认阈值：p95延迟SLO（毫秒）、错误率上限、开环达到吞吐占到达率的下限、
+# 闭环吞吐相对上一级的最小增幅
+DEFAULT_SLO_MS = 10000.0
+DEFAULT_MAX_ERROR_RATE = 0.01
+OPEN_LOOP_MIN_ACHIEVED = 0.9
+CLOSED_LOOP_MIN_GAIN = 0.1
+
+# 等待API服务就绪的最长时间（秒）
+SERVER_READY_TIMEOUT = 60.0
+
+
+class StepRecorder:
+    """一个负载级别内的请求结果"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.first_message: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.completed_at: List[float] = []
+
+    def ok(self, latency: float, first_message: Optional[float] = None):
+        self.latencies.append(latency)
+        self.completed_at.append(time.perf_counter())
+        if first_message is not None:
+            self.first_message.append(first_message)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def completion_rate(self) -> float:
+        """相邻完成之间的平均速率（不受开头爬坡和结尾排空的影响）"""
+        if len(self.completed_at) < 2:
+            return 0.0
+        span = max(self.completed_at) - min(self.completed_at)
+        return (len(self.completed_at) - 1) / span if span > 0 else 0.0
+
+    def summary(self, wall: float, throughput: Optional[float] = None) -> Dict[str, Any]:
+        """汇总本级结果（throughput为空时按完成数除以总耗时计算）"""
+        completed = len(self.latencies)
+        failed = sum(self.errors.values())
+        total = completed + failed
+        if throughput is None:
+            throughput = completed / wall if wall > 0 else 0.0
+        result = {
+            "requests": total,
+            "completed": completed,
+            "errors": dict(sorted(self.errors.items())),
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "throughput_rps": round(throughput, 3),
+            "latency_ms": summarize_latencies(self.latencies),
+        }
+        if self.first_message:
+            result["first_message_ms"] = summarize_latencies(self.first_message)
+        return result
+
+
+class QueryPicker:
+    """生成查询：默认在查询后附加序号，使每个请求都绕过服务端的结果缓存"""
+
+    def __init__(self, queries: List[str], repeat_fraction: float, seed: int):
+        self.queries = queries
+        self.repeat_fraction = repeat_fraction
+        self.rng = random.Random(seed)
+        self.counter = itertools.count()
+
+    def next(self) -> str:
+        query = self.rng.choice(self.queries)
+        if self.rng.random() < self.repeat_fraction:
+            return query
+        return f"{query} {next(self.counter)}"
+
+
+async def http_search(client: httpx.AsyncClient, base_url: str, query: str, recorder: StepRecorder,
+                      timeout: float, scheduled: Optional[float] = None):
+    """发送一次POST /api/search"""
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        response = await client.post(f"{base_url}/api/search", json={"query": query}, timeout=timeout)
+    except httpx.TimeoutException:
+        recorder.error("timeout")
+        return
+    except httpx.HTTPError as e:
+        recorder.error(f"connection:{type(e).__name__}")
+        return
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        recorder.error(f"http_{response.status_code}")
+    elif not response.json().get("success"):
+        recorder.error("search_failed")
+    else:
+        recorder.ok(elapsed)
+
+
+async def ws_exchange(websocket: Any, query: str, recorder: StepRecorder, timeout: float, start: float):
+    """在已建立的WebSocket连接上完成一次查询"""
+    await websocket.send(json.dumps({"query": query}, ensure_ascii=False))
+    first_message = None
+    while True:
+        message = json.loads(await asyncio.wait_for(websocket.recv(), timeout))
+        if first_message is None:
+            first_message = time.perf_counter() - start
+        if message.get("type") == "complete":
+            recorder.ok(time.perf_counter() - start, first_message)
+            return
+        if message.get("type") == "error":
+            recorder.error("ws_error")
+            return
+
+
+async def ws_search(ws_url: str, query: str, recorder: StepRecorder, timeout: float,
+                    scheduled: Optional[float] = None):
+    """新建WebSocket连接完成一次查询（开环）"""
+    import websockets
+
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        async with websockets.connect(ws_url, open_timeout=timeout, max_size=None) as websocket:
+            await ws_exchange(websocket, query, recorder, timeout, start)
+    except asyncio.TimeoutError:
+        recorder.error("timeout")
+    except Exception as e:
+        recorder.error(f"connection:{type(e).__name__}")
+
+
+async def run_open_step(args: argparse.Namespace, rate: float, picker: QueryPicker,
+                        client: httpx.AsyncClient) -> Dict[str, Any]:
+    """开环：按泊松到达率发起请求duration秒，再等待在途请求完成"""
+    recorder = StepRecorder()
+    rng = random.Random(args.seed)
+    tasks = set()
+    arrivals = []
+    loop_start = time.perf_counter()
+    next_arrival = loop_start
+    while next_arrival < loop_start + args.duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        arrivals.append(next_arrival)
+        if len(tasks) >= args.max_in_flight:
+            recorder.error("dropped")
+        else:
+            query = picker.next()
+            if args.endpoint == "ws":
+                request = ws_search(args.ws_url, query, recorder, args.timeout, next_arrival)
+            else:
+                request = http_search(client, args.target, query, recorder, args.timeout, next_arrival)
+            task = asyncio.create_task(request)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        next_arrival += rng.expovariate(rate)
+    if tasks:
+        await asyncio.wait(tasks)
+    # 开环的吞吐按完成速率计算：未饱和时等于到达率，饱和时等于服务能力
+    result = recorder.summary(time.perf_counter() - loop_start, recorder.completion_rate())
+    result["offered_rps"] = rate
+    # 实际到达率（泊松到达在较短的持续时间内与名义到达率有偏差，饱和判断以它为准）
+    span = arrivals[-1] - arrivals[0] if len(arrivals) > 1 else 0.0
+    result["arrival_rps"] = round((len(arrivals) - 1) / span, 3) if span > 0 else rate
+    return result
+
+
+async def run_closed_step(args: argparse.Namespace, users: int, picker: QueryPicker,
+                          client: httpx.AsyncClient) -> Dict[str, Any]:
+    """闭环：users个虚拟用户循环请求duration秒"""
+    import websockets
+
+    recorder = StepRecorder()
+    deadline = time.perf_counter() + args.duration
+
+    async def http_user():
+        while time.perf_counter() < deadline:
+            await http_search(client, args.target, picker.next(), recorder, args.timeout)
+            if args.think_time:
+                await asyncio.sleep(args.think_time)
+
+    async def ws_user():
+        while time.perf_counter() < deadline:
+            try:
+                async with websockets.connect(args.ws_url, open_timeout=args.timeout, max_size=None) as websocket:
+                    while time.perf_counter() < deadline:
+                        await ws_exchange(websocket, picker.next(), recorder, args.timeout, time.perf_counter())
+                        if args.think_time:
+                            await asyncio.sleep(args.think_time)
+            except asyncio.TimeoutError:
+                recorder.error("timeout")
+            except Exception as e:
+                recorder.error(f"connection:{type(e).__name__}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*((ws_user if args.endpoint == "ws" else http_user)() for _ in range(users)))
+    result = recorder.summary(time.perf_counter() - start)
+    result["users"] = users
+    return result
+
+
+def assess(steps: List[Dict[str, Any]], mode: str, slo_ms: float, max_error_rate: float) -> Dict[str, Any]:
+    """
+    按阈值判断每一级是否健康，找出饱和点
+
+    Returns:
+        saturation（第一个不健康的级别及原因，未饱和时为None）和max_sustainable（最后一个健康的级别）
+    """
+    key = "offered_rps" if mode == "open" else "users"
+    saturation = None
+    sustainable = None
+    previous_throughput = None
+    for step in steps:
+        reasons = []
+        if step["error_rate"] > max_error_rate:
+            reasons.append(f"error_rate {step['error_rate']:.2%} > {max_error_rate:.2%}")
+        p95 = step["latency_ms"].get("p95")
+        if p95 is None or p95 > slo_ms:
+            reasons.append(f"p95 {p95} ms > SLO {slo_ms} ms")
+        if mode == "open" and step["throughput_rps"] < OPEN_LOOP_MIN_ACHIEVED * step["arrival_rps"]:
+            reasons.append(f"throughput {step['throughput_rps']} < {OPEN_LOOP_MIN_ACHIEVED:.0%} of "
+                           f"arrival rate {step['arrival_rps']}")
+        if (mode == "closed" and previous_throughput
+                and step["throughput_rps"] < previous_throughput * (1 + CLOSED_LOOP_MIN_GAIN)):
+            reasons.append(f"throughput stopped scaling ({previous_throughput} -> {step['throughput_rps']} rps)")
+        previous_throughput = step["throughput_rps"]
+        step["healthy"] = not reasons
+        if reasons and saturation is None:
+            saturation = {key: step[key], "reasons": reasons}
+        if not reasons and saturation is None:
+            sustainable = step[key]
+    return {"saturation": saturation, "max_sustainable": sustainable}
+
+
+def _vm_hwm_mb(pid: int) -> Optional[float]:
+    """进程的峰值常驻内存（MB，仅Linux）"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def start_server(port: int, upstream_env: Dict[str, str], log_path: str,
+                 slots: Optional[int]) -> subprocess.Popen:
+    """启动指向替身服务的API服务子进程"""
+    env = dict(os.environ)
+    env.update(upstream_env)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    env["PYTHONWARNINGS"] = "ignore"
+    env["SEARCH_CACHE_PATH"] = ""
+    if slots:
+        env["MAX_CONCURRENT_SEARCHES"] = str(slots)
+    with open(log_path, "w") as log:
+        return subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.src.api.server:app",
+             "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+
+def wait_ready(base_url: str, process: Optional[subprocess.Popen], timeout: float = SERVER_READY_TIMEOUT):
+    """等待/api/health报告ready"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"API服务启动失败（退出码 {process.returncode}）")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=2).json().get("ready"):
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API服务在 {timeout}s 内未就绪")
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    """与基线逐级比较p95延迟和吞吐，p95退化超过max_regression时返回False"""
+    ok = True
+    key = "offered_rps" if report["meta"]["mode"] == "open" else "users"
+    previous = {step[key]: step for step in baseline.get("steps", [])}
+    print(f"\n{key:>12} {'p95 base':>10} {'p95 now':>10} {'change':>8} {'rps base':>9} {'rps now':>9}")
+    for step in report["steps"]:
+        before = previous.get(step[key])
+        if not before or not before["latency_ms"] or not step["latency_ms"]:
+            continue
+        p95_before, p95_after = before["latency_ms"]["p95"], step["latency_ms"]["p95"]
+        change = (p95_after - p95_before) / p95_before if p95_before else 0.0
+        print(f"{step[key]:>12} {p95_before:>10.1f} {p95_after:>10.1f} {change:>+8.1%} "
+              f"{before['throughput_rps']:>9.2f} {step['throughput_rps']:>9.2f}")
+        if change > max_regression:
+            ok = False
+    return ok
+
+
+async def run_steps(args: argparse.Namespace, levels: List[float], picker: QueryPicker) -> List[Dict[str, Any]]:
+    """依次运行各负载级别"""
+    steps = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(limits=limits, trust_env=False) as client:
+        for level in levels:
+            label = f"rate={level}" if args.mode == "open" else f"users={int(level)}"
+            print(f"{args.mode} {args.endpoint} {label} ...", file=sys.stderr)
+            if args.mode == "open":
+                step = await run_open_step(args, level, picker, client)
+            else:
+                step = await run_closed_step(args, int(level), picker, client)
+            steps.append(step)
+            if args.cooldown:
+                await asyncio.sleep(args.cooldown)
+    return steps
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """运行压测"""
+    parser = argparse.ArgumentParser(description="API服务并发压测")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed", help="负载模型")
+    parser.add_argument("--endpoint", choices=["search", "ws"], default="search", help="压测的接口")
+    parser.add_argument("--rates", default=DEFAULT_RATES, help="开环各级的到达率（每秒），逗号分隔")
+    parser.add_argument("--users", default=DEFAULT_USERS, help="闭环各级的虚拟用户数，逗号分隔")
+    parser.add_argument("--duration", type=float, default=20.0, help="每一级的持续时间（秒）")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="两级之间的间隔（秒）")
+    parser.add_argument("--think-time", type=float, default=0.0, help="闭环虚拟用户两次请求之间的思考时间（秒）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单个请求的超时时间（秒）")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="开环在途请求上限，超出的请求记为dropped")
+    parser.add_argument("--repeat-fraction", type=float, default=0.0,
+                        help="原样重复查询集中查询的比例（可命中服务端缓存），其余请求使用唯一查询")
+    parser.add_argument("--slo-ms", type=float, default=DEFAULT_SLO_MS, help="p95延迟SLO（毫秒）")
+    parser.add_argument("--max-error-rate", type=float, default=DEFAULT_MAX_ERROR_RATE, help="错误率上限")
+    parser.add_argument("--target", help="已运行的API服务地址（默认启动本地服务和替身上游）")
+    parser.add_argument("--server-slots", type=int, help="启动本地服务时的MAX_CONCURRENT_SEARCHES")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="替身服务的延迟倍数")
+    parser.add_argument("--error-rate", type=float, help="替身服务的错误率")
+    parser.add_argument("--stub-config", help="替身服务配置JSON文件（见stub_servers.py）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", help=f"结果文件，默认保存到 {RESULTS_DIR.relative_to(PROJECT_ROOT)}/")
+    parser.add_argument("--baseline", help="与之比较的基线结果文件")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="允许的p95延迟退化比例")
+    args = parser.parse_args(argv)
+
+    levels = [float(value) for value in (args.rates if args.mode == "open" else args.users).split(",") if value]
+    if not levels or min(levels) <= 0:
+        parser.error("负载级别必须为正数")
+
+    stubs = server = None
+    server_log = None
+    try:
+        if args.target:
+            args.target = args.target.rstrip("/")
+        else:
+            from benchmarks.stub_servers import StubServers
+
+            config = None
+            if args.stub_config:
+                with open(args.stub_config, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+            stubs = StubServers(config=config, latency_scale=args.latency_scale,
+                                error_rate=args.error_rate, seed=args.seed).start()
+            upstream_env = dict(stubs.env(), NO_PROXY="127.0.0.1,localhost")
+            for key in STUB_API_KEYS:
+                if not os.getenv(key):
+                    upstream_env[key] = "stub"
+            port = _free_port()
+            server_log = tempfile.NamedTemporaryFile(prefix="load-test-server-", suffix=".log", delete=False).name
+            server = start_server(port, upstream_env, server_log, args.server_slots)
+            args.target = f"http://127.0.0.1:{port}"
+        args.ws_url = args.target.replace("http", "ws", 1) + "/ws"
+        wait_ready(args.target, server)
+
+        picker = QueryPicker(list(DEFAULT_QUERIES), args.repeat_fraction, args.seed)
+        steps = asyncio.run(run_steps(args, levels, picker))
+    finally:
+        server_rss = _vm_hwm_mb(server.pid) if server is not None else None
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if stubs is not None:
+            stubs.stop()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "mode": args.mode,
+            "endpoint": args.endpoint,
+            "duration_s": args.duration,
+            "think_time_s": args.think_time,
+            "repeat_fraction": args.repeat_fraction,
+            "target": "local" if server is not None else args.target,
+            "upstreams": "stubs" if stubs is not None else "external",
+            "latency_scale": args.latency_scale if stubs is not None else None,
+            "server_slots": args.server_slots,
+            "server_peak_rss_mb": server_rss,
+            "server_log": server_log,
+            "stub_requests": stubs.stats if stubs is not None else None,
+            "cpu_count": os.cpu_count(),
+        },
+        "steps": steps,
+    }
+    report.update(assess(steps, args.mode, args.slo_ms, args.max_error_rate))
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"load-{args.mode}-{args.endpoint}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    key = "offered_rps" if args.mode == "open" else "users"
+    print(f"{key:>12} {'requests':>8} {'err%':>6} {'rps':>7} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}  healthy")
+    for step in steps:
+        latency = step["latency_ms"] or {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        print(f"{step[key]:>12} {step['requests']:>8} {step['error_rate']:>6.1%} {step['throughput_rps']:>7.2f} "
+              f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}  {step['healthy']}")
+    print(f"饱和点: {report['saturation']}")
+    print(f"最大可持续负载: {report['max_sustainable']}")
+    print(f"结果已保存: {output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+热点路径微基准
+对单个请求内的CPU热点分别计时，每个用例在不同大小的负载上运行：
+    arxiv.parse_feed          arXiv Atom XML解析（ArxivSearchTool.search）
+    arxiv.format_papers       论文结果的f-string格式化（ArxivSearchTool.search）
+    wikipedia.strip_snippet   搜索结果摘要的搜索词高亮标签去除（search_wikipedia）
+    summary.build_prompt      汇总提示中json.dumps(indent=2)的序列化（summarize_results）
+    debug.add_log             DebugInfo.add_log（DEBUG日志关闭/开启时）
+    debug.to_json             DebugInfo.to_json(indent=2)
+
+负载默认由benchmarks/stub_servers.py按固定种子生成（与端到端基准的上游响应一致），
+--cassette可加入录制的真实响应（见cassette模块）。标记为reference的用例是替代实现，
+只用于对比，不参与回归判断。
+
+每个用例用timeit自动确定循环次数，重复多次取最小值（最不受干扰的单次耗时）和中位数。
+与基线文件（默认benchmarks/micro_baseline.json）比较，最小值超出基线
+(1 + --max-regression) * --budget-scale 倍时以非零状态退出；优化后用--update-baseline更新基线。
+
+用法：
+    python benchmarks/micro_benchmark.py
+    python benchmarks/micro_benchmark.py --filter arxiv --repeat 10
+    python benchmarks/micro_benchmark.py --cassette data/cassettes/default.jsonl.gz
+    python benchmarks/micro_benchmark.py --update-baseline
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import logging
+import platform
+import statistics
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.src.agent.debug import DebugInfo
+from backend.src.agent.tools.arxiv_tool import format_papers, parse_feed
+from backend.src.agent.tools.wikipedia_tool import strip_snippet_html
+from benchmarks.stub_servers import StubServers
+
+# 默认基线文件
+DEFAULT_BASELINE = PROJECT_ROOT / "benchmarks" / "micro_baseline.json"
+
+# 负载大小：名称 -> 结果条数（arXiv论文、Wikipedia结果、汇总结果、DEBUG日志条数）
+SIZES = {
+    "small": 5,
+    "medium": 50,
+    "large": 200,
+}
+
+# 生成负载使用的查询
+PAYLOAD_QUERY = "large language model"
+
+# 每次计时的目标时长（秒），timeit据此确定循环次数
+MIN_TIME_PER_REPEAT = 0.1
+
+
+class Payloads:
+    """各用例使用的负载，按大小缓存"""
+
+    def __init__(self, cassette_path: Optional[str] = None):
+        self._stubs = StubServers(config={
+            "arxiv": {"results": max(SIZES.values())},
+            "wikipedia": {"results": max(SIZES.values())},
+        })
+        self._stubs.stop()
+        self._cache: Dict[Tuple[str, str], Any] = {}
+        self.recorded = self._load_cassette(cassette_path) if cassette_path else {}
+
+    def sizes(self, kind: str) -> List[str]:
+        """某类负载可用的大小（录制的负载附加在最后）"""
+        return list(SIZES) + (["recorded"] if kind in self.recorded else [])
+
+    def _cached(self, key: Tuple[str, str], build: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def arxiv_feed(self, size: str) -> bytes:
+        """arXiv Atom feed"""
+        if size == "recorded":
+            return self.recorded["arxiv"]
+        return self._cached(("arxiv", size), lambda: self._stubs.arxiv_feed(PAYLOAD_QUERY, SIZES[size])[1])
+
+    def arxiv_papers(self, size: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """解析后的arXiv论文"""
+        return self._cached(("papers", size), lambda: parse_feed(self.arxiv_feed(size)))
+
+    def wikipedia_snippets(self, size: str) -> List[str]:
+        """Wikipedia搜索结果中带HTML标签的摘要"""
+        def build():
+            if size == "recorded":
+                data = json.loads(self.recorded["wikipedia"])
+            else:
+                data = self._stubs.mediawiki({"list": "search", "srsearch": PAYLOAD_QUERY, "srlimit": SIZES[size]})
+            return [item.get("snippet", "") for item in data.get("query", {}).get("search", [])]
+        return self._cached(("wikipedia", size), build)
+
+    def ranked_results(self, size: str) -> List[Dict[str, Any]]:
+        """打包进汇总提示的结果（与summarize_results中ranked_results的字段一致）"""
+        def build():
+            _, papers = self.arxiv_papers(size)
+            return [{
+                "title": paper["title"],
+                "summary": paper["summary"][:300] + "..." if len(paper["summary"]) > 300 else paper["summary"],
+                "authors": paper["authors"][:3],
+                "published": paper["published"],
+                "link": paper["pdf_link"],
+                "sources": ["arxiv"],
+                "source": "arxiv",
+                "rank": rank
+            } for rank, paper in enumerate(papers, 1)]
+        return self._cached(("ranked", size), build)
+
+    def debug_entries(self, size: str) -> DebugInfo:
+        """写满若干条日志的DebugInfo"""
+        def build():
+            debug_info = DebugInfo()
+            for i in range(SIZES[size] if size in SIZES else SIZES["medium"]):
+                debug_info.add_log("source_search_complete", _debug_data(size, i))
+            return debug_info
+        return self._cached(("debug", size), build)
+
+    @staticmethod
+    def _load_cassette(path: str) -> Dict[str, bytes]:
+        """从cassette中取出最大的arXiv响应和Wikipedia搜索响应"""
+        recorded: Dict[str, bytes] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line) if line.strip() else {}
+                if entry.get("kind") != "http" or entry.get("status") != 200:
+                    continue
+                key = entry["key"]
+                if "/api/query" in key:
+                    kind = "arxiv"
+                elif "list=search" in key:
+                    kind = "wikipedia"
+                else:
+                    continue
+                body = base64.b64decode(entry["body"])
+                if len(body) > len(recorded.get(kind, b"")):
+                    recorded[kind] = body
+        return recorded
+
+
+def _debug_data(size: str, i: int) -> Dict[str, Any]:
+    """DEBUG日志的数据：small为计数类日志，其他为带标题列表的排序日志"""
+    if size == "small":
+        return {"query": PAYLOAD_QUERY, "results_count": i}
+    return {
+        "candidates": SIZES.get(size, 50),
+        "top": [f"{PAYLOAD_QUERY}: result title {i}-{j}" for j in range(5)],
+        "stats": {"input_results": 40, "output_results": 32, "merged_entities": 8}
+    }
+
+
+def _strip_snippets(snippets: List[str]) -> Callable[[], Any]:
+    return lambda: [strip_snippet_html(snippet) for snippet in snippets]
+
+
+def _build_prompt(results: List[Dict[str, Any]]) -> Callable[[], Any]:
+    # 与IntelligentSearchAgent.build_summary_prompt相同（避免在微基准中导入Gemini SDK）
+    return lambda: json.dumps(results, ensure_ascii=False, indent=2)
+
+
+def _build_prompt_compact(results: List[Dict[str, Any]]) -> Callable[[], Any]:
+    return lambda: json.dumps(results, ensure_ascii=False, separators=(",", ":"))
+
+
+def _add_log(size: str, debug_enabled: bool) -> Callable[[], Any]:
+    debug_info = DebugInfo()
+    data = _debug_data(size, 0)
+    logger = logging.getLogger("backend.src.agent.debug")
+
+    def run():
+        previous = logger.level
+        logger.setLevel(logging.DEBUG if debug_enabled else logging.INFO)
+        try:
+            for _ in range(SIZES[size]):
+                debug_info.add_log("source_search_complete", data)
+        finally:
+            logger.setLevel(previous)
+    return run
+
+
+# 用例：名称 -> (负载类别, 构造计时函数, 是否为对比用的替代实现)
+CASES: Dict[str, Tuple[str, Callable[[Payloads, str], Callable[[], Any]], bool]] = {
+    "arxiv.parse_feed": (
+        "arxiv", lambda payloads, size: (lambda data=payloads.arxiv_feed(size): parse_feed(data)), False),
+    "arxiv.format_papers": (
+        "arxiv", lambda payloads, size: (lambda parsed=payloads.arxiv_papers(size):
+                                         format_papers(PAYLOAD_QUERY, parsed[1], parsed[0])), False),
+    "wikipedia.strip_snippet": (
+        "wikipedia", lambda payloads, size: _strip_snippets(payloads.wikipedia_snippets(size)), False),
+    "summary.build_prompt": (
+        "summary", lambda payloads, size: _build_prompt(payloads.ranked_results(size)), False),
+    "summary.json_compact": (
+        "summary", lambda payloads, size: _build_prompt_compact(payloads.ranked_results(size)), True),
+    "debug.add_log": ("debug", lambda payloads, size: _add_log(size, False), False),
+    "debug.add_log_debug_enabled": ("debug", lambda payloads, size: _add_log(size, True), False),
+    "debug.to_json": ("debug", lambda payloads, size: (lambda info=payloads.debug_entries(size):
+                                                         info.to_json(indent=2)), False),
+}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """计时：自动确定循环次数，重复repeat次，返回每次调用的最小和中位耗时（微秒）"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * MIN_TIME_PER_REPEAT / 0.2))
+    samples = [elapsed / number * 1e6 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {"min_us": round(min(samples), 3), "median_us": round(statistics.median(samples), 3), "loops": number}
+
+
+def run_cases(payloads: Payloads, repeat: int, pattern: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """运行全部（或名称包含pattern的）用例"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, (kind, build, reference) in CASES.items():
+        if pattern and pattern not in name:
+            continue
+        # 录制的负载只有arXiv和Wikipedia两类
+        sizes = payloads.sizes(kind) if kind in ("arxiv", "wikipedia") else list(SIZES)
+        for size in sizes:
+            result = measure(build(payloads, size), repeat)
+            result["reference"] = reference
+            results[f"{name}[{size}]"] = result
+    return results
+
+
+def check(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any],
+          max_regression: float, budget_scale: float) -> Tuple[bool, Dict[str, str]]:
+    """与基线比较，返回(是否全部通过, 每个用例的判定)"""
+    ok = True
+    verdicts = {}
+    for key, result in results.items():
+        base = baseline.get("results", {}).get(key)
+        if result["reference"]:
+            verdicts[key] = "reference"
+        elif base is None:
+            verdicts[key] = "new"
+        else:
+            limit = base["min_us"] * (1 + max_regression) * budget_scale
+            passed = result["min_us"] <= limit
+            ok = ok and passed
+            verdicts[key] = f"{'OK' if passed else 'FAIL'} ({result['min_us'] / base['min_us']:.2f}x)"
+    return ok, verdicts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """运行微基准并与基线比较"""
+    parser = argparse.ArgumentParser(description="热点路径微基准")
+    parser.add_argument("--filter", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--repeat", type=int, default=7, help="每个用例重复计时的次数")
+    parser.add_argument("--cassette", help="从cassette文件中加入录制的arXiv和Wikipedia响应")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件")
+    parser.add_argument("--max-regression", type=float, default=0.5, help="允许的耗时退化比例")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="基线倍数（较慢的机器上放宽）")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    args = parser.parse_args(argv)
+
+    results = run_cases(Payloads(args.cassette), args.repeat, args.filter)
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    ok, verdicts = check(results, baseline, args.max_regression, args.budget_scale)
+
+    if args.json:
+        print(json.dumps({"results": results, "verdicts": verdicts}, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'case':<44} {'min(us)':>12} {'median(us)':>12}  result")
+        for key, result in results.items():
+            print(f"{key:<44} {result['min_us']:>12.2f} {result['median_us']:>12.2f}  {verdicts[key]}")
+
+    if args.update_baseline:
+        merged = dict(baseline.get("results", {}))
+        merged.update({key: {"min_us": result["min_us"]} for key, result in results.items()
+                       if not result["reference"]})
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform()
+                },
+                "results": dict(sorted(merged.items()))
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"基线已更新: {baseline_path}")
+        return 0
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+冷启动耗时基准
+在全新的Python进程中测量导入Agent模块、构造SearchAgent、导入API服务器以及
+run_search_agent.py --help的耗时，并检查较重的SDK没有在启动阶段被导入。
+任一场景的中位耗时超出预算或加载了不应加载的SDK时以非零状态退出，可用于CI。
+
+用法：
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 10 --budget-scale 2
+    python benchmarks/startup_benchmark.py --show-imports "import backend.src.api.server"
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 启动阶段不应导入的SDK（应在首次使用时才导入）
+HEAVY_MODULES = ["langgraph", "langchain_google_genai", "google.generativeai", "google.genai", "langchain.agents"]
+
+# 基准场景：名称 -> (在子进程中执行的代码, 中位耗时预算（秒）)
+SCENARIOS = {
+    "import graph": ("import backend.src.agent.graph", 1.0),
+    "construct SearchAgent": ("from backend.src.agent.graph import SearchAgent; SearchAgent()", 1.0),
+    "import server": ("import backend.src.api.server", 1.5),
+}
+
+# 命令行脚本场景：名称 -> (参数, 中位耗时预算（秒）)
+SCRIPT_SCENARIOS = {
+    "run_search_agent --help": (["run_search_agent.py", "--help"], 0.5),
+}
+
+# 子进程中包装场景代码：测量执行耗时并报告已加载的重量级SDK
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print("__STARTUP__" + json.dumps({{"elapsed": elapsed, "heavy": heavy}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    """子进程环境：从项目根目录导入，关闭警告输出"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def run_code(code: str) -> Dict[str, object]:
+    """在新进程中执行代码，返回进程总耗时、代码执行耗时和已加载的重量级SDK"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=code, heavy=HEAVY_MODULES)],
+        cwd=PROJECT_ROOT, env=_env(), capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"场景执行失败: {code}\n{completed.stderr[-2000:]}")
+
+    marker = next(line for line in completed.stdout.splitlines() if line.startswith("__STARTUP__"))
+    probe = json.loads(marker[len("__STARTUP__"):])
+    return {"wall": wall, "elapsed": probe["elapsed"], "heavy": probe["heavy"]}
+
+
+def run_script(args: List[str]) -> Dict[str, object]:
+    """在新进程中运行脚本，返回进程总耗时"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable] + args, cwd=PROJECT_ROOT, env=_env(), capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"脚本执行失败: {' '.join(args)}\n{completed.stderr[-2000:]}")
+    return {"wall": wall, "elapsed": wall, "heavy": []}
+
+
+def show_imports(code: str, limit: int = 15):
+    """使用-X importtime列出累计导入耗时最高的模块"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, env=_env(), capture_output=True, text=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # 格式：import time: self [us] | cumulative | imported package
+        self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), int(self_us), module.strip()))
+    rows.sort(reverse=True)
+    print(f"{'cumulative(ms)':>15} {'self(ms)':>10}  module")
+    for cumulative_us, self_us, module in rows[:limit]:
+        print(f"{cumulative_us / 1000:>15.1f} {self_us / 1000:>10.1f}  {module}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """运行全部启动场景并与预算比较"""
+    parser = argparse.ArgumentParser(description="冷启动耗时基准")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景运行的次数")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="预算倍数（较慢的机器上放宽预算）")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    parser.add_argument("--show-imports", metavar="CODE", help="列出执行CODE时导入耗时最高的模块")
+    args = parser.parse_args(argv)
+
+    if args.show_imports:
+        show_imports(args.show_imports)
+        return 0
+
+    jobs = [(name, run_code, code, budget) for name, (code, budget) in SCENARIOS.items()]
+    jobs += [(name, run_script, script, budget) for name, (script, budget) in SCRIPT_SCENARIOS.items()]
+
+    report = []
+    failed = False
+    for name, runner, target, budget in jobs:
+        samples = [runner(target) for _ in range(args.runs)]
+        median = statistics.median(sample["elapsed"] for sample in samples)
+        wall = statistics.median(sample["wall"] for sample in samples)
+        heavy = sorted({module for sample in samples for module in sample["heavy"]})
+        limit = budget * args.budget_scale
+        ok = median <= limit and not heavy
+        failed = failed or not ok
+        report.append({
+            "scenario": name,
+            "median_s": round(median, 3),
+            "process_wall_s": round(wall, 3),
+            "budget_s": round(limit, 3),
+            "heavy_modules": heavy,
+            "ok": ok
+        })
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'scenario':<28} {'median(s)':>10} {'process(s)':>11} {'budget(s)':>10}  result")
+        for row in report:
+            result = "OK" if row["ok"] else "FAIL"
+            if row["heavy_modules"]:
+                result += f" (loaded: {', '.join(row['heavy_modules'])})"
+            print(f"{row['scenario']:<28} {row['median_s']:>10.3f} {row['process_wall_s']:>11.3f} "
+                  f"{row['budget_s']:>10.3f}  {result}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+本地上游替身服务
+在一个进程内模拟arXiv、MediaWiki、SerpAPI（Google Scholar）和Gemini接口，
+每个上游可配置延迟分布、错误率和返回的数据量，用于在隔离环境中进行端到端性能测试，
+不消耗真实的API配额。
+
+路由：
+    GET  /arxiv/api/query                        arXiv Atom feed（search_query、max_results）
+    GET  /wikipedia/w/api.php                    MediaWiki api.php（list=search 和 prop=extracts）
+    GET  /serpapi/search                         SerpAPI engine=google_scholar
+    POST /gemini/v1beta/models/{model}:generateContent（及streamGenerateContent）
+                                                 Gemini generateContent（按提示返回查询分析JSON、反思JSON或总结；
+                                                 请求声明了工具时先返回一次functionCall，
+                                                 启用googleSearch工具时附带搜索来源）
+
+返回内容由查询确定性地生成（相同查询得到相同结果），便于缓存和去重逻辑生效。
+
+延迟分布配置：
+    {"dist": "fixed", "value": 0.2}
+    {"dist": "uniform", "low": 0.1, "high": 0.5}
+    {"dist": "normal", "mean": 0.3, "stddev": 0.1}
+    {"dist": "lognormal", "median": 0.3, "sigma": 0.5}
+
+用法：
+    python benchmarks/stub_servers.py --port 8765
+    python benchmarks/stub_servers.py --config stubs.json --latency-scale 0.5 --error-rate 0.05
+启动后打印指向替身服务的环境变量（ARXIV_API_URL等），在运行Agent的shell中导出即可。
+
+在代码中使用：
+    with StubServers(latency_scale=0) as stubs:
+        os.environ.update(stubs.env())
+        ...
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from xml.sax.saxutils import escape
+
+# 各上游的默认配置：延迟分布、错误率、错误状态码、每次返回的结果数和单条文本长度（字符）
+DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
+    "arxiv": {
+        "latency": {"dist": "lognormal", "median": 0.4, "sigma": 0.4},
+        "error_rate": 0.0, "error_status": 503, "results": 5, "text_chars": 1200
+    },
+    "wikipedia": {
+        "latency": {"dist": "lognormal", "median": 0.12, "sigma": 0.3},
+        "error_rate": 0.0, "error_status": 503, "results": 5, "text_chars": 800
+    },
+    "serpapi": {
+        "latency": {"dist": "lognormal", "median": 0.8, "sigma": 0.4},
+        "error_rate": 0.0, "error_status": 429, "results": 5, "text_chars": 300
+    },
+    "gemini": {
+        "latency": {"dist": "lognormal", "median": 1.0, "sigma": 0.3},
+        "error_rate": 0.0, "error_status": 503, "results": 1, "text_chars": 1500
+    },
+}
+
+# 生成文本使用的词表
+_WORDS = ("model", "language", "learning", "neural", "attention", "training", "data", "scaling",
+          "retrieval", "agent", "benchmark", "evaluation", "reasoning", "alignment", "inference")
+_CJK_WORDS = ("模型", "语言", "学习", "神经网络", "注意力", "训练", "数据", "检索", "推理", "评估")
+
+_GEMINI_PATH = re.compile(r'^/gemini/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)$')
+
+
+def sample_latency(spec: Dict[str, Any], rng: random.Random) -> float:
+    """按延迟分布配置采样一次延迟（秒，不小于0）"""
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        value = spec.get("value", 0.0)
+    elif dist == "uniform":
+        value = rng.uniform(spec.get("low", 0.0), spec.get("high", 0.0))
+    elif dist == "normal":
+        value = rng.gauss(spec.get("mean", 0.0), spec.get("stddev", 0.0))
+    elif dist == "lognormal":
+        median = spec.get("median", 0.0)
+        value = median * rng.lognormvariate(0.0, spec.get("sigma", 0.0)) if median > 0 else 0.0
+    else:
+        raise ValueError(f"未知的延迟分布: {dist}")
+    return max(value, 0.0)
+
+
+def _seeded(*parts: Any) -> random.Random:
+    """根据请求内容生成确定性的随机数发生器"""
+    digest = hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _text(rng: random.Random, query: str, chars: int) -> str:
+    """生成包含查询词的占位文本"""
+    cjk = bool(re.search(r'[\u4e00-\u9fff]', query))
+    words = [query]
+    length = len(query)
+    while length < chars:
+        word = rng.choice(_CJK_WORDS if cjk else _WORDS)
+        words.append(word)
+        length += len(word) + (0 if cjk else 1)
+    return ("" if cjk else " ").join(words)[:chars]
+
+
+def _title(rng: random.Random, query: str, index: int) -> str:
+    """生成结果标题"""
+    return f"{query}: {' '.join(rng.sample(_WORDS, 3))} ({index})"
+
+
+class StubServers:
+    """运行全部上游替身的HTTP服务"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 config: Optional[Dict[str, Dict[str, Any]]] = None,
+                 latency_scale: float = 1.0, error_rate: Optional[float] = None, seed: int = 0):
+        """
+        初始化替身服务
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示随机分配
+            config: 覆盖DEFAULT_CONFIG的上游配置（按上游名称合并）
+            latency_scale: 所有延迟的倍数，0表示不注入延迟
+            error_rate: 覆盖所有上游的错误率
+            seed: 延迟和错误注入的随机种子
+        """
+        self.config = copy.deepcopy(DEFAULT_CONFIG)
+        for name, overrides in (config or {}).items():
+            self.config.setdefault(name, {}).update(overrides)
+        if error_rate is not None:
+            for upstream in self.config.values():
+                upstream["error_rate"] = error_rate
+        self.latency_scale = latency_scale
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {name: {"requests": 0, "errors": 0} for name in self.config}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """指向替身服务的上游地址环境变量"""
+        return {
+            "ARXIV_API_URL": f"{self.base_url}/arxiv/api/query",
+            "WIKIPEDIA_API_URL": f"{self.base_url}/wikipedia/w/api.php",
+            "WIKIPEDIA_ZH_API_URL": f"{self.base_url}/wikipedia/w/api.php",
+            "SERPAPI_URL": f"{self.base_url}/serpapi/search",
+            "GEMINI_API_BASE": f"{self.base_url}/gemini",
+        }
+
+    def start(self) -> "StubServers":
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-servers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务（未启动时只关闭监听端口，例如只用于生成响应内容时）"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServers":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _inject(self, upstream: str) -> Optional[int]:
+        """按配置等待一段延迟，并决定是否返回错误（返回错误状态码或None）"""
+        config = self.config[upstream]
+        with self._rng_lock:
+            delay = sample_latency(config.get("latency", {}), self._rng) * self.latency_scale
+            failed = self._rng.random() < config.get("error_rate", 0.0)
+            self.stats[upstream]["requests"] += 1
+            if failed:
+                self.stats[upstream]["errors"] += 1
+        if delay > 0:
+            time.sleep(delay)
+        return config.get("error_status", 503) if failed else None
+
+    # ---- 响应生成 ----
+
+    def arxiv_feed(self, query: str, max_results: int) -> Tuple[str, bytes]:
+        """arXiv Atom feed"""
+        config = self.config["arxiv"]
+        rng = _seeded("arxiv", query)
+        count = min(max_results, config["results"])
+        entries = []
+        for i in range(count):
+            arxiv_id = f"{rng.randint(1500, 2512)}.{rng.randint(10000, 99999)}"
+            authors = "".join(f"<author><name>Author {rng.randint(1, 999)}</name></author>" for _ in range(3))
+            entries.append(
+                f"<entry><id>http://arxiv.org/abs/{arxiv_id}v1</id>"
+                f"<published>20{rng.randint(15, 25):02d}-{rng.randint(1, 12):02d}-01T00:00:00Z</published>"
+                f"<title>{escape(_title(rng, query, i))}</title>"
+                f"<summary>{escape(_text(rng, query, config['text_chars']))}</summary>{authors}"
+                f"<link href=\"http://arxiv.org/abs/{arxiv_id}v1\" rel=\"alternate\" type=\"text/html\"/>"
+                f"<link title=\"pdf\" href=\"http://arxiv.org/pdf/{arxiv_id}v1\" rel=\"related\" type=\"application/pdf\"/>"
+                f"<arxiv:primary_category term=\"cs.CL\"/><category term=\"cs.CL\"/></entry>"
+            )
+        feed = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom" '
+            'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            f'<title>arXiv Query: {escape(query)}</title>'
+            f'<opensearch:totalResults>{count}</opensearch:totalResults>' + "".join(entries) + '</feed>'
+        )
+        return "application/atom+xml; charset=utf-8", feed.encode("utf-8")
+
+    def mediawiki(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """MediaWiki api.php：搜索或获取页面摘要"""
+        config = self.config["wikipedia"]
+        if params.get("list") == "search":
+            query = params.get("srsearch", "")
+            rng = _seeded("wikipedia", query)
+            limit = min(int(params.get("srlimit", 10)), config["results"])
+            results = []
+            for i in range(limit):
+                snippet = _text(rng, query, min(config["text_chars"], 300))
+                results.append({
+                    "ns": 0,
+                    "title": _title(rng, query, i),
+                    "pageid": int(hashlib.sha256(f"{query}:{i}".encode("utf-8")).hexdigest()[:8], 16),
+                    "size": rng.randint(2000, 200000),
+                    "wordcount": rng.randint(200, 20000),
+                    "snippet": f'<span class="searchmatch">{escape(query)}</span> {escape(snippet)}',
+                    "timestamp": f"20{rng.randint(15, 25):02d}-{rng.randint(1, 12):02d}-01T00:00:00Z"
+                })
+            return {"batchcomplete": "", "query": {"searchinfo": {"totalhits": limit}, "search": results}}
+        if params.get("prop") == "extracts":
+            page_id = params.get("pageids", "0")
+            rng = _seeded("wikipedia-page", page_id)
+            return {"batchcomplete": "", "query": {"pages": {page_id: {
+                "pageid": int(page_id) if page_id.isdigit() else 0,
+                "ns": 0,
+                "title": f"Page {page_id}",
+                "extract": _text(rng, f"Page {page_id}", config["text_chars"])
+            }}}}
+        return {"error": {"code": "badvalue", "info": "unsupported stub request"}}
+
+    def google_scholar(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """SerpAPI engine=google_scholar"""
+        config = self.config["serpapi"]
+        query = params.get("q", "")
+        rng = _seeded("serpapi", query)
+        count = min(int(params.get("num", 10)), config["results"])
+        results = []
+        for i in range(count):
+            results.append({
+                "position": i,
+                "title": _title(rng, query, i),
+                "result_id": hashlib.sha256(f"{query}:{i}".encode("utf-8")).hexdigest()[:12],
+                "link": f"https://example.org/paper/{rng.randint(1, 10**6)}",
+                "snippet": _text(rng, query, config["text_chars"]),
+                "publication_info": {
+                    "summary": f"A Author, B Author - Journal of Stubs, 20{rng.randint(15, 25):02d}",
+                    "authors": [{"name": f"Author {rng.randint(1, 999)}"} for _ in range(2)]
+                },
+                "inline_links": {"cited_by": {"total": rng.randint(0, 5000)}}
+            })
+        return {"search_metadata": {"status": "Success"}, "organic_results": results}
+
+    def gemini(self, model: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Gemini generateContent"""
+        config = self.config["gemini"]
+        prompt = "".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        rng = _seeded("gemini", model, prompt)
+        declarations = [
+            declaration for tool in body.get("tools") or [] for declaration in tool.get("functionDeclarations") or []
+        ]
+        answered = any(
+            "functionResponse" in part for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        if declarations and not answered:
+            # 工具调用型Agent：第一轮调用一个搜索工具，拿到工具结果后再给出回答
+            declaration = next((d for d in declarations if "arxiv" in d.get("name", "").lower()), declarations[0])
+            properties = list((declaration.get("parameters") or {}).get("properties") or {"query": {}})
+            texts = [part.get("text", "") for content in body.get("contents", [])
+                     for part in content.get("parts", []) if part.get("text")]
+            part = {"functionCall": {"name": declaration["name"], "args": {properties[0]: texts[-1] if texts else ""}}}
+            return self._gemini_response(model, prompt, part, "")
+        if any("googleSearch" in tool or "google_search" in tool for tool in body.get("tools") or []):
+            # Google搜索工具：返回总结和搜索来源（grounding metadata）
+            text = _text(rng, "搜索", config["text_chars"])
+            response = self._gemini_response(model, prompt, {"text": text}, text)
+            response["candidates"][0]["groundingMetadata"] = {
+                "webSearchQueries": [prompt],
+                "groundingChunks": [
+                    {"web": {"uri": f"https://example.org/news/{rng.randint(1, 10**6)}", "title": f"example.org {i}"}}
+                    for i in range(1, 4)
+                ]
+            }
+            return response
+        if "recommended_sources" in prompt:
+            question = re.search(r'问题：(.+)', prompt)
+            query = question.group(1).strip() if question else "query"
+            text = json.dumps({
+                "query_type": "学术",
+                "recommended_sources": ["arxiv", "wikipedia"],
+                "search_keywords": [query, f"{query} survey"],
+                "reasoning": "stub analysis"
+            }, ensure_ascii=False)
+        elif '"coverage"' in prompt:
+            # 反思节点：覆盖度足够，不再继续搜索
+            text = json.dumps({"coverage": 0.9, "gaps": []})
+        else:
+            text = _text(rng, "总结", config["text_chars"])
+        return self._gemini_response(model, prompt, {"text": text}, text)
+
+    @staticmethod
+    def _gemini_response(model: str, prompt: str, part: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """组装generateContent响应（token数按字符数粗略估算）"""
+        prompt_tokens = max(len(prompt) // 4, 1)
+        output_tokens = max(len(text) // 4, 1)
+        return {
+            "candidates": [{
+                "content": {"parts": [part], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0
+            }],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens
+            },
+            "modelVersion": model
+        }
+
+    def _handler_class(self):
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_json(self, status: int, payload: Dict[str, Any]):
+                self._send(status, "application/json; charset=utf-8",
+                           json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+            def _error(self, status: int):
+                self._send_json(status, {"error": {"code": status, "message": "injected stub error"}})
+
+            def do_HEAD(self):
+                # 连接预热使用HEAD请求
+                self._send(200, "text/plain", b"")
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+                if parts.path == "/arxiv/api/query":
+                    upstream = "arxiv"
+                elif parts.path == "/wikipedia/w/api.php":
+                    upstream = "wikipedia"
+                elif parts.path == "/serpapi/search":
+                    upstream = "serpapi"
+                else:
+                    self._send_json(404, {"error": {"code": 404, "message": f"not found: {self.path}"}})
+                    return
+
+                status = stubs._inject(upstream)
+                if status:
+                    self._error(status)
+                elif upstream == "arxiv":
+                    query = re.sub(r'^all:', '', params.get("search_query", ""))
+                    self._send(200, *stubs.arxiv_feed(query, int(params.get("max_results", 10))))
+                elif upstream == "wikipedia":
+                    self._send_json(200, stubs.mediawiki(params))
+                else:
+                    self._send_json(200, stubs.google_scholar(params))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b"{}"
+                parts = urlsplit(self.path)
+                match = _GEMINI_PATH.match(parts.path)
+                if not match:
+                    self._send_json(404, {"error": {"code": 404, "message": f"not found: {self.path}"}})
+                    return
+                status = stubs._inject("gemini")
+                if status:
+                    self._error(status)
+                    return
+                response = stubs.gemini(match.group(1), json.loads(raw or b"{}"))
+                if match.group(2) == "generateContent":
+                    self._send_json(200, response)
+                elif "alt=sse" in parts.query:
+                    self._send(200, "text/event-stream",
+                               f"data: {json.dumps(response, ensure_ascii=False)}\r\n\r\n".encode("utf-8"))
+                else:
+                    # 非SSE的流式接口返回响应块组成的JSON数组，整个回答作为一个块
+                    self._send(200, "application/json; charset=utf-8",
+                               json.dumps([response], ensure_ascii=False).encode("utf-8"))
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """启动替身服务并打印环境变量"""
+    parser = argparse.ArgumentParser(description="本地上游替身服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--config", help="上游配置JSON文件（格式同DEFAULT_CONFIG，按上游合并）")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="延迟倍数，0表示不注入延迟")
+    parser.add_argument("--error-rate", type=float, help="覆盖所有上游的错误率")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+    stubs = StubServers(args.host, args.port, config, args.latency_scale, args.error_rate, args.seed).start()
+    print(f"替身服务已启动: {stubs.base_url}")
+    for name, value in stubs.env().items():
+        print(f"export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stubs.stop()
+        print(json.dumps(stubs.stats, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,51 +8,55 @@ import os
 import json
 import logging
 import urllib.parse
-import urllib.request
 import xml.etree.ElementTree as ET
 import re
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
-import requests
 from dotenv import load_dotenv
 from google import genai
 
-# 导入已有的API测试类
-from test_arxiv_api import ArxivAPITester
-from test_wikipedia_api import WikipediaAPITester
-from test_google_scholar_api import GoogleScholarAPITester
-from test_gemini_api import GeminiAPITester
+from backend.src.agent.debug import DebugInfo
+from backend.src.agent.local_index import LocalIndex
+from backend.src.agent.vector_index import VectorIndex
+from backend.src.agent.result_store import ResultStore
+from backend.src.agent import cassette, dedup, endpoints, http_client, ranking, tracing, usage
+from backend.src.agent.tools.wikipedia_tool import strip_snippet_html
 
 # 加载环境变量
 load_dotenv()
 
-# 配置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 日志由入口（命令行脚本、API服务）配置，导入本模块不会改动根logger
 logger = logging.getLogger(__name__)
 
-class DebugInfo:
-    """DEBUG信息收集器"""
-    def __init__(self):
-        self.logs = []
-    
-    def add_log(self, stage: str, data: Dict[str, Any]):
-        """添加DEBUG日志"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "stage": stage,
-            "data": data
-        }
-        self.logs.append(log_entry)
-        logger.debug(json.dumps(log_entry, ensure_ascii=False, indent=2))
-    
-    def get_logs(self) -> List[Dict[str, Any]]:
-        """获取所有日志"""
-        return self.logs
+# 默认搜索策略使用的搜索源（同时作为推测执行时预先启动的搜索源）
+DEFAULT_SOURCES = ["arxiv", "wikipedia"]
+
+# search()未指定speculative时是否默认推测执行（SPECULATIVE_SEARCH=1开启）
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "0").lower() in ("1", "true", "yes")
+
+# 每个搜索源最多执行的关键词子查询数量
+MAX_KEYWORDS = 4
+
+# 所有子查询共享的并发上限
+MAX_CONCURRENT_REQUESTS = 6
+
+# 收集到足够多的去重结果后提前停止
+TARGET_RESULTS = 20
+
+# 打包进汇总提示的结果数量上限和估算token预算（经MMR多样化选择）
+CONTEXT_MAX_RESULTS = 10
+CONTEXT_TOKEN_BUDGET = 4000
+
+# 本地全文索引搜索源：始终参与并行搜索，上游不可达时仍可返回结果
+LOCAL_SOURCE = "local"
+
+# 本地向量索引搜索源：按语义相似度检索之前获取过的文档（可匹配改写的说法）
+SEMANTIC_SOURCE = "semantic"
+
+# 本地索引搜索源（不写回索引）
+LOCAL_SOURCES = [LOCAL_SOURCE, SEMANTIC_SOURCE]
 
 class GeminiAPI:
     """Gemini API调用器"""
@@ -67,7 +71,7 @@ class GeminiAPI:
 
         # 初始化Gemini客户端
         try:
-            self.client = genai.Client(api_key=self.api_key)
+            self.client = genai.Client(api_key=self.api_key, http_options=endpoints.gemini_http_options())
             self.import_error = None
         except Exception as e:
             logger.error(f"Gemini客户端初始化失败: {e}")
@@ -75,7 +79,17 @@ class GeminiAPI:
             self.import_error = str(e)
     
     def call(self, prompt: str, model_name: str = "gemini-2.0-flash-001") -> str:
-        """调用Gemini API"""
+        """调用Gemini API（启用cassette时按模型和提示录制/回放）"""
+        if not self.client and not cassette.is_replaying():
+            return f"调用失败: Gemini API未初始化 - {self.import_error}"
+        try:
+            return cassette.call("gemini.generate_content", (model_name, prompt),
+                                 lambda: self._generate(prompt, model_name))
+        except cassette.CassetteMiss as e:
+            return f"调用失败: {str(e)}"
+    
+    def _generate(self, prompt: str, model_name: str) -> str:
+        """调用Gemini生成内容"""
         if not self.client:
             return f"调用失败: Gemini API未初始化 - {self.import_error}"
         
@@ -85,6 +99,8 @@ class GeminiAPI:
                 model=model_name,
                 contents=prompt
             )
+            # 记录token用量（归属于调用方设置的处理阶段）
+            usage.record_gemini(model_name, response)
             
             # 从响应中提取文本
             if response and response.text:
@@ -100,20 +116,26 @@ class SearchAPIs:
     """搜索API集合"""
     def __init__(self, debug_info: DebugInfo):
         self.debug_info = debug_info
-        self.arxiv = ArxivAPITester()
-        self.wikipedia = WikipediaAPITester()
-        self.google_scholar = GoogleScholarAPITester()
+        
+        # 上游地址可通过环境变量覆盖（例如指向本地替身服务）
+        self.arxiv_url = endpoints.arxiv_api_url()
+        self.wikipedia_url = endpoints.wikipedia_zh_api_url()
+        self.serpapi_url = endpoints.serpapi_url()
+        # 未设置SERP API密钥时仅Google Scholar不可用（回放cassette时不需要真实密钥）
+        self.serp_api_key = os.getenv("SERP_API_KEY") or (cassette.PLACEHOLDER_KEY if cassette.is_replaying() else None)
     
-    def search_arxiv(self, query: str) -> Dict[str, Any]:
+    def search_arxiv(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
         """搜索arXiv论文"""
-        self.debug_info.add_log("arxiv_search_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("arxiv_search_start", {"query": query})
         try:
             # 构建查询
             encoded_query = urllib.parse.quote(query)
-            url = f'{self.arxiv.base_url}?search_query=all:{encoded_query}&start=0&max_results=5'
+            url = f'{self.arxiv_url}?search_query=all:{encoded_query}&start=0&max_results=5'
             
-            with urllib.request.urlopen(url, timeout=20) as response:
-                data = response.read().decode('utf-8')
+            response = http_client.get(url, timeout=20)
+            response.raise_for_status()
+            data = response.content
             
             root = ET.fromstring(data)
             namespaces = {
@@ -144,7 +166,7 @@ class SearchAPIs:
                     "link": f"https://arxiv.org/abs/{arxiv_id}"
                 })
             
-            self.debug_info.add_log("arxiv_search_complete", {
+            debug_info.add_log("arxiv_search_complete", {
                 "query": query,
                 "results_count": len(results)
             })
@@ -153,12 +175,13 @@ class SearchAPIs:
             
         except Exception as e:
             error_msg = f"arXiv搜索失败: {str(e)}"
-            self.debug_info.add_log("arxiv_search_error", {"error": str(e)})
+            debug_info.add_log("arxiv_search_error", {"error": str(e)})
             return {"status": "error", "error": error_msg}
     
-    def search_wikipedia(self, query: str) -> Dict[str, Any]:
+    def search_wikipedia(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
         """搜索Wikipedia"""
-        self.debug_info.add_log("wikipedia_search_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("wikipedia_search_start", {"query": query})
         try:
             params = {
                 'action': 'query',
@@ -169,8 +192,8 @@ class SearchAPIs:
                 'srprop': 'snippet|titlesnippet|size|wordcount|timestamp'
             }
             
-            response = self.wikipedia.session.get(
-                self.wikipedia.base_url, 
+            response = http_client.get(
+                self.wikipedia_url,
                 params=params, 
                 timeout=10
             )
@@ -183,14 +206,14 @@ class SearchAPIs:
                 for item in data['query']['search']:
                     results.append({
                         "title": item.get('title', ''),
-                        "snippet": item.get('snippet', '').replace('<span class="searchmatch">', '').replace('</span>', ''),
+                        "snippet": strip_snippet_html(item.get('snippet', '')),
                         "size": item.get('size', 0),
                         "wordcount": item.get('wordcount', 0),
                         "timestamp": item.get('timestamp', ''),
                         "link": f"https://zh.wikipedia.org/wiki/{urllib.parse.quote(item.get('title', ''))}"
                     })
             
-            self.debug_info.add_log("wikipedia_search_complete", {
+            debug_info.add_log("wikipedia_search_complete", {
                 "query": query,
                 "results_count": len(results)
             })
@@ -199,21 +222,25 @@ class SearchAPIs:
             
         except Exception as e:
             error_msg = f"Wikipedia搜索失败: {str(e)}"
-            self.debug_info.add_log("wikipedia_search_error", {"error": str(e)})
+            debug_info.add_log("wikipedia_search_error", {"error": str(e)})
             return {"status": "error", "error": error_msg}
     
-    def search_google_scholar(self, query: str) -> Dict[str, Any]:
+    def search_google_scholar(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
         """搜索Google Scholar"""
-        self.debug_info.add_log("google_scholar_search_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("google_scholar_search_start", {"query": query})
         try:
-            if not hasattr(self.google_scholar, 'api_key') or not self.google_scholar.api_key:
+            if not self.serp_api_key:
                 return {"status": "error", "error": "Google Scholar API密钥未设置"}
             
-            params = self.google_scholar.params.copy()
-            params["q"] = query
+            params = {
+                "api_key": self.serp_api_key,
+                "engine": "google_scholar",
+                "q": query
+            }
             
-            response = requests.get(
-                self.google_scholar.api_base,
+            response = http_client.get(
+                self.serpapi_url,
                 params=params,
                 timeout=20
             )
@@ -232,7 +259,7 @@ class SearchAPIs:
                     "authors": [author.get("name", "") for author in item.get("publication_info", {}).get("authors", [])][:3]
                 })
             
-            self.debug_info.add_log("google_scholar_search_complete", {
+            debug_info.add_log("google_scholar_search_complete", {
                 "query": query,
                 "results_count": len(results)
             })
@@ -241,20 +268,49 @@ class SearchAPIs:
             
         except Exception as e:
             error_msg = f"Google Scholar搜索失败: {str(e)}"
-            self.debug_info.add_log("google_scholar_search_error", {"error": str(e)})
+            debug_info.add_log("google_scholar_search_error", {"error": str(e)})
             return {"status": "error", "error": error_msg}
 
 class IntelligentSearchAgent:
     """智能搜索Agent主类"""
     
-    def __init__(self, google_api_key: Optional[str] = None):
+    def __init__(self, google_api_key: Optional[str] = None,
+                 local_index: Optional[LocalIndex] = None,
+                 vector_index: Optional[VectorIndex] = None,
+                 context_max_results: Optional[int] = CONTEXT_MAX_RESULTS,
+                 context_token_budget: Optional[int] = CONTEXT_TOKEN_BUDGET):
+        """
+        初始化智能搜索Agent
+        
+        Args:
+            google_api_key: Google API密钥
+            local_index: 本地全文索引，为空时打开默认路径的索引
+            vector_index: 本地向量索引，为空时打开默认目录的索引
+            context_max_results: 打包进汇总提示的结果数量上限，为空时不限
+            context_token_budget: 打包进汇总提示的估算token预算，为空时不限
+        """
+        # 单独调用各阶段方法且未传入debug_info时使用的默认收集器（有界）
         self.debug_info = DebugInfo()
         self.gemini_api = GeminiAPI(api_key=google_api_key)
         self.search_apis = SearchAPIs(self.debug_info)
+        self.local_index = local_index if local_index is not None else LocalIndex()
+        self.vector_index = vector_index if vector_index is not None else VectorIndex()
+        self.context_max_results = context_max_results
+        self.context_token_budget = context_token_budget
+        
+        # 搜索源名称到搜索方法的映射
+        self.source_funcs = {
+            "arxiv": self.search_apis.search_arxiv,
+            "wikipedia": self.search_apis.search_wikipedia,
+            "google_scholar": self.search_apis.search_google_scholar,
+            LOCAL_SOURCE: self.search_local,
+            SEMANTIC_SOURCE: self.search_semantic
+        }
     
-    def analyze_query(self, query: str) -> Dict[str, Any]:
+    def analyze_query(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
         """分析查询意图，决定使用哪些搜索源"""
-        self.debug_info.add_log("query_analysis_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("query_analysis_start", {"query": query})
         
         # 使用Gemini分析问题
         analysis_prompt = f"""
@@ -279,7 +335,8 @@ class IntelligentSearchAgent:
         """
         
         try:
-            response = self.gemini_api.call(analysis_prompt)
+            with tracing.span("analyze_query"), usage.stage("analyze_query"):
+                response = self.gemini_api.call(analysis_prompt)
             # 尝试解析JSON
             json_match = re.search(r'\{[\s\S]*\}', response)
             if json_match:
@@ -288,79 +345,369 @@ class IntelligentSearchAgent:
                 # 如果解析失败，使用默认策略
                 analysis_result = {
                     "query_type": "混合",
-                    "recommended_sources": ["arxiv", "wikipedia"],
+                    "recommended_sources": list(DEFAULT_SOURCES),
                     "search_keywords": [query],
                     "reasoning": "默认搜索策略"
                 }
             
-            self.debug_info.add_log("query_analysis_complete", analysis_result)
+            debug_info.add_log("query_analysis_complete", analysis_result)
             return analysis_result
             
         except Exception as e:
             logger.error(f"查询分析失败: {e}")
-            self.debug_info.add_log("query_analysis_error", {"error": str(e)})
+            debug_info.add_log("query_analysis_error", {"error": str(e)})
             return {
                 "query_type": "混合",
-                "recommended_sources": ["arxiv", "wikipedia"],
+                "recommended_sources": list(DEFAULT_SOURCES),
                 "search_keywords": [query],
                 "reasoning": "分析失败，使用默认策略"
             }
     
-    def parallel_search(self, query: str, sources: List[str]) -> Dict[str, Any]:
-        """并行搜索多个数据源"""
-        self.debug_info.add_log("parallel_search_start", {
-            "query": query,
-            "sources": sources
+    def search_local(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
+        """从本地全文索引检索之前获取过的文档"""
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        try:
+            results = self.local_index.search(query)
+            debug_info.add_log("local_search_success", {"query": query, "results_count": len(results)})
+            return {"status": "success", "results": results}
+        except Exception as e:
+            error_msg = f"本地索引搜索失败: {str(e)}"
+            logger.error(error_msg)
+            debug_info.add_log("local_search_error", {"error": str(e)})
+            return {"status": "error", "error": error_msg}
+    
+    def search_semantic(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
+        """从本地向量索引按语义相似度检索之前获取过的文档"""
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        try:
+            results = self.vector_index.search(query)
+            debug_info.add_log("semantic_search_success", {"query": query, "results_count": len(results)})
+            return {"status": "success", "results": results}
+        except Exception as e:
+            error_msg = f"向量索引搜索失败: {str(e)}"
+            logger.error(error_msg)
+            debug_info.add_log("semantic_search_error", {"error": str(e)})
+            return {"status": "error", "error": error_msg}
+    
+    def index_results(self, source: str, result: Dict[str, Any]):
+        """将上游搜索源成功返回的文档写入本地索引（写入失败不影响搜索）"""
+        if source in LOCAL_SOURCES or result.get("status") != "success":
+            return
+        for index in (self.local_index, self.vector_index):
+            try:
+                index.add_documents(source, result.get("results", []))
+            except Exception as e:
+                logger.error(f"写入本地索引{type(index).__name__}失败: {e}")
+    
+    def rank_results(self, query: str, search_results: Dict[str, Any],
+                     debug_info: Optional[DebugInfo] = None) -> List[Dict[str, Any]]:
+        """将各搜索源的结果融合为一个全局排序列表（RRF + 相似度/时效性/引用数/篇幅特征）"""
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        with tracing.span("rank_results") as span:
+            ranked = ranking.fuse(search_results, query)
+            span.set(candidates=len(ranked))
+        debug_info.add_log("ranking_complete", {
+            "candidates": len(ranked),
+            "top": [item.get("title") for item in ranked[:5]]
+        })
+        return ranked
+    
+    def pack_results(self, ranked_results: List[Dict[str, Any]],
+                     debug_info: Optional[DebugInfo] = None) -> List[Dict[str, Any]]:
+        """用MMR从全局排序结果中选出多样化的子集，受结果数量和token预算限制"""
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        with tracing.span("pack_results") as span:
+            packed = ranking.diversify(ranked_results, self.context_max_results, self.context_token_budget)
+            span.set(candidates=len(ranked_results), selected=len(packed))
+        debug_info.add_log("context_packing", {
+            "candidates": len(ranked_results),
+            "selected": len(packed),
+            "estimated_tokens_before": sum(ranking.estimate_tokens(item) for item in ranked_results),
+            "estimated_tokens_after": sum(ranking.estimate_tokens(item) for item in packed)
         })
+        return packed
+    
+    @staticmethod
+    def with_local(sources: List[str]) -> List[str]:
+        """在搜索源列表中加入本地索引"""
+        return list(sources) + [source for source in LOCAL_SOURCES if source not in sources]
+    
+    def plan_keywords(self, query: str, keywords: Optional[List[str]] = None) -> List[str]:
+        """整理分析得到的搜索关键词：去重、去空，并限制子查询数量"""
+        planned = []
+        for keyword in keywords or []:
+            if not isinstance(keyword, str):
+                continue
+            keyword = keyword.strip()
+            if keyword and keyword not in planned:
+                planned.append(keyword)
+        return planned[:MAX_KEYWORDS] or [query]
+    
+    def parallel_search(self, query: str, sources: List[str],
+                        keywords: Optional[List[str]] = None,
+                        target_results: int = TARGET_RESULTS,
+                        debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
+        """
+        并行搜索多个数据源
+        
+        每个搜索源针对每个关键词各执行一次子查询，所有子查询共享同一个并发上限。
+        本地索引始终参与搜索。收集到足够多的去重结果后提前停止，尚未开始的子查询会被取消。
         
-        search_results = {}
+        Args:
+            query: 用户查询
+            sources: 搜索源列表
+            keywords: 分析得到的搜索关键词，为空时使用原始查询
+            target_results: 提前停止所需的去重结果数量
+            debug_info: 当前请求的DEBUG信息收集器，为空时使用Agent默认的收集器
+        """
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        sources = self.with_local(sources)
+        keywords = self.plan_keywords(query, keywords)
+        debug_info.add_log("parallel_search_start", {
+            "query": query,
+            "sources": sources,
+            "keywords": keywords
+        })
         
         # 使用线程池并行搜索
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_source = {}
+        executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
+        try:
+            future_to_job = {}
             
             for source in sources:
-                if source == "arxiv":
-                    future = executor.submit(self.search_apis.search_arxiv, query)
-                    future_to_source[future] = "arxiv"
-                elif source == "wikipedia":
-                    future = executor.submit(self.search_apis.search_wikipedia, query)
-                    future_to_source[future] = "wikipedia"
-                elif source == "google_scholar":
-                    future = executor.submit(self.search_apis.search_google_scholar, query)
-                    future_to_source[future] = "google_scholar"
-            
-            # 收集结果
-            for future in as_completed(future_to_source):
-                source = future_to_source[future]
-                try:
-                    result = future.result()
-                    search_results[source] = result
-                except Exception as e:
-                    search_results[source] = {"status": "error", "error": str(e)}
+                if source not in self.source_funcs:
+                    continue
+                for keyword in keywords:
+                    future = tracing.submit(executor, self._run_source, source, keyword, debug_info)
+                    future_to_job[future] = (source, keyword)
+            
+            search_results = self._collect_results(future_to_job, target_results, debug_info)
+        finally:
+            # 提前停止后不等待仍在执行的子查询
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        self.debug_info.add_log("parallel_search_complete", {
+        debug_info.add_log("parallel_search_complete", {
             "sources_searched": list(search_results.keys()),
-            "success_count": sum(1 for r in search_results.values() if r.get("status") == "success")
+            "success_count": sum(1 for r in search_results.values() if r.get("status") == "success"),
+            "total_results": sum(len(r.get("results", [])) for r in search_results.values())
         })
         
         return search_results
     
-    def summarize_results(self, query: str, search_results: Dict[str, Any]) -> str:
-        """使用Gemini汇总搜索结果"""
-        self.debug_info.add_log("summarization_start", {
+    def speculative_search(self, query: str,
+                           speculative_sources: Optional[List[str]] = None,
+                           target_results: int = TARGET_RESULTS,
+                           debug_info: Optional[DebugInfo] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        推测执行搜索：在查询分析进行的同时，使用原始查询预先启动最可能用到的搜索源
+        
+        分析结果返回后，取消（或忽略）不需要的搜索源，并为推荐的搜索源补充启动
+        关键词子查询。
+        
+        Args:
+            query: 用户查询
+            speculative_sources: 预先启动的搜索源，默认为DEFAULT_SOURCES
+            target_results: 提前停止所需的去重结果数量
+            debug_info: 当前请求的DEBUG信息收集器，为空时使用Agent默认的收集器
+            
+        Returns:
+            (查询分析结果, 搜索结果)
+        """
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        speculative_sources = [
+            source for source in self.with_local(speculative_sources or DEFAULT_SOURCES)
+            if source in self.source_funcs
+        ]
+        debug_info.add_log("speculative_search_start", {
+            "query": query,
+            "speculative_sources": speculative_sources
+        })
+        
+        # 分析任务单独占用一个线程，子查询共享并发上限
+        executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS + 1)
+        try:
+            analysis_future = tracing.submit(executor, self.analyze_query, query, debug_info)
+            future_to_job = {
+                tracing.submit(executor, self._run_source, source, query, debug_info): (source, query)
+                for source in speculative_sources
+            }
+            
+            analysis = analysis_future.result()
+            recommended = [
+                source for source in self.with_local(analysis.get("recommended_sources", DEFAULT_SOURCES))
+                if source in self.source_funcs
+            ]
+            keywords = self.plan_keywords(query, analysis.get("search_keywords"))
+            
+            # 取消不需要的搜索源；已经开始执行的无法取消，直接忽略其结果
+            dropped = []
+            for future, (source, _) in list(future_to_job.items()):
+                if source not in recommended:
+                    future.cancel()
+                    del future_to_job[future]
+                    dropped.append(source)
+            
+            # 为推荐的搜索源补充启动尚未执行的关键词子查询
+            launched = set(future_to_job.values())
+            added = []
+            for source in recommended:
+                for keyword in keywords:
+                    if (source, keyword) not in launched:
+                        future = tracing.submit(executor, self._run_source, source, keyword, debug_info)
+                        future_to_job[future] = (source, keyword)
+                        added.append([source, keyword])
+            
+            debug_info.add_log("speculative_search_plan", {
+                "recommended_sources": recommended,
+                "keywords": keywords,
+                "kept": sorted(source for source, _ in launched),
+                "dropped": dropped,
+                "added": added
+            })
+            
+            search_results = self._collect_results(future_to_job, target_results, debug_info)
+        finally:
+            # 不等待被忽略的搜索源完成
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        debug_info.add_log("speculative_search_complete", {
+            "sources_searched": list(search_results.keys()),
+            "success_count": sum(1 for r in search_results.values() if r.get("status") == "success"),
+            "total_results": sum(len(r.get("results", [])) for r in search_results.values())
+        })
+        
+        return analysis, search_results
+    
+    def _run_source(self, source: str, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
+        """执行单个搜索源的一次子查询"""
+        with tracing.span(f"source:{source}", query=query) as span:
+            result = self.source_funcs[source](query, debug_info)
+            span.set(status=result.get("status"), results=len(result.get("results", [])))
+            return result
+    
+    def _collect_results(self, future_to_job: Dict[Future, Tuple[str, str]],
+                         target_results: int = TARGET_RESULTS,
+                         debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
+        """
+        收集子查询结果，按搜索源合并，最后跨搜索源合并重复的实体
+        
+        同一搜索源内重复的结果直接丢弃；不同搜索源的重复结果保留到收集结束后
+        由实体解析合并元数据。去重结果数量达到target_results后取消其余尚未开始的子查询。
+        """
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        merged = {}
+        errors = {}
+        seen = set()
+        seen_by_source = {}
+        unique_count = 0
+        
+        for future in as_completed(future_to_job):
+            source, keyword = future_to_job[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            
+            if result.get("status") != "success":
+                errors.setdefault(source, result.get("error", "未知错误"))
+                continue
+            
+            entry = merged.setdefault(source, {"status": "success", "results": [], "queries": []})
+            entry["queries"].append(keyword)
+            source_seen = seen_by_source.setdefault(source, set())
+            for item in result.get("results", []):
+                key = self._result_key(item)
+                if key in source_seen:
+                    continue
+                source_seen.add(key)
+                entry["results"].append(item)
+                if key not in seen:
+                    seen.add(key)
+                    unique_count += 1
+            
+            if target_results and unique_count >= target_results:
+                cancelled = sum(1 for pending in future_to_job if pending.cancel())
+                debug_info.add_log("parallel_search_early_stop", {
+                    "unique_results": unique_count,
+                    "cancelled_queries": cancelled
+                })
+                break
+        
+        # 收集完成后再写入本地索引，避免本次请求的本地搜索源检索到刚取回的文档
+        for source, entry in merged.items():
+            self.index_results(source, entry)
+        
+        # 所有子查询都失败的搜索源返回错误信息
+        for source, error in errors.items():
+            if source not in merged:
+                merged[source] = {"status": "error", "error": error}
+        
+        # 按提交顺序排列搜索源，使结果顺序不受完成先后影响
+        order = []
+        for source, _ in future_to_job.values():
+            if source in merged and source not in order:
+                order.append(source)
+        search_results, stats = dedup.merge_duplicates({source: merged[source] for source in order})
+        debug_info.add_log("entity_resolution", stats)
+        return search_results
+    
+    @staticmethod
+    def _result_key(item: Dict[str, Any]) -> str:
+        """生成用于跨子查询去重和统计去重结果数量的结果键"""
+        title = re.sub(r'\s+', ' ', str(item.get("title", ""))).strip().lower()
+        return title or str(item.get("link", "")) or json.dumps(item, ensure_ascii=False, sort_keys=True)
+    
+    def summarize_results(self, query: str, search_results: Dict[str, Any],
+                          debug_info: Optional[DebugInfo] = None,
+                          ranked_results: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        使用Gemini汇总搜索结果
+        
+        Args:
+            query: 用户查询
+            search_results: 按搜索源分组的搜索结果
+            debug_info: 当前请求的DEBUG信息收集器
+            ranked_results: 全局排序（及多样化选择）后的结果，提供时按该顺序打包进提示（每条结果带source字段）
+        """
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("summarization_start", {
             "query": query,
             "sources_count": len(search_results)
         })
         
         # 准备搜索结果摘要
-        results_summary = {}
-        for source, data in search_results.items():
-            if data.get("status") == "success":
-                results_summary[source] = data.get("results", [])
+        if ranked_results is not None:
+            results_summary = [
+                {key: value for key, value in item.items() if key != "rank_score"}
+                for item in ranked_results
+            ]
+        else:
+            results_summary = {}
+            for source, data in search_results.items():
+                if data.get("status") == "success":
+                    results_summary[source] = data.get("results", [])
         
-        # 构建汇总提示
-        summary_prompt = f"""
+        summary_prompt = self.build_summary_prompt(query, results_summary)
+        
+        try:
+            # 对较长的内容使用Pro模型
+            model = "gemini-2.0-pro-001" if len(json.dumps(results_summary)) > 10000 else "gemini-2.0-flash-001"
+            with tracing.span("summarize_results", model=model), usage.stage("summarize_results"):
+                summary = self.gemini_api.call(summary_prompt, model)
+            debug_info.add_log("summarization_complete", {
+                "summary_length": len(summary),
+                "model_used": model
+            })
+            return summary
+        except Exception as e:
+            error_msg = f"汇总失败: {str(e)}"
+            debug_info.add_log("summarization_error", {"error": str(e)})
+            return error_msg
+    
+    @staticmethod
+    def build_summary_prompt(query: str, results_summary: Any) -> str:
+        """构建汇总提示（搜索结果以缩进的JSON嵌入）"""
+        return f"""
         基于以下搜索结果，请为用户问题提供一个全面、准确的回答。
 
         用户问题：{query}
@@ -377,37 +724,72 @@ class IntelligentSearchAgent:
 
         请用中文回答，确保准确性和可读性。
         """
+    
+    def search(self, query: str, speculative: Optional[bool] = None, debug: bool = False,
+               trace: Optional[str] = None, offline: bool = False) -> Dict[str, Any]:
+        """
+        执行智能搜索的主方法
         
-        try:
-            # 对较长的内容使用Pro模型
-            model = "gemini-2.0-pro-001" if len(json.dumps(results_summary)) > 10000 else "gemini-2.0-flash-001"
-            summary = self.gemini_api.call(summary_prompt, model)
-            self.debug_info.add_log("summarization_complete", {
-                "summary_length": len(summary),
-                "model_used": model
-            })
-            return summary
-        except Exception as e:
-            error_msg = f"汇总失败: {str(e)}"
-            self.debug_info.add_log("summarization_error", {"error": str(e)})
-            return error_msg
+        Args:
+            query: 用户查询
+            speculative: 是否在查询分析的同时推测执行搜索，默认取SPECULATIVE_SEARCH
+            debug: 是否在响应中返回本次请求的DEBUG日志
+            trace: 返回各阶段耗时追踪的格式（"tree"或"chrome"），为空时不追踪
+            offline: 离线模式，跳过查询分析和上游搜索源，只从本地索引检索
+            
+        Returns:
+            搜索响应，其中usage为按阶段/模型汇总的LLM用量和费用
+        """
+        if speculative is None:
+            speculative = SPECULATIVE_SEARCH
+        with usage.track() as tracker:
+            if trace:
+                with tracing.trace() as tracer:
+                    response = self._search(query, speculative, debug, offline)
+                response["trace"] = tracer.export(trace)
+            else:
+                response = self._search(query, speculative, debug, offline)
+        response["usage"] = tracker.summary()
+        return response
     
-    def search(self, query: str) -> Dict[str, Any]:
-        """执行智能搜索的主方法"""
-        self.debug_info.add_log("search_start", {"query": query})
+    def _search(self, query: str, speculative: bool, debug: bool, offline: bool = False) -> Dict[str, Any]:
+        """执行一次完整的搜索流程"""
+        # 每次请求使用独立的DEBUG信息收集器
+        debug_info = DebugInfo()
+        debug_info.add_log("search_start", {"query": query, "speculative": speculative, "offline": offline})
         
         try:
-            # 1. 分析查询
-            analysis = self.analyze_query(query)
-            
-            # 2. 并行搜索
-            search_results = self.parallel_search(
-                query, 
-                analysis.get("recommended_sources", ["arxiv", "wikipedia"])
-            )
+            with tracing.span("search", query=query, speculative=speculative, offline=offline):
+                if offline:
+                    # 1+2. 离线模式：只检索本地索引
+                    analysis = {
+                        "query_type": "离线",
+                        "recommended_sources": list(LOCAL_SOURCES),
+                        "search_keywords": [query],
+                        "reasoning": "离线模式，仅使用本地索引"
+                    }
+                    search_results = self.parallel_search(query, LOCAL_SOURCES, debug_info=debug_info)
+                elif speculative:
+                    # 1+2. 分析查询的同时推测执行搜索
+                    analysis, search_results = self.speculative_search(query, debug_info=debug_info)
+                else:
+                    # 1. 分析查询
+                    analysis = self.analyze_query(query, debug_info)
+                    
+                    # 2. 并行搜索
+                    search_results = self.parallel_search(
+                        query, 
+                        analysis.get("recommended_sources", DEFAULT_SOURCES),
+                        analysis.get("search_keywords"),
+                        debug_info=debug_info
+                    )
+                
+                # 3. 融合排序，选出多样化的子集后汇总结果
+                ranked_results = self.rank_results(query, search_results, debug_info)
+                context_results = self.pack_results(ranked_results, debug_info)
+                summary = self.summarize_results(query, search_results, debug_info, context_results)
             
-            # 3. 汇总结果
-            summary = self.summarize_results(query, search_results)
+            debug_info.add_log("search_complete", {"query": query})
             
             # 4. 构建最终响应
             final_response = {
@@ -416,27 +798,22 @@ class IntelligentSearchAgent:
                 "timestamp": datetime.now().isoformat(),
                 "analysis": analysis,
                 "search_results": search_results,
-                "summary": summary,
-                "debug_logs": self.debug_info.get_logs()
+                "ranked_results": ranked_results,
+                "summary": summary
             }
             
-            self.debug_info.add_log("search_complete", {
-                "query": query,
-                "total_debug_logs": len(self.debug_info.get_logs())
-            })
-            
-            return final_response
-            
         except Exception as e:
-            error_response = {
+            debug_info.add_log("search_error", {"error": str(e)})
+            final_response = {
                 "status": "error",
                 "query": query,
                 "timestamp": datetime.now().isoformat(),
-                "error": str(e),
-                "debug_logs": self.debug_info.get_logs()
+                "error": str(e)
             }
-            self.debug_info.add_log("search_error", {"error": str(e)})
-            return error_response
+        
+        if debug:
+            final_response["debug_logs"] = debug_info.get_logs()
+        return final_response
 
 def main():
     """主函数 - 演示使用"""
@@ -461,12 +838,10 @@ def main():
     # 执行搜索
     result = agent.search(test_query)
     
-    # 保存完整结果到文件
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"gemini_search_result_{timestamp}.json"
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    print(f"\n💾 完整结果已保存到: {filename}")
+    # 保存完整结果到结果存储
+    with ResultStore() as store:
+        record_id = store.append(test_query, result)
+        print(f"\n💾 完整结果已保存到: {store.directory} (记录 #{record_id})")
     
     # 打印汇总
     print(f"\n{'='*60}")
@@ -487,4 +862,9 @@ def main():
                 print(f"❌ {source}: {data.get('error', '未知错误')}")
 
 if __name__ == "__main__":
+    # 配置日志（默认INFO，设置LOG_LEVEL=DEBUG查看调试日志）
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     main() 
\ No newline at end of file
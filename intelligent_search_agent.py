@@ -9,57 +9,32 @@ import json
 import asyncio
 import logging
 import urllib.parse
-import urllib.request
 import xml.etree.ElementTree as ET
 import re
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-import requests
 from langchain.tools import Tool
 from langchain.llms.base import LLM
 from langchain.callbacks.manager import CallbackManagerForLLMRun
 from typing import Any, List, Mapping, Optional
 
-# 导入已有的API测试类
-from test_arxiv_api import ArxivAPITester
-from test_claude_api import ClaudeAPITester
-from test_gemini_api import GeminiAPITester
-from test_google_scholar_api import GoogleScholarAPITester
-from test_wikipedia_api import WikipediaAPITester
+from backend.src.agent.debug import DebugInfo
+from backend.src.agent import cassette, endpoints, http_client, usage
+from backend.src.agent.tools.wikipedia_tool import strip_snippet_html
 
-# 配置日志
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 日志由入口（命令行脚本、API服务）配置，导入本模块不会改动根logger
 logger = logging.getLogger(__name__)
 
-class DebugInfo:
-    """DEBUG信息收集器"""
-    def __init__(self):
-        self.logs = []
-    
-    def add_log(self, stage: str, data: Dict[str, Any]):
-        """添加DEBUG日志"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "stage": stage,
-            "data": data
-        }
-        self.logs.append(log_entry)
-        logger.debug(json.dumps(log_entry, ensure_ascii=False, indent=2))
-    
-    def get_logs(self) -> List[Dict[str, Any]]:
-        """获取所有日志"""
-        return self.logs
-
 class ClaudeLLM(LLM):
     """Claude LLM包装器 (使用OpenAI客户端)"""
     api_key: str
     api_base: str = "https://api.mjdjourney.cn/v1"
     model: str = "claude-3-7-sonnet-20250219"
+    # 构造时创建的OpenAI客户端和导入错误（LLM是pydantic模型，需要声明为字段才能赋值）
+    client: Any = None
+    import_error: Any = None
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -92,6 +67,9 @@ class ClaudeLLM(LLM):
                 max_tokens=2000
             )
             
+            # 记录token用量（归属于调用方设置的处理阶段）
+            usage.record_openai(self.model, response)
+            
             # 从响应中提取文本
             return response.choices[0].message.content
         except Exception as e:
@@ -102,22 +80,28 @@ class SearchAPIs:
     """搜索API集合"""
     def __init__(self, debug_info: DebugInfo):
         self.debug_info = debug_info
-        self.arxiv = ArxivAPITester()
-        self.wikipedia = WikipediaAPITester()
-        self.google_scholar = GoogleScholarAPITester()
         
-    def search_arxiv(self, query: str) -> str:
+        # 上游地址可通过环境变量覆盖（例如指向本地替身服务）
+        self.arxiv_url = endpoints.arxiv_api_url()
+        self.wikipedia_url = endpoints.wikipedia_zh_api_url()
+        self.serpapi_url = endpoints.serpapi_url()
+        # 未设置SERP API密钥时仅Google Scholar不可用（回放cassette时不需要真实密钥）
+        self.serp_api_key = os.getenv("SERP_API_KEY") or (cassette.PLACEHOLDER_KEY if cassette.is_replaying() else None)
+        
+    def search_arxiv(self, query: str, debug_info: Optional[DebugInfo] = None) -> str:
         """搜索arXiv论文"""
-        self.debug_info.add_log("arxiv_search_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("arxiv_search_start", {"query": query})
         try:
 
             
             # 构建查询
             encoded_query = urllib.parse.quote(query)
-            url = f'{self.arxiv.base_url}?search_query=all:{encoded_query}&start=0&max_results=5'
+            url = f'{self.arxiv_url}?search_query=all:{encoded_query}&start=0&max_results=5'
             
-            with urllib.request.urlopen(url) as response:
-                data = response.read().decode('utf-8')
+            response = http_client.get(url, timeout=20)
+            response.raise_for_status()
+            data = response.content
             
             root = ET.fromstring(data)
             namespaces = {
@@ -142,7 +126,7 @@ class SearchAPIs:
                     "published": published
                 })
             
-            self.debug_info.add_log("arxiv_search_complete", {
+            debug_info.add_log("arxiv_search_complete", {
                 "query": query,
                 "results_count": len(results)
             })
@@ -151,12 +135,13 @@ class SearchAPIs:
             
         except Exception as e:
             error_msg = f"arXiv搜索失败: {str(e)}"
-            self.debug_info.add_log("arxiv_search_error", {"error": str(e)})
+            debug_info.add_log("arxiv_search_error", {"error": str(e)})
             return error_msg
     
-    def search_wikipedia(self, query: str) -> str:
+    def search_wikipedia(self, query: str, debug_info: Optional[DebugInfo] = None) -> str:
         """搜索Wikipedia"""
-        self.debug_info.add_log("wikipedia_search_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("wikipedia_search_start", {"query": query})
         try:
             params = {
                 'action': 'query',
@@ -166,8 +151,8 @@ class SearchAPIs:
                 'srlimit': 5
             }
             
-            response = self.wikipedia.session.get(
-                self.wikipedia.base_url, 
+            response = http_client.get(
+                self.wikipedia_url,
                 params=params, 
                 timeout=10
             )
@@ -180,10 +165,10 @@ class SearchAPIs:
                 for item in data['query']['search']:
                     results.append({
                         "title": item.get('title', ''),
-                        "snippet": item.get('snippet', '').replace('<span class="searchmatch">', '').replace('</span>', '')
+                        "snippet": strip_snippet_html(item.get('snippet', ''))
                     })
             
-            self.debug_info.add_log("wikipedia_search_complete", {
+            debug_info.add_log("wikipedia_search_complete", {
                 "query": query,
                 "results_count": len(results)
             })
@@ -192,21 +177,25 @@ class SearchAPIs:
             
         except Exception as e:
             error_msg = f"Wikipedia搜索失败: {str(e)}"
-            self.debug_info.add_log("wikipedia_search_error", {"error": str(e)})
+            debug_info.add_log("wikipedia_search_error", {"error": str(e)})
             return error_msg
     
-    def search_google_scholar(self, query: str) -> str:
+    def search_google_scholar(self, query: str, debug_info: Optional[DebugInfo] = None) -> str:
         """搜索Google Scholar"""
-        self.debug_info.add_log("google_scholar_search_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("google_scholar_search_start", {"query": query})
         try:
-            if not hasattr(self.google_scholar, 'api_key') or not self.google_scholar.api_key:
+            if not self.serp_api_key:
                 return "Google Scholar API密钥未设置"
             
-            params = self.google_scholar.params.copy()
-            params["q"] = query
+            params = {
+                "api_key": self.serp_api_key,
+                "engine": "google_scholar",
+                "q": query
+            }
             
-            response = requests.get(
-                self.google_scholar.api_base,
+            response = http_client.get(
+                self.serpapi_url,
                 params=params
             )
             response.raise_for_status()
@@ -222,7 +211,7 @@ class SearchAPIs:
                     "cited_by": item.get("inline_links", {}).get("cited_by", {}).get("total", 0)
                 })
             
-            self.debug_info.add_log("google_scholar_search_complete", {
+            debug_info.add_log("google_scholar_search_complete", {
                 "query": query,
                 "results_count": len(results)
             })
@@ -231,13 +220,14 @@ class SearchAPIs:
             
         except Exception as e:
             error_msg = f"Google Scholar搜索失败: {str(e)}"
-            self.debug_info.add_log("google_scholar_search_error", {"error": str(e)})
+            debug_info.add_log("google_scholar_search_error", {"error": str(e)})
             return error_msg
 
 class IntelligentSearchAgent:
     """智能搜索Agent主类"""
     
     def __init__(self, claude_api_key: str):
+        # 单独调用各阶段方法且未传入debug_info时使用的默认收集器（有界）
         self.debug_info = DebugInfo()
         self.claude_llm = ClaudeLLM(api_key=claude_api_key)
         self.search_apis = SearchAPIs(self.debug_info)
@@ -261,9 +251,10 @@ class IntelligentSearchAgent:
             )
         ]
     
-    def analyze_query(self, query: str) -> Dict[str, Any]:
+    def analyze_query(self, query: str, debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
         """分析查询意图，决定使用哪些搜索源"""
-        self.debug_info.add_log("query_analysis_start", {"query": query})
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("query_analysis_start", {"query": query})
         
         # 使用Claude分析问题
         analysis_prompt = f"""
@@ -286,7 +277,8 @@ class IntelligentSearchAgent:
         """
         
         try:
-            response = self.claude_llm._call(analysis_prompt)
+            with usage.stage("analyze_query"):
+                response = self.claude_llm._call(analysis_prompt)
             # 尝试解析JSON
             json_match = re.search(r'\{[\s\S]*\}', response)
             if json_match:
@@ -300,12 +292,12 @@ class IntelligentSearchAgent:
                     "reasoning": "默认搜索策略"
                 }
             
-            self.debug_info.add_log("query_analysis_complete", analysis_result)
+            debug_info.add_log("query_analysis_complete", analysis_result)
             return analysis_result
             
         except Exception as e:
             logger.error(f"查询分析失败: {e}")
-            self.debug_info.add_log("query_analysis_error", {"error": str(e)})
+            debug_info.add_log("query_analysis_error", {"error": str(e)})
             return {
                 "query_type": "混合",
                 "recommended_sources": ["arxiv", "wikipedia"],
@@ -313,9 +305,11 @@ class IntelligentSearchAgent:
                 "reasoning": "分析失败，使用默认策略"
             }
     
-    def parallel_search(self, query: str, sources: List[str]) -> Dict[str, Any]:
+    def parallel_search(self, query: str, sources: List[str],
+                        debug_info: Optional[DebugInfo] = None) -> Dict[str, Any]:
         """并行搜索多个数据源"""
-        self.debug_info.add_log("parallel_search_start", {
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("parallel_search_start", {
             "query": query,
             "sources": sources
         })
@@ -328,13 +322,13 @@ class IntelligentSearchAgent:
             
             for source in sources:
                 if source == "arxiv" and hasattr(self.search_apis, 'search_arxiv'):
-                    future = executor.submit(self.search_apis.search_arxiv, query)
+                    future = executor.submit(self.search_apis.search_arxiv, query, debug_info)
                     future_to_source[future] = "arxiv"
                 elif source == "wikipedia" and hasattr(self.search_apis, 'search_wikipedia'):
-                    future = executor.submit(self.search_apis.search_wikipedia, query)
+                    future = executor.submit(self.search_apis.search_wikipedia, query, debug_info)
                     future_to_source[future] = "wikipedia"
                 elif source == "google_scholar" and hasattr(self.search_apis, 'search_google_scholar'):
-                    future = executor.submit(self.search_apis.search_google_scholar, query)
+                    future = executor.submit(self.search_apis.search_google_scholar, query, debug_info)
                     future_to_source[future] = "google_scholar"
             
             # 收集结果
@@ -346,16 +340,18 @@ class IntelligentSearchAgent:
                 except Exception as e:
                     search_results[source] = f"搜索失败: {str(e)}"
         
-        self.debug_info.add_log("parallel_search_complete", {
+        debug_info.add_log("parallel_search_complete", {
             "sources_searched": list(search_results.keys()),
             "total_results": sum(len(r) if isinstance(r, list) else 0 for r in search_results.values())
         })
         
         return search_results
     
-    def summarize_results(self, query: str, search_results: Dict[str, Any]) -> str:
+    def summarize_results(self, query: str, search_results: Dict[str, Any],
+                          debug_info: Optional[DebugInfo] = None) -> str:
         """使用Claude汇总搜索结果"""
-        self.debug_info.add_log("summarization_start", {
+        debug_info = debug_info if debug_info is not None else self.debug_info
+        debug_info.add_log("summarization_start", {
             "query": query,
             "sources_count": len(search_results)
         })
@@ -379,32 +375,54 @@ class IntelligentSearchAgent:
         """
         
         try:
-            summary = self.claude_llm._call(summary_prompt)
-            self.debug_info.add_log("summarization_complete", {
+            with usage.stage("summarize_results"):
+                summary = self.claude_llm._call(summary_prompt)
+            debug_info.add_log("summarization_complete", {
                 "summary_length": len(summary)
             })
             return summary
         except Exception as e:
             error_msg = f"汇总失败: {str(e)}"
-            self.debug_info.add_log("summarization_error", {"error": str(e)})
+            debug_info.add_log("summarization_error", {"error": str(e)})
             return error_msg
     
-    def search(self, query: str) -> Dict[str, Any]:
-        """执行智能搜索的主方法"""
-        self.debug_info.add_log("search_start", {"query": query})
+    def search(self, query: str, debug: bool = False) -> Dict[str, Any]:
+        """
+        执行智能搜索的主方法
+        
+        Args:
+            query: 用户查询
+            debug: 是否在响应中返回本次请求的DEBUG日志
+            
+        Returns:
+            搜索响应，其中usage为按阶段/模型汇总的LLM用量和费用
+        """
+        with usage.track() as tracker:
+            response = self._search(query, debug)
+        response["usage"] = tracker.summary()
+        return response
+    
+    def _search(self, query: str, debug: bool) -> Dict[str, Any]:
+        """执行一次完整的搜索流程"""
+        # 每次请求使用独立的DEBUG信息收集器
+        debug_info = DebugInfo()
+        debug_info.add_log("search_start", {"query": query})
         
         try:
             # 1. 分析查询
-            analysis = self.analyze_query(query)
+            analysis = self.analyze_query(query, debug_info)
             
             # 2. 并行搜索
             search_results = self.parallel_search(
                 query, 
-                analysis.get("recommended_sources", ["arxiv", "wikipedia"])
+                analysis.get("recommended_sources", ["arxiv", "wikipedia"]),
+                debug_info
             )
             
             # 3. 汇总结果
-            summary = self.summarize_results(query, search_results)
+            summary = self.summarize_results(query, search_results, debug_info)
+            
+            debug_info.add_log("search_complete", {"query": query})
             
             # 4. 构建最终响应
             final_response = {
@@ -412,26 +430,20 @@ class IntelligentSearchAgent:
                 "query": query,
                 "analysis": analysis,
                 "search_results": search_results,
-                "summary": summary,
-                "debug_logs": self.debug_info.get_logs()
+                "summary": summary
             }
             
-            self.debug_info.add_log("search_complete", {
-                "query": query,
-                "total_debug_logs": len(self.debug_info.get_logs())
-            })
-            
-            return final_response
-            
         except Exception as e:
-            error_response = {
+            debug_info.add_log("search_error", {"error": str(e)})
+            final_response = {
                 "status": "error",
                 "query": query,
-                "error": str(e),
-                "debug_logs": self.debug_info.get_logs()
+                "error": str(e)
             }
-            self.debug_info.add_log("search_error", {"error": str(e)})
-            return error_response
+        
+        if debug:
+            final_response["debug_logs"] = debug_info.get_logs()
+        return final_response
 
 def main():
     """主函数 - 演示使用"""
@@ -467,4 +479,9 @@ def main():
         print(result.get("summary", "无汇总"))
 
 if __name__ == "__main__":
+    # 配置日志（默认INFO，设置LOG_LEVEL=DEBUG查看调试日志）
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     main() 
\ No newline at end of file
@@ -7,23 +7,21 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from dotenv import load_dotenv
-from langchain_core.language_models import BaseLLM
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.agents import AgentExecutor, create_openai_tools_agent
-from langchain_core.tools import BaseTool
-from langchain.tools import Tool
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chains.summarize import load_summarize_chain
 
-# 导入自定义工具
+# 导入自定义工具（langchain、Gemini SDK等较重的依赖在创建Agent时才导入）
 import sys
 sys.path.append('.')  # 确保可以导入同级目录的模块
-from tools.arxiv_tool import ArxivSearchTool
-from tools.wikipedia_tool import WikipediaSearchTool
-from tools.google_scholar_tool import GoogleScholarSearchTool
-from tools.google_search_tool import GoogleSearchTool
+from backend.src.agent import endpoints
+from backend.src.agent.tools import (
+    ArxivSearchTool, WikipediaSearchTool, GoogleScholarSearchTool, GoogleSearchTool, LazyTool
+)
+
+if TYPE_CHECKING:
+    from langchain.agents import AgentExecutor
+    from langchain_core.language_models import BaseLLM
+    from langchain_core.tools import BaseTool
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -51,65 +49,65 @@ class LangChainSearchAgent:
         # 检查API密钥
         self._check_api_keys()
         
-        # 初始化LLM (Gemini)
-        self.llm = self._initialize_llm()
-        
-        # 创建工具集
-        self.tools = self._create_tools()
-        
-        # 创建Agent
-        self.agent = self._create_agent()
+        # LLM和Agent执行器在第一次查询时才创建
+        self._agent = None
         
         logger.info("智能搜索Agent初始化完成")
         
     def _check_api_keys(self):
-        """检查必要的API密钥"""
-        required_keys = {
-            "GOOGLE_API_KEY": "Google API Key (Gemini和Google搜索)",
-            "SERP_API_KEY": "SERP API Key (Google Scholar搜索)"
-        }
-        
-        missing_keys = []
-        for key, description in required_keys.items():
-            if not os.getenv(key):
-                missing_keys.append(f"{key} ({description})")
-        
-        if missing_keys:
-            logger.error(f"缺少以下API密钥: {', '.join(missing_keys)}")
+        """检查API密钥：Gemini必需；缺少SERP API Key时只有Google Scholar搜索不可用"""
+        if not os.getenv("GOOGLE_API_KEY"):
+            logger.error("缺少以下API密钥: GOOGLE_API_KEY (Google API Key (Gemini和Google搜索))")
             logger.error("请在.env文件中设置所有必要的API密钥")
             sys.exit(1)
+        if not os.getenv("SERP_API_KEY"):
+            logger.warning("未设置SERP_API_KEY，Google Scholar搜索将不可用")
     
-    def _initialize_llm(self) -> BaseLLM:
+    @property
+    def agent(self) -> "AgentExecutor":
+        """Agent执行器，首次使用时创建"""
+        if self._agent is None:
+            self.llm = self._initialize_llm()
+            self.tools = self._create_tools()
+            self._agent = self._create_agent()
+        return self._agent
+    
+    def _initialize_llm(self) -> "BaseLLM":
         """初始化LLM (Gemini)"""
         try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
             # 使用Gemini-Pro作为主要思考模型
             llm = ChatGoogleGenerativeAI(
                 model="gemini-2.0-flash",
                 google_api_key=os.getenv("GOOGLE_API_KEY"),
                 temperature=0.1,  # 低温度以获得更确定性的回答
                 convert_system_message_to_human=True,
+                **endpoints.gemini_client_options()
             )
             return llm
         except Exception as e:
             logger.error(f"初始化LLM失败: {e}")
             sys.exit(1)
     
-    def _create_tools(self) -> List[BaseTool]:
-        """创建Agent可用的工具集"""
+    def _create_tools(self) -> List["BaseTool"]:
+        """创建Agent可用的工具集（工具实例在首次调用时才创建）"""
         try:
             tools = [
-                ArxivSearchTool().get_tool(),
-                WikipediaSearchTool().get_tool(),
-                GoogleScholarSearchTool().get_tool(),
-                GoogleSearchTool().get_tool()
+                LazyTool(ArxivSearchTool).get_tool(),
+                LazyTool(WikipediaSearchTool, "search_and_get_content").get_tool(),
+                LazyTool(GoogleScholarSearchTool).get_tool(),
+                LazyTool(GoogleSearchTool).get_tool()
             ]
             return tools
         except Exception as e:
             logger.error(f"创建工具集失败: {e}")
             sys.exit(1)
     
-    def _create_agent(self) -> AgentExecutor:
+    def _create_agent(self) -> "AgentExecutor":
         """创建Agent"""
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+        from langchain.agents import AgentExecutor, create_openai_tools_agent
+        
         # Agent系统提示
         system_prompt = """你是一个高级研究助手，能够智能地分析研究问题并搜索相关信息。
         
@@ -6,9 +6,12 @@
 import os
 import json
 import sys
+import argparse
+import logging
 from datetime import datetime
 from dotenv import load_dotenv
 from gemini_search_agent import IntelligentSearchAgent
+from backend.src.agent.result_store import ResultStore
 
 # 加载环境变量
 load_dotenv()
@@ -35,20 +38,14 @@ def print_search_progress(stage: str):
     }
     print(f"\n{stages.get(stage, stage)}")
 
-def save_results(query: str, results: dict):
-    """保存搜索结果到文件"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"gemini_search_result_{timestamp}.json"
+def save_results(query: str, results: dict) -> int:
+    """保存搜索结果到结果存储，返回记录ID"""
+    with ResultStore() as store:
+        record_id = store.append(query, results)
+        directory = store.directory
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
-            "timestamp": datetime.now().isoformat(),
-            "query": query,
-            "results": results
-        }, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n💾 结果已保存到: {filename}")
-    return filename
+    print(f"\n💾 结果已保存到: {directory} (记录 #{record_id})")
+    return record_id
 
 def display_results(results: dict, show_debug: bool = False):
     """显示搜索结果"""
@@ -75,6 +72,12 @@ def display_results(results: dict, show_debug: bool = False):
             else:
                 print(f"   {source}: {data.get('error', '未知错误')}")
     
+    # 显示融合排序后的前几条结果
+    if results.get("ranked_results"):
+        print(f"\n🏆 综合排序（前5条）:")
+        for item in results["ranked_results"][:5]:
+            print(f"   {item['rank']}. {item.get('title', '无标题')} [{item['source']}]")
+    
     # 显示AI汇总
     if "summary" in results:
         print(f"\n🤖 Gemini AI 汇总:")
@@ -82,6 +85,13 @@ def display_results(results: dict, show_debug: bool = False):
         print(results["summary"])
         print("-"*60)
     
+    # 显示LLM用量
+    if "usage" in results:
+        usage_summary = results["usage"]
+        print(f"\n💰 LLM用量: {usage_summary['total_tokens']} tokens "
+              f"(输入 {usage_summary['input_tokens']} / 输出 {usage_summary['output_tokens']})，"
+              f"估算费用 ${usage_summary['cost_usd']:.6f}")
+    
     # 显示调试信息（如果需要）
     if show_debug and "debug_logs" in results:
         print(f"\n🐛 调试信息 (共 {len(results['debug_logs'])} 条日志):")
@@ -90,6 +100,12 @@ def display_results(results: dict, show_debug: bool = False):
 
 def main():
     """主函数"""
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='交互式运行智能搜索Agent（Gemini版）')
+    parser.add_argument('--speculative', action='store_true',
+                        help='分析查询的同时推测执行默认搜索源（也可设置SPECULATIVE_SEARCH=1）')
+    args = parser.parse_args()
+    
     print_banner()
     
     # 获取Google API密钥
@@ -138,45 +154,22 @@ def main():
             print("⚠️  请输入有效的查询内容")
             continue
         
-        # 执行搜索
+        # 执行搜索（查询分析、搜索和汇总都由agent.search完成）
         try:
-            print_search_progress("analyzing")
-            
-            # 执行查询分析
-            analysis = agent.analyze_query(query)
-            print(f"   查询类型: {analysis.get('query_type', '未知')}")
-            print(f"   推荐搜索源: {', '.join(analysis.get('recommended_sources', []))}")
-            
             print_search_progress("searching")
             
-            # 执行搜索
-            search_results = agent.parallel_search(
-                query, 
-                analysis.get("recommended_sources", ["arxiv", "wikipedia"])
-            )
+            results = agent.search(query, speculative=args.speculative or None, debug=show_debug)
+            if results.get("status") != "success":
+                print(f"\n❌ 搜索过程中发生错误: {results.get('error', '未知错误')}")
+                continue
             
             # 显示搜索结果简要统计
+            search_results = results["search_results"]
             success_count = sum(1 for r in search_results.values() if r.get("status") == "success")
             print(f"   成功搜索 {success_count}/{len(search_results)} 个数据源")
             
-            print_search_progress("summarizing")
-            
-            # 汇总结果
-            summary = agent.summarize_results(query, search_results)
-            
             print_search_progress("complete")
             
-            # 构建完整结果
-            results = {
-                "status": "success",
-                "query": query,
-                "timestamp": datetime.now().isoformat(),
-                "analysis": analysis,
-                "search_results": search_results,
-                "summary": summary,
-                "debug_logs": agent.debug_info.get_logs()
-            }
-            
             # 显示结果
             display_results(results, show_debug=show_debug)
             
@@ -194,4 +187,9 @@ def main():
             continue
 
 if __name__ == "__main__":
+    # 配置日志（默认INFO，设置LOG_LEVEL=DEBUG查看调试日志）
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     main() 
\ No newline at end of file
@@ -9,7 +9,8 @@ import sys
 import json
 import argparse
 import logging
-from langchain_search_agent import LangChainSearchAgent
+
+from backend.src.agent.result_store import DEFAULT_STORE_DIR, ResultStore
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -22,10 +23,13 @@ def main():
     parser.add_argument('-d', '--debug', action='store_true', help='启用调试模式')
     parser.add_argument('-q', '--query', type=str, help='要搜索的查询')
     parser.add_argument('-o', '--output', type=str, help='将结果保存到指定的JSON文件')
+    parser.add_argument('--store', type=str, nargs='?', const=DEFAULT_STORE_DIR,
+                        help=f'将结果追加到结果存储目录（默认 {DEFAULT_STORE_DIR}）')
     args = parser.parse_args()
     
     try:
-        # 创建Agent
+        # 创建Agent（在解析参数之后才导入，--help等操作无需加载Agent依赖）
+        from langchain_search_agent import LangChainSearchAgent
         agent = LangChainSearchAgent(debug=args.debug)
         
         if args.query:
@@ -38,6 +42,10 @@ def main():
                 with open(args.output, 'w', encoding='utf-8') as f:
                     json.dump(result, f, ensure_ascii=False, indent=2)
                 print(f"结果已保存到 {args.output}")
+            if args.store:
+                with ResultStore(args.store) as store:
+                    record_id = store.append(query, result)
+                print(f"结果已保存到 {args.store} (记录 #{record_id})")
         else:
             # 交互式模式
             run_interactive_mode(agent, args.debug)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+离线测试的公共fixture
+所有上游地址都指向benchmarks/stub_servers.py启动的本地替身服务，测试不访问外网，
+也不需要真实的API密钥。
+"""
+
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+
+from benchmarks.stub_servers import StubServers
+
+# 测试使用的占位密钥（只发往本地替身服务）
+TEST_API_KEY = "offline-test-key"
+
+# 计时测试使用的固定延迟（秒）：Wikipedia一次搜索要发出多个请求，延迟设得较短
+SLOW_CONFIG: Dict[str, Dict[str, Any]] = {
+    "arxiv": {"latency": {"dist": "fixed", "value": 0.2}},
+    "wikipedia": {"latency": {"dist": "fixed", "value": 0.05}},
+    "serpapi": {"latency": {"dist": "fixed", "value": 0.2}},
+    "gemini": {"latency": {"dist": "fixed", "value": 0.2}},
+}
+
+# 搜索源全部失败的配置
+FAILING_CONFIG: Dict[str, Dict[str, Any]] = {
+    name: {"error_rate": 1.0} for name in ("arxiv", "wikipedia", "serpapi")
+}
+
+
+def _point_to(monkeypatch: pytest.MonkeyPatch, servers: StubServers):
+    """把上游地址环境变量指向给定的替身服务（之后新建的工具和客户端生效）"""
+    for name, value in servers.env().items():
+        monkeypatch.setenv(name, value)
+
+
+@pytest.fixture(scope="session")
+def stubs() -> Iterator[StubServers]:
+    """不注入延迟和错误的替身服务"""
+    with StubServers(latency_scale=0) as servers:
+        yield servers
+
+
+@pytest.fixture(scope="session")
+def slow_stubs() -> Iterator[StubServers]:
+    """每个上游固定延迟的替身服务（用于耗时断言）"""
+    with StubServers(config=SLOW_CONFIG) as servers:
+        yield servers
+
+
+@pytest.fixture(scope="session")
+def failing_stubs() -> Iterator[StubServers]:
+    """搜索源请求都返回错误状态码的替身服务（Gemini正常，避免LLM客户端按退避策略反复重试）"""
+    with StubServers(latency_scale=0, config=FAILING_CONFIG) as servers:
+        yield servers
+
+
+@pytest.fixture(autouse=True)
+def offline_env(stubs: StubServers, monkeypatch: pytest.MonkeyPatch):
+    """
+    每个测试默认使用无延迟的替身服务和占位密钥
+
+    部分模块导入时会设置HTTP_PROXY，这里让本地地址绕过代理；同时去掉其他Gemini密钥并关闭cassette录制/回放。
+    """
+    _point_to(monkeypatch, stubs)
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    monkeypatch.setenv("no_proxy", "127.0.0.1,localhost")
+    monkeypatch.setenv("GOOGLE_API_KEY", TEST_API_KEY)
+    monkeypatch.setenv("SERP_API_KEY", TEST_API_KEY)
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.setenv("HTTP_CASSETTE_MODE", "off")
+
+
+@pytest.fixture
+def slow_upstreams(slow_stubs: StubServers, monkeypatch: pytest.MonkeyPatch) -> StubServers:
+    """切换到固定延迟的替身服务"""
+    _point_to(monkeypatch, slow_stubs)
+    return slow_stubs
+
+
+@pytest.fixture
+def failing_upstreams(failing_stubs: StubServers, monkeypatch: pytest.MonkeyPatch) -> StubServers:
+    """切换到搜索源总是返回错误的替身服务"""
+    _point_to(monkeypatch, failing_stubs)
+    return failing_stubs
+
+
+@pytest.fixture
+def make_gemini_agent(tmp_path) -> Callable[[], Any]:
+    """创建IntelligentSearchAgent的工厂（本地索引写入临时目录；在切换上游之后调用）"""
+    from backend.src.agent.local_index import LocalIndex
+    from backend.src.agent.vector_index import VectorIndex
+    from gemini_search_agent import IntelligentSearchAgent
+
+    def make() -> IntelligentSearchAgent:
+        return IntelligentSearchAgent(
+            local_index=LocalIndex(tmp_path / "local_index.sqlite"),
+            vector_index=VectorIndex(tmp_path / "vector_index")
+        )
+
+    return make
+
+
+@pytest.fixture
+def spans() -> Callable[[List[Dict[str, Any]], str], List[Dict[str, Any]]]:
+    """返回从耗时树中按名称前缀查找span的函数"""
+    def find(tree: List[Dict[str, Any]], prefix: str) -> List[Dict[str, Any]]:
+        found = []
+        for span in tree:
+            if span["name"].startswith(prefix):
+                found.append(span)
+            found.extend(find(span["children"], prefix))
+        return found
+
+    return find
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+API服务测试（HTTP、WebSocket和健康检查）
+"""
+
+import time
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.src.api import server
+
+
+@pytest.fixture
+def client(stubs, monkeypatch) -> Iterator[TestClient]:
+    """启动服务（不读写持久化缓存），等待预热完成"""
+    monkeypatch.setattr(server, "CACHE_PATH", "")
+    with TestClient(server.app) as test_client:
+        deadline = time.monotonic() + server.WARMUP_TIMEOUT + 5
+        while not test_client.get("/api/health").json()["ready"]:
+            assert time.monotonic() < deadline, "预热未完成"
+            time.sleep(0.05)
+        yield test_client
+
+
+def test_health(client):
+    health = client.get("/api/health").json()
+
+    assert health["agent_ready"] is True
+    assert health["ready"] is True
+    assert health["warmup"]["timed_out"] is False
+
+
+def test_search(client):
+    response = client.post("/api/search", json={"query": "large language model", "max_iterations": 1})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["answer"]
+    assert data["iterations"] == 1
+    assert {timing["node"] for timing in data["branch_timings"]} == set(server.agent.tool_map)
+    assert data["usage"]["calls"] >= 2
+
+
+def test_search_profile_requires_token(client):
+    response = client.post("/api/search", json={"query": "transformer", "profile": "cprofile"})
+
+    assert response.status_code == 403
+
+
+def test_websocket(client):
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"query": "", "max_iterations": 1})
+        assert websocket.receive_json() == {"type": "error", "message": "Query is required"}
+
+        websocket.send_json({"query": "transformer", "max_iterations": 1})
+        messages = [websocket.receive_json() for _ in range(3)]
+
+    assert [message["type"] for message in messages] == ["start", "result", "complete"]
+    assert messages[1]["data"]["success"] is True
+    assert messages[1]["data"]["answer"]
+
+
+def test_metrics(client):
+    client.post("/api/search", json={"query": "transformer", "max_iterations": 1})
+
+    body = client.get("/metrics").text
+
+    assert 'endpoint="/api/search"' in body
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+arXiv搜索工具测试
+"""
+
+from backend.src.agent import cassette
+from backend.src.agent.tools.arxiv_tool import ArxivSearchTool, format_papers, parse_feed
+
+
+def test_parse_feed(stubs):
+    _, body = stubs.arxiv_feed("large language model", 3)
+
+    total_results, papers = parse_feed(body)
+
+    assert total_results == "3"
+    assert len(papers) == 3
+    for paper in papers:
+        assert paper["title"]
+        assert len(paper["authors"]) == 3
+        assert len(paper["published"]) == len("2020-01-01")
+        assert paper["pdf_link"].startswith("http://arxiv.org/pdf/")
+        assert paper["primary_category"] == "cs.CL"
+
+
+def test_format_papers_truncates_authors_and_summary(stubs):
+    _, body = stubs.arxiv_feed("transformer", 2)
+    total_results, papers = parse_feed(body)
+    papers[0]["authors"].append("Author 1000")
+
+    text = format_papers("transformer", papers, total_results)
+
+    assert text.startswith("在arXiv上找到了2篇与'transformer'相关的论文（共2个结果）")
+    assert "论文 1:" in text and "论文 2:" in text
+    assert ", ".join(papers[0]["authors"][:3]) + "..." in text
+    assert papers[0]["summary"][:300] + "..." in text
+
+
+def test_format_papers_empty():
+    assert format_papers("nothing", [], "0") == "在arXiv上没有找到与'nothing'相关的论文。"
+
+
+def test_search(stubs):
+    before = stubs.stats["arxiv"]["requests"]
+
+    text = ArxivSearchTool().search("large language model", max_results=2)
+
+    assert text.startswith("在arXiv上找到了2篇与'large language model'相关的论文")
+    assert stubs.stats["arxiv"]["requests"] == before + 1
+
+
+def test_search_upstream_error(failing_upstreams):
+    text = ArxivSearchTool().search("large language model")
+
+    assert text.startswith("搜索arXiv时发生错误")
+    assert "503" in text
+
+
+def test_cassette_replay_skips_upstream(stubs, tmp_path):
+    path = tmp_path / "arxiv.json"
+    with cassette.use(path, "record"):
+        recorded = ArxivSearchTool().search("retrieval augmented generation")
+    before = stubs.stats["arxiv"]["requests"]
+
+    with cassette.use(path, "replay"):
+        replayed = ArxivSearchTool().search("retrieval augmented generation")
+
+    assert replayed == recorded
+    assert stubs.stats["arxiv"]["requests"] == before
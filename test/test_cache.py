@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+搜索结果缓存测试
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from backend.src.agent import cache as cache_module
+from backend.src.agent.cache import ResultCache
+
+
+class _Clock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    return fake
+
+
+def test_get_set_and_stats():
+    cache = ResultCache()
+
+    assert cache.get("missing", "default") == "default"
+    cache.set(("arXiv_search", "transformer"), None)
+
+    assert cache.get(("arXiv_search", "transformer"), "default") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_ttl_expiry(clock):
+    cache = ResultCache(ttl=10)
+    cache.set("key", "value")
+
+    clock.now += 9
+    assert cache.get("key") == "value"
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_get_or_compute_single_flight():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert cache.get_or_compute("key", compute) == "result"
+    assert len(calls) == 1
+
+
+def test_get_or_compute_errors_are_not_cached():
+    cache = ResultCache()
+
+    def fail():
+        raise RuntimeError("上游错误")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("key", fail)
+    assert cache.get_or_compute("key", lambda: "错误: 超时", cacheable=lambda v: not v.startswith("错误")) == "错误: 超时"
+    assert cache.stats()["entries"] == 0
+    assert cache.get_or_compute("key", lambda: "ok") == "ok"
+    assert cache.get("key") == "ok"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "nested" / "cache.jsonl"
+    cache = ResultCache(ttl=60)
+    cache.set(("arXiv_search", "transformer"), "论文列表")
+    cache.set("plain", {"results": [1, 2]})
+    cache.set("unserializable", object())
+
+    assert cache.save(path) == 2
+    assert not path.with_name("cache.jsonl.tmp").exists()
+
+    restored = ResultCache(ttl=60)
+    assert restored.load(path) == 2
+    assert restored.get(("arXiv_search", "transformer")) == "论文列表"
+    assert restored.get("plain") == {"results": [1, 2]}
+
+
+def test_load_skips_expired_and_corrupt_lines(tmp_path, clock):
+    path = tmp_path / "cache.jsonl"
+    now = time.time()
+    path.write_text("\n".join([
+        json.dumps({"key": ["a", "b"], "expires_at": now + 3600, "value": "fresh"}),
+        json.dumps({"key": "old", "expires_at": now - 1, "value": "expired"}),
+        "{not json",
+        json.dumps({"value": "no key"}),
+    ]), encoding="utf-8")
+    cache = ResultCache(ttl=10)
+
+    assert cache.load(path) == 1
+
+    # 剩余有效期不超过缓存自身的TTL
+    clock.now += 11
+    assert cache.get(("a", "b")) is None
+
+
+def test_load_missing_file(tmp_path):
+    assert ResultCache().load(tmp_path / "missing.jsonl") == 0
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+DEBUG信息收集器测试
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.src.agent import debug
+from backend.src.agent.debug import DebugInfo
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_ring_buffer_drops_oldest():
+    info = DebugInfo(max_entries=3)
+
+    for i in range(5):
+        info.add_log(f"stage_{i}", {"i": i})
+
+    assert [log["stage"] for log in info.get_logs()] == ["stage_2", "stage_3", "stage_4"]
+    assert info.dropped == 2
+    payload = json.loads(info.to_json())
+    assert payload["dropped"] == 2
+    assert [log["data"]["i"] for log in payload["logs"]] == [2, 3, 4]
+
+
+def test_no_drops_within_capacity():
+    info = DebugInfo(max_entries=3)
+
+    for i in range(3):
+        info.add_log("stage", {"i": i})
+
+    assert len(info.get_logs()) == 3
+    assert info.dropped == 0
+
+
+def test_add_log_skips_serialization_unless_debug_enabled(monkeypatch, caplog):
+    def fail(*args, **kwargs):
+        raise AssertionError("DEBUG日志未开启时不应序列化")
+
+    monkeypatch.setattr(debug.json, "dumps", fail)
+    caplog.set_level(logging.INFO, logger=debug.logger.name)
+    DebugInfo().add_log("stage", {"value": object()})
+
+    monkeypatch.undo()
+    caplog.set_level(logging.DEBUG, logger=debug.logger.name)
+    DebugInfo().add_log("stage", {"query": "大语言模型"})
+    assert 'stage: {"query": "大语言模型"}' in caplog.messages
+
+
+def _run(code: str) -> str:
+    """在未设置LOG_LEVEL的子进程中执行代码，返回最后一行输出"""
+    env = {key: value for key, value in os.environ.items() if key != "LOG_LEVEL"}
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return output.strip().splitlines()[-1]
+
+
+@pytest.mark.parametrize("module", [
+    "backend.src.agent.graph",
+    "gemini_search_agent",
+    "intelligent_search_agent",
+    "intelligent_search_agent_simple",
+])
+def test_import_does_not_configure_logging(module):
+    assert _run(f"import logging, {module}; print(logging.getLogger().handlers)") == "[]"
+
+
+def test_server_logs_at_info_by_default():
+    code = "import logging, backend.src.api.server; print(logging.getLogger('backend.src.agent.debug').isEnabledFor(logging.DEBUG))"
+
+    assert _run(code) == "False"
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+跨搜索源结果去重测试
+"""
+
+import pytest
+
+from backend.src.agent.dedup import (NEAR_DUPLICATE_THRESHOLD, _shingles, arxiv_id, doi, find_duplicates,
+                                     merge_duplicates, merge_records, title_fingerprint)
+
+# 近似重复的标题（只差一个单词）
+NEAR_TITLE = "Scaling Laws for Neural Language Models and Their Applications"
+NEAR_VARIANT = "Scaling Laws for Neural Language Models and Their Application"
+
+
+@pytest.mark.parametrize("item, expected", [
+    ({"arxiv_id": "2001.08361v3"}, "2001.08361"),
+    ({"link": "http://arxiv.org/abs/1706.03762v7"}, "1706.03762"),
+    ({"pdf_link": "https://arxiv.org/pdf/2303.08774v2"}, "2303.08774"),
+    ({"link": "https://arxiv.org/abs/hep-th/9901001v1"}, "hep-th/9901001"),
+    ({"id": "arXiv:2106.09685"}, "2106.09685"),
+    ({"link": "https://example.org/paper"}, None),
+])
+def test_arxiv_id(item, expected):
+    assert arxiv_id(item) == expected
+
+
+@pytest.mark.parametrize("item, expected", [
+    ({"doi": "10.1038/Nature14539"}, "10.1038/nature14539"),
+    ({"link": "https://doi.org/10.1145/3292500.3330701."}, "10.1145/3292500.3330701"),
+    ({"publication_info": "Nature, 2015 (doi:10.1038/nature14539)"}, "10.1038/nature14539"),
+    ({"link": "https://example.org/paper"}, None),
+])
+def test_doi(item, expected):
+    assert doi(item) == expected
+
+
+def test_title_fingerprint():
+    assert title_fingerprint("Attention Is All You Need!") == "attentionisallyouneed"
+    assert title_fingerprint("ＧＰＴ－４ 技术报告") == "gpt4技术报告"
+
+
+def test_find_duplicates_by_arxiv_id_ignoring_version():
+    items = [
+        {"title": "Attention Is All You Need", "link": "http://arxiv.org/abs/1706.03762v5"},
+        {"title": "Unrelated", "link": "https://example.org"},
+        {"title": "Transformer (preprint)", "arxiv_id": "1706.03762v1"},
+    ]
+
+    assert find_duplicates(items) == [[0, 2], [1]]
+
+
+def test_find_duplicates_by_doi():
+    items = [
+        {"title": "Deep learning", "doi": "10.1038/nature14539"},
+        {"title": "Deep Learning Review", "link": "https://doi.org/10.1038/NATURE14539"},
+    ]
+
+    assert find_duplicates(items) == [[0, 1]]
+
+
+def test_find_duplicates_by_title_fingerprint():
+    items = [
+        {"title": "BERT: Pre-training of Deep Bidirectional Transformers"},
+        {"title": "Something else entirely"},
+        {"title": "bert pre-training of deep bidirectional transformers."},
+    ]
+
+    assert find_duplicates(items) == [[0, 2], [1]]
+
+
+def test_find_duplicates_near_duplicate_threshold():
+    a, b = _shingles(title_fingerprint(NEAR_TITLE)), _shingles(title_fingerprint(NEAR_VARIANT))
+    jaccard = len(a & b) / len(a | b)
+    items = [{"title": NEAR_TITLE}, {"title": NEAR_VARIANT}]
+
+    assert NEAR_DUPLICATE_THRESHOLD <= jaccard < 1
+    assert find_duplicates(items) == [[0, 1]]
+    assert find_duplicates(items, threshold=jaccard) == [[0, 1]]
+    assert find_duplicates(items, threshold=min(jaccard + 0.01, 1.0)) == [[0], [1]]
+
+
+def test_find_duplicates_skips_short_titles_for_near_matching():
+    # 标题太短时即使阈值为0也不做近似匹配
+    assert find_duplicates([{"title": "abc"}, {"title": "abd"}], threshold=0.0) == [[0], [1]]
+
+
+def test_merge_records_keeps_metadata_union():
+    merged = merge_records([
+        ("arxiv", {"title": "Scaling Laws", "summary": "Short abstract.", "authors": ["Kaplan"],
+                   "link": "http://arxiv.org/abs/2001.08361v1", "score": 3.2, "origin": "local_index"}),
+        ("google_scholar", {"title": "Scaling laws for neural language models", "cited_by": 120,
+                            "snippet": "A much longer snippet describing the power laws in detail.",
+                            "authors": ["Kaplan", "McCandlish"]}),
+        ("semantic_scholar", {"title": "Scaling Laws", "cited_by": 80, "abstract": "Tiny."}),
+    ])
+
+    assert merged["title"] == "Scaling Laws"
+    assert merged["cited_by"] == 120
+    assert merged["authors"] == ["Kaplan", "McCandlish"]
+    # 摘要类字段只保留最长的一个
+    assert merged["snippet"].startswith("A much longer snippet")
+    assert "summary" not in merged and "abstract" not in merged
+    assert merged["arxiv_id"] == "2001.08361"
+    assert merged["sources"] == ["local_index", "google_scholar", "semantic_scholar"]
+    assert "score" not in merged and "origin" not in merged
+
+
+def test_merge_duplicates_places_merged_record_under_first_source():
+    search_results = {
+        "arxiv": {"status": "success", "results": [
+            {"title": "Attention Is All You Need", "link": "http://arxiv.org/abs/1706.03762v5"},
+            {"title": "Only on arXiv"},
+        ]},
+        "google_scholar": {"status": "success", "results": [
+            {"title": "Attention is all you need", "cited_by": 100000},
+        ]},
+        "wikipedia": {"status": "error", "error": "上游错误"},
+    }
+
+    deduplicated, stats = merge_duplicates(search_results)
+
+    assert stats == {"input_results": 3, "output_results": 2, "merged_entities": 1}
+    merged, single = deduplicated["arxiv"]["results"]
+    assert merged["cited_by"] == 100000
+    assert merged["sources"] == ["arxiv", "google_scholar"]
+    assert single == {"title": "Only on arXiv"}
+    assert deduplicated["google_scholar"] == {"status": "success", "results": []}
+    assert deduplicated["wikipedia"] is search_results["wikipedia"]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+智能搜索Agent（Gemini版）测试
+"""
+
+import time
+
+import pytest
+
+from backend.src.agent import tracing
+from gemini_search_agent import LOCAL_SOURCES
+
+# 替身服务的查询分析推荐的搜索源
+UPSTREAM_SOURCES = ["arxiv", "wikipedia"]
+
+
+def test_search(stubs, make_gemini_agent):
+    agent = make_gemini_agent()
+
+    response = agent.search("large language model", trace="tree")
+
+    assert response["status"] == "success"
+    assert response["analysis"]["recommended_sources"] == UPSTREAM_SOURCES
+    assert response["analysis"]["search_keywords"][0] == "large language model"
+    for source in UPSTREAM_SOURCES:
+        assert response["search_results"][source]["status"] == "success"
+        assert response["search_results"][source]["results"]
+    assert response["ranked_results"]
+    assert response["summary"] and not response["summary"].startswith("调用失败")
+    assert response["usage"]["calls"] == 2
+    assert [span["name"] for span in response["trace"]] == ["search"]
+
+
+def test_speculative_search(stubs, make_gemini_agent):
+    agent = make_gemini_agent()
+
+    response = agent.search("transformer", speculative=True, debug=True)
+
+    assert response["status"] == "success"
+    assert set(UPSTREAM_SOURCES) <= set(response["search_results"])
+    stages = [log["stage"] for log in response["debug_logs"]]
+    assert "speculative_search_plan" in stages
+
+
+def test_offline_search_uses_local_index_only(stubs, make_gemini_agent):
+    agent = make_gemini_agent()
+    agent.search("large language model")
+    before = {name: dict(counts) for name, counts in stubs.stats.items()}
+
+    response = agent.search("large language model", offline=True)
+
+    assert response["status"] == "success"
+    assert set(response["search_results"]) == set(LOCAL_SOURCES)
+    assert response["ranked_results"]
+    for source in ("arxiv", "wikipedia", "serpapi"):
+        assert stubs.stats[source]["requests"] == before[source]["requests"]
+
+
+def test_upstream_errors_do_not_fail_search(failing_upstreams, make_gemini_agent):
+    agent = make_gemini_agent()
+
+    response = agent.search("large language model")
+
+    assert response["status"] == "success"
+    for source in UPSTREAM_SOURCES:
+        assert response["search_results"][source]["status"] == "error"
+
+
+def test_google_scholar_without_api_key(monkeypatch, make_gemini_agent):
+    monkeypatch.delenv("SERP_API_KEY")
+    agent = make_gemini_agent()
+
+    result = agent.search_apis.search_google_scholar("scaling laws")
+
+    assert result == {"status": "error", "error": "Google Scholar API密钥未设置"}
+
+
+def test_build_summary_prompt():
+    from gemini_search_agent import IntelligentSearchAgent
+
+    prompt = IntelligentSearchAgent.build_summary_prompt("大语言模型", [{"title": "标题"}])
+
+    assert "用户问题：大语言模型" in prompt
+    assert '"title": "标题"' in prompt
+
+
+@pytest.mark.timing
+def test_parallel_search_is_sub_additive(slow_upstreams, make_gemini_agent, spans):
+    """并行搜索的墙钟时间明显小于各子查询耗时之和"""
+    agent = make_gemini_agent()
+    sources = ["arxiv", "wikipedia", "google_scholar"]
+    # 预热连接和本地索引，只测量稳定状态下的并发
+    agent.parallel_search("warm up", sources, target_results=100)
+
+    with tracing.trace() as tracer:
+        start = time.perf_counter()
+        results = agent.parallel_search("transformer", sources, ["transformer", "transformer survey"],
+                                        target_results=100)
+        elapsed = time.perf_counter() - start
+
+    for source in sources:
+        assert results[source]["status"] == "success"
+    upstream_spans = [span for span in spans(tracer.to_tree(), "source:")
+                      if span["name"].split(":", 1)[1] in sources]
+    assert len(upstream_spans) == 6
+    total = sum(span["duration_ms"] for span in upstream_spans) / 1000
+    slowest = max(span["duration_ms"] for span in upstream_spans) / 1000
+    assert elapsed < 0.5 * total
+    assert elapsed < slowest + 0.3
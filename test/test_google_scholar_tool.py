@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Google Scholar搜索工具测试
+"""
+
+import gzip
+
+import pytest
+
+from backend.src.agent import cassette
+from backend.src.agent.tools.google_scholar_tool import GoogleScholarSearchTool
+
+
+def test_search(stubs):
+    before = stubs.stats["serpapi"]["requests"]
+
+    text = GoogleScholarSearchTool().search("language model evaluation", max_results=3)
+
+    assert text.startswith("在Google Scholar上找到了3篇与'language model evaluation'相关的学术文献")
+    assert "被引用次数:" in text
+    assert stubs.stats["serpapi"]["requests"] == before + 1
+
+
+def test_missing_api_key(monkeypatch):
+    monkeypatch.delenv("SERP_API_KEY")
+
+    with pytest.raises(ValueError, match="SERP_API_KEY"):
+        GoogleScholarSearchTool()
+
+
+def test_cassette_replay_without_api_key(stubs, monkeypatch, tmp_path):
+    path = tmp_path / "scholar.json"
+    with cassette.use(path, "record"):
+        recorded = GoogleScholarSearchTool().search("scaling laws")
+    monkeypatch.delenv("SERP_API_KEY")
+
+    with cassette.use(path, "replay"):
+        tool = GoogleScholarSearchTool()
+        replayed = tool.search("scaling laws")
+
+    assert tool.api_key == cassette.PLACEHOLDER_KEY
+    assert replayed == recorded
+    # 密钥不写入cassette文件
+    assert b"offline-test-key" not in gzip.decompress(path.read_bytes())
+
+
+def test_search_upstream_error(failing_upstreams):
+    text = GoogleScholarSearchTool().search("scaling laws")
+
+    assert text.startswith("搜索Google Scholar时发生网络错误")
+    assert "429" in text
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Google搜索工具测试
+"""
+
+import pytest
+
+from backend.src.agent import cassette, usage
+from backend.src.agent.tools.google_search_tool import GoogleSearchTool
+from backend.src.agent.tools.lazy import LazyTool
+
+# 录制的搜索结果
+RECORDED_RESULT = "录制的Google搜索结果"
+
+
+def test_search(stubs):
+    before = stubs.stats["gemini"]["requests"]
+
+    with usage.track() as tracker:
+        text = LazyTool(GoogleSearchTool).run("最新AI新闻")
+
+    assert not text.startswith("使用Google搜索时发生错误"), text
+    assert "\n\n信息来源:\n1. example.org 1 - https://example.org/news/" in text
+    assert stubs.stats["gemini"]["requests"] == before + 1
+    summary = tracker.summary()
+    assert summary["by_source"]["Google_Search"]["calls"] == 1
+    assert summary["by_stage"]["search"]["calls"] == 1
+    assert summary["by_model"]["gemini-2.0-flash"]["input_tokens"] > 0
+
+
+def test_search_upstream_error(stubs, monkeypatch):
+    monkeypatch.setitem(stubs.config["gemini"], "error_rate", 1.0)
+
+    text = GoogleSearchTool().search("最新AI新闻")
+
+    assert text.startswith("使用Google搜索时发生错误")
+
+
+def test_missing_api_key(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY")
+
+    with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+        GoogleSearchTool()
+
+
+def test_cassette_replay_without_api_key(monkeypatch, tmp_path):
+    path = tmp_path / "google_search.json"
+    with cassette.use(path, "record"):
+        cassette.call("google_search", ("gemini-2.0-flash", "最新AI新闻"), lambda: RECORDED_RESULT)
+    monkeypatch.delenv("GOOGLE_API_KEY")
+
+    with cassette.use(path, "replay"):
+        tool = GoogleSearchTool()
+        assert tool.client is None
+        assert tool.search("最新AI新闻") == RECORDED_RESULT
+        # 未录制的查询返回工具自身的错误格式，不抛出异常
+        assert tool.search("没有录制的查询").startswith("使用Google搜索时发生错误")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+智能搜索Agent（Claude版及简化版）的搜索源测试
+Claude接口不经过可替身的上游地址，这里只测试搜索源和并行搜索。
+"""
+
+import intelligent_search_agent
+import intelligent_search_agent_simple
+
+# 全部搜索源
+SOURCES = ["arxiv", "wikipedia", "google_scholar"]
+
+
+def test_simple_agent_parallel_search(stubs):
+    agent = intelligent_search_agent_simple.IntelligentSearchAgent("offline-test-key")
+
+    results = agent.parallel_search("transformer", SOURCES)
+
+    assert set(results) == set(SOURCES)
+    for source in SOURCES:
+        assert results[source]["status"] == "success"
+        assert len(results[source]["results"]) == 5
+    # 摘要中的搜索词高亮标签已去掉
+    assert "<span" not in results["wikipedia"]["results"][0]["snippet"]
+
+
+def test_simple_agent_upstream_errors(failing_upstreams):
+    agent = intelligent_search_agent_simple.IntelligentSearchAgent("offline-test-key")
+
+    results = agent.parallel_search("transformer", SOURCES)
+
+    for source in SOURCES:
+        assert results[source]["status"] == "error"
+
+
+def test_claude_agent_parallel_search(stubs):
+    agent = intelligent_search_agent.IntelligentSearchAgent("offline-test-key")
+
+    results = agent.parallel_search("transformer", SOURCES)
+
+    # 该版本的搜索源返回JSON字符串，并行搜索时解析为结果列表
+    for source in SOURCES:
+        assert len(results[source]) == 5
+
+
+def test_google_scholar_without_api_key(monkeypatch):
+    monkeypatch.delenv("SERP_API_KEY")
+
+    simple_agent = intelligent_search_agent_simple.IntelligentSearchAgent("offline-test-key")
+    claude_agent = intelligent_search_agent.IntelligentSearchAgent("offline-test-key")
+
+    assert simple_agent.search_apis.search_google_scholar("transformer") == {
+        "status": "error", "error": "Google Scholar API密钥未设置"
+    }
+    assert claude_agent.search_apis.search_google_scholar("transformer") == "Google Scholar API密钥未设置"
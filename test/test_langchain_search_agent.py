@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+LangChain搜索Agent测试
+替身Gemini服务在请求声明了工具时先返回一次arXiv工具调用，拿到工具结果后再给出回答。
+"""
+
+import pytest
+
+from backend.src.agent import tracing
+from backend.src.agent.tools.arxiv_tool import ArxivSearchTool
+from langchain_search_agent import LangChainSearchAgent
+
+
+def test_run_calls_tool(stubs, spans):
+    agent = LangChainSearchAgent(debug=True)
+    before = stubs.stats["arxiv"]["requests"]
+
+    with tracing.trace() as tracer:
+        response = agent.run("large language model")
+
+    assert response["success"] is True
+    assert response["answer"]
+    [step] = response["debug_info"]["intermediate_steps"]
+    assert step["tool"] == ArxivSearchTool.NAME
+    assert step["tool_output"].startswith("在arXiv上找到了")
+    assert stubs.stats["arxiv"]["requests"] == before + 1
+    assert [span["name"] for span in spans(tracer.to_tree(), "tool:")] == [f"tool:{ArxivSearchTool.NAME}"]
+
+
+def test_agent_created_on_first_run(stubs):
+    agent = LangChainSearchAgent()
+    assert agent._agent is None
+
+    agent.run("transformer")
+
+    assert agent._agent is not None
+    assert [tool.name for tool in agent.tools][0] == ArxivSearchTool.NAME
+
+
+def test_missing_google_api_key(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY")
+
+    with pytest.raises(SystemExit):
+        LangChainSearchAgent()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+延迟创建的搜索工具和搜索结果缓存测试
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.src.agent import tracing
+from backend.src.agent.cache import ResultCache
+from backend.src.agent.tools.arxiv_tool import ArxivSearchTool
+from backend.src.agent.tools.google_scholar_tool import GoogleScholarSearchTool
+from backend.src.agent.tools.lazy import LazyTool
+
+
+def test_instance_created_on_first_run(stubs):
+    tool = LazyTool(ArxivSearchTool)
+    assert tool.name == ArxivSearchTool.NAME
+    assert tool._instance is None
+
+    text = tool.run("transformer")
+
+    assert text.startswith("在arXiv上找到了")
+    assert tool.instance() is tool._instance
+
+
+def test_construction_error_returned_and_retried(monkeypatch):
+    monkeypatch.delenv("SERP_API_KEY")
+    tool = LazyTool(GoogleScholarSearchTool)
+
+    assert tool.run("scaling laws") == f"初始化{tool.name}时发生错误: 未找到SERP_API_KEY环境变量"
+
+    monkeypatch.setenv("SERP_API_KEY", "offline-test-key")
+    assert tool.run("scaling laws").startswith("在Google Scholar上找到了")
+
+
+def test_traced_run_records_span(stubs, spans):
+    tool = LazyTool(ArxivSearchTool)
+
+    with tracing.trace() as tracer:
+        text = tool.traced_run("transformer")
+
+    [span] = spans(tracer.to_tree(), "tool:")
+    assert span["name"] == f"tool:{tool.name}"
+    assert span["attrs"]["bytes"] == len(text.encode("utf-8"))
+
+
+@pytest.mark.timing
+def test_concurrent_identical_queries_share_one_request(slow_upstreams):
+    """同一查询的并发请求只访问一次上游，总耗时接近单次请求而不是累加"""
+    tool = LazyTool(ArxivSearchTool)
+    cache = ResultCache()
+    before = slow_upstreams.stats["arxiv"]["requests"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(
+            lambda _: cache.get_or_compute((tool.name, "transformer"), lambda: tool.run("transformer")), range(4)
+        ))
+    elapsed = time.perf_counter() - start
+
+    assert len(set(results)) == 1
+    assert slow_upstreams.stats["arxiv"]["requests"] == before + 1
+    assert elapsed < 2 * slow_upstreams.config["arxiv"]["latency"]["value"]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+本地全文索引测试
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from backend.src.agent import local_index
+from backend.src.agent.local_index import LocalIndex, document_key, tokenize
+
+# 测试文档
+PAPERS = [
+    {"title": "Attention Is All You Need", "summary": "The transformer architecture based on attention.",
+     "authors": ["Ashish Vaswani"], "link": "https://arxiv.org/abs/1706.03762"},
+    {"title": "Scaling Laws for Neural Language Models", "summary": "Power laws for model size and data.",
+     "link": "https://arxiv.org/abs/2001.08361"},
+]
+PAGES = [
+    {"title": "大语言模型", "snippet": "大语言模型是由具有大量参数的神经网络组成的语言模型。"},
+]
+
+
+@pytest.fixture
+def index():
+    with LocalIndex(":memory:") as opened:
+        yield opened
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Large Language Models", ["large", "language", "models"]),
+    ("大语言模型", ["大语", "语言", "言模", "模型"]),
+    ("GPT-4 模型", ["gpt", "4", "模型"]),
+    ("是 AI", ["ai", "是"]),
+])
+def test_tokenize(text, expected):
+    assert tokenize(text) == expected
+
+
+def test_document_key():
+    assert document_key({"title": "A", "link": " https://example.org/a "}) == "https://example.org/a"
+    assert document_key({"title": "  Attention  Is All\nYou Need "}) == "attention is all you need"
+
+
+def test_search_ranks_by_bm25_and_adds_fields(index):
+    assert index.add_documents("arxiv", PAPERS) == 2
+
+    results = index.search("transformer attention")
+
+    assert [item["title"] for item in results] == ["Attention Is All You Need"]
+    item = results[0]
+    assert item["origin"] == "arxiv"
+    assert item["score"] > 0
+    assert item["authors"] == ["Ashish Vaswani"]
+    assert len(item["fetched_at"]) == len("2020-01-01T00:00:00")
+
+
+def test_search_cjk_bigrams(index):
+    index.add_documents("arxiv", PAPERS)
+    index.add_documents("wikipedia", PAGES)
+
+    results = index.search("什么是大语言模型")
+
+    assert [item["title"] for item in results] == ["大语言模型"]
+    assert results[0]["origin"] == "wikipedia"
+
+
+def test_search_ignores_stopwords_only_query(index):
+    index.add_documents("arxiv", PAPERS)
+
+    assert index.search("what is the") == []
+
+
+def test_upsert_replaces_fts_row(index):
+    index.add_documents("arxiv", PAPERS)
+    updated = dict(PAPERS[0], summary="Self-attention for sequence transduction.")
+
+    index.add_documents("semantic_scholar", [updated])
+
+    assert index.count() == 2
+    assert index.search("transformer architecture") == []
+    [item] = index.search("sequence transduction")
+    assert item["origin"] == "semantic_scholar"
+    assert item["summary"] == updated["summary"]
+
+
+def test_add_documents_skips_untitled(index):
+    assert index.add_documents("arxiv", [{"summary": "no title"}, "not a dict", PAPERS[1]]) == 1
+    assert index.stats()["by_source"] == {"arxiv": 1}
+
+
+def test_persisted_on_disk(tmp_path):
+    path = tmp_path / "nested" / "local_index.sqlite"
+    with LocalIndex(path) as index:
+        index.add_documents("arxiv", PAPERS)
+
+    with LocalIndex(path) as index:
+        assert index.stats() == {"path": str(path), "documents": 2, "by_source": {"arxiv": 2}}
+
+
+@pytest.mark.skipif(bool(os.getenv("LOCAL_INDEX_PATH")), reason="默认路径被LOCAL_INDEX_PATH覆盖")
+def test_default_path_relative_to_project_root():
+    project_root = Path(local_index.__file__).resolve().parents[3]
+
+    assert Path(local_index.DEFAULT_INDEX_PATH).is_absolute()
+    assert Path(local_index.DEFAULT_INDEX_PATH).parent == project_root / "data"
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+运行指标测试
+"""
+
+from backend.src.agent import metrics
+from backend.src.agent.cache import ResultCache
+from backend.src.agent.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_counter_render():
+    counter = Counter("requests_total", "请求数", ("source",))
+    counter.inc(source="arxiv")
+    counter.inc(2.5, source='wiki"pedia\n')
+
+    assert counter.render() == [
+        "# HELP requests_total 请求数",
+        "# TYPE requests_total counter",
+        'requests_total{source="arxiv"} 1',
+        'requests_total{source="wiki\\"pedia\\n"} 2.5',
+    ]
+
+
+def test_gauge_without_labels():
+    gauge = Gauge("in_flight", "进行中的请求")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert gauge.render()[-1] == "in_flight 1"
+    gauge.set(0.25)
+    assert gauge.render()[-1] == "in_flight 0.25"
+
+
+def test_histogram_cumulative_buckets():
+    histogram = Histogram("duration_seconds", "耗时", ("stage",), buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.7, 3.0):
+        histogram.observe(value, stage="search")
+
+    assert histogram.render()[2:] == [
+        'duration_seconds_bucket{stage="search",le="0.1"} 2',
+        'duration_seconds_bucket{stage="search",le="0.5"} 2',
+        'duration_seconds_bucket{stage="search",le="1"} 3',
+        'duration_seconds_bucket{stage="search",le="+Inf"} 4',
+        'duration_seconds_sum{stage="search"} 3.85',
+        'duration_seconds_count{stage="search"} 4',
+    ]
+
+
+def test_set_function_and_failures():
+    gauge = Gauge("entries", "条目数")
+    gauge.set_function(lambda: 3)
+    assert gauge.render()[-1] == "entries 3"
+
+    gauge.set_function(lambda: 1 / 0)
+    assert gauge.render() == ["# HELP entries 条目数", "# TYPE entries gauge"]
+
+
+def test_registry_render_keeps_first_registration():
+    registry = Registry()
+    first = registry.register(Counter("events_total", "事件数"))
+    assert registry.register(Gauge("events_total", "重复")) is first
+    first.inc()
+
+    assert registry.render() == "# HELP events_total 事件数\n# TYPE events_total counter\nevents_total 1\n"
+    assert registry.get("events_total") is first
+    assert registry.get("missing") is None
+
+
+def test_bind_cache(monkeypatch):
+    # 测试结束后恢复原来绑定的缓存
+    for metric in (metrics.CACHE_HITS, metrics.CACHE_MISSES, metrics.CACHE_ENTRIES, metrics.CACHE_HIT_RATIO):
+        monkeypatch.setattr(metric, "_function", metric._function)
+    cache = ResultCache()
+    cache.set("key", "value")
+    cache.get("key")
+    cache.get("missing")
+
+    metrics.bind_cache(cache)
+    text = metrics.REGISTRY.render()
+
+    assert "search_agent_cache_hits_total 1\n" in text
+    assert "search_agent_cache_entries 1\n" in text
+    assert "search_agent_cache_hit_ratio 0.5\n" in text
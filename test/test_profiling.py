@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+按需性能剖析测试
+"""
+
+import os
+import pstats
+import time
+from pathlib import Path
+
+import pytest
+
+from backend.src.agent import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    return tmp_path
+
+
+def _busy(duration: float) -> str:
+    """占用CPU一段时间（供采样剖析器采集）"""
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return "done"
+
+
+def test_authorization(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", None)
+    assert not profiling.is_enabled()
+    assert not profiling.is_authorized("anything")
+
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    assert profiling.is_enabled()
+    assert profiling.is_authorized("secret")
+    assert not profiling.is_authorized("wrong")
+    assert not profiling.is_authorized(None)
+
+
+def test_cprofile(profile_dir):
+    result, report = profiling.run_profiled("cprofile", _busy, 0.05)
+
+    assert result == "done"
+    assert report["mode"] == "cprofile"
+    assert report["duration"] >= 0.05
+    assert any(row["function"].startswith("_busy ") for row in report["top"])
+    path = profiling.artifact_path(report["id"])
+    assert path == profile_dir / f"{report['id']}.prof"
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+def test_sampling(profile_dir):
+    result, report = profiling.run_profiled("sampling", _busy, 0.2)
+
+    assert result == "done"
+    assert report["samples"] > 0
+    assert report["top"]
+    path = profiling.artifact_path(report["id"])
+    assert path.name.endswith(".collapsed.txt")
+    # 折叠栈格式：frame1;frame2;... 采样数（采样覆盖整个进程，其他线程的调用栈也会出现）
+    stacks = dict(line.rsplit(" ", 1) for line in path.read_text(encoding="utf-8").splitlines())
+    assert any(";_busy (" in stack and int(count) > 0 for stack, count in stacks.items())
+
+
+def test_run_profiled_propagates_errors(profile_dir):
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        profiling.run_profiled("cprofile", fail)
+    # 出错时仍保存剖析文件
+    assert list(profile_dir.glob("*.prof"))
+
+
+def test_invalid_mode_and_ids(profile_dir):
+    with pytest.raises(ValueError):
+        profiling.run_profiled("perf", _busy, 0)
+    assert profiling.artifact_path("../../etc/passwd") is None
+    assert profiling.artifact_path("0" * 32) is None
+
+
+@pytest.mark.skipif(bool(os.getenv("PROFILE_DIR")), reason="默认目录被PROFILE_DIR覆盖")
+def test_default_dir_relative_to_project_root():
+    project_root = Path(profiling.__file__).resolve().parents[3]
+
+    assert profiling.PROFILE_DIR == project_root / "profiles"
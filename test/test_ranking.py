@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+跨搜索源融合排序测试
+"""
+
+import pytest
+
+from backend.src.agent.ranking import RRF_K, diversify, estimate_tokens, fuse
+
+# 关闭全部特征，只按RRF排序
+RRF_ONLY = {"similarity": 0, "recency": 0, "citations": 0, "wordcount": 0}
+
+# 计算时效性使用的当前时间（2025-01-01T00:00:00Z）
+NOW = 1735689600.0
+
+# 多样化测试使用的排序结果（前两条几乎重复）
+RANKED = [
+    {"title": "Transformer attention model", "rank_score": 0.030},
+    {"title": "Transformer attention models", "rank_score": 0.029},
+    {"title": "Protein folding", "rank_score": 0.028},
+]
+
+
+def _results(*titles, **fields):
+    """构造单个搜索源的成功结果"""
+    return {"status": "success", "results": [{"title": title, **fields} for title in titles]}
+
+
+def test_rrf_interleaves_sources_and_keeps_order_on_ties():
+    search_results = {
+        "arxiv": _results("a1", "a2"),
+        "wikipedia": _results("w1", "w2"),
+        "google_scholar": {"status": "error", "error": "上游错误"},
+    }
+
+    ranked = fuse(search_results, weights=RRF_ONLY)
+
+    assert [item["title"] for item in ranked] == ["a1", "w1", "a2", "w2"]
+    assert [item["source"] for item in ranked] == ["arxiv", "wikipedia", "arxiv", "wikipedia"]
+    assert [item["rank"] for item in ranked] == [1, 2, 3, 4]
+    assert ranked[0]["rank_score"] == round(1 / (RRF_K + 1), 6)
+    # 返回副本，不修改输入
+    assert "rank" not in search_results["arxiv"]["results"][0]
+
+
+def test_deterministic_ordering():
+    search_results = {
+        "arxiv": _results("Attention Is All You Need", "Scaling Laws", published="2020-01-01T00:00:00Z"),
+        "wikipedia": _results("Transformer", "Large language model", wordcount=5000),
+    }
+
+    first = fuse(search_results, query="transformer attention", now=NOW)
+    second = fuse(search_results, query="transformer attention", now=NOW)
+
+    assert first == second
+    assert [item["rank"] for item in first] == list(range(1, 5))
+    assert all(a["rank_score"] >= b["rank_score"] for a, b in zip(first, first[1:]))
+
+
+def test_rrf_counts_every_merged_source():
+    search_results = {
+        "arxiv": _results("single"),
+        "google_scholar": {"status": "success", "results": [
+            {"title": "other"},
+            {"title": "merged", "sources": ["arxiv", "google_scholar", "semantic_scholar"]},
+        ]},
+    }
+
+    ranked = fuse(search_results, weights=RRF_ONLY)
+
+    assert [item["title"] for item in ranked] == ["merged", "single", "other"]
+    assert ranked[0]["rank_score"] == round(3 / (RRF_K + 2), 6)
+
+
+@pytest.mark.parametrize("feature, fields", [
+    ("citations", [{"cited_by": 1}, {"cited_by": 5000}]),
+    ("recency", [{"published": "2005-01-01T00:00:00Z"}, {"published": "2024-06-01T00:00:00Z"}]),
+    ("wordcount", [{"wordcount": 10}, {"wordcount": 8000}]),
+])
+def test_feature_weight_reorders(feature, fields):
+    search_results = {
+        "first": {"status": "success", "results": [dict(fields[0], title="low")]},
+        "second": {"status": "success", "results": [dict(fields[1], title="high")]},
+    }
+
+    without = fuse(search_results, weights=RRF_ONLY, now=NOW)
+    with_feature = fuse(search_results, weights=dict(RRF_ONLY, **{feature: 1.0}), now=NOW)
+
+    assert [item["title"] for item in without] == ["low", "high"]
+    assert [item["title"] for item in with_feature] == ["high", "low"]
+
+
+def test_similarity_feature_uses_query():
+    search_results = {
+        "first": _results("protein folding"),
+        "second": _results("transformer attention"),
+    }
+
+    ranked = fuse(search_results, query="transformer attention", weights=dict(RRF_ONLY, similarity=1.0))
+
+    assert [item["title"] for item in ranked] == ["transformer attention", "protein folding"]
+    # 没有查询时不计算相似度
+    assert [item["title"] for item in fuse(search_results, weights=dict(RRF_ONLY, similarity=1.0))] == \
+        ["protein folding", "transformer attention"]
+
+
+def test_no_successful_sources():
+    assert fuse({"arxiv": {"status": "error"}, "wikipedia": _results()}) == []
+
+
+def _titles(items):
+    return [item["title"] for item in items]
+
+
+def test_diversify_mmr_demotes_near_duplicates():
+    assert _titles(diversify(RANKED)) == ["Transformer attention model", "Protein folding",
+                                          "Transformer attention models"]
+    # 只看相关性时保持原排序
+    assert _titles(diversify(RANKED, mmr_lambda=1.0)) == _titles(RANKED)
+
+
+def test_diversify_max_results():
+    assert _titles(diversify(RANKED, max_results=2)) == ["Transformer attention model", "Protein folding"]
+    assert diversify(RANKED, max_results=0) == []
+    assert diversify([]) == []
+
+
+def test_diversify_without_rank_score_uses_position():
+    items = [{"title": title} for title in _titles(RANKED)]
+
+    assert _titles(diversify(items, max_results=2)) == ["Transformer attention model", "Protein folding"]
+
+
+def test_diversify_token_budget():
+    long_item = {"title": "Transformer survey", "rank_score": 0.05, "summary": "transformer " * 200}
+    items = [long_item] + RANKED
+    budget = estimate_tokens(RANKED[0]) + estimate_tokens(RANKED[2])
+
+    selected = diversify(items, token_budget=budget)
+
+    # 放不下的结果被跳过，之后较小的结果仍可入选，预算用完后停止
+    assert _titles(selected) == ["Transformer attention model", "Protein folding"]
+    assert sum(estimate_tokens(item) for item in selected) <= budget
+    assert diversify(items, token_budget=1) == []
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("大语言模型") == 5
+    assert estimate_tokens({"title": "ab"}) == estimate_tokens('{"title": "ab"}')
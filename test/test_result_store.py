@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+搜索结果存储测试
+"""
+
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from backend.src.agent import result_store
+from backend.src.agent.result_store import ResultStore, import_legacy_file, normalize_query
+
+# 2025-01-01T00:00:00Z 起每天一条记录的时间戳
+DAY = 86400
+START = 1735689600.0
+
+
+def _record(query, *sources):
+    """构造一条搜索结果"""
+    return {"query": query, "search_results": {source: {"status": "success", "results": []} for source in sources}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultStore(tmp_path / "results") as opened:
+        yield opened
+
+
+def test_normalize_query():
+    assert normalize_query("  Large   Language\tModel ") == "large language model"
+
+
+def test_append_and_get(store):
+    record_id = store.append("大语言模型", _record("大语言模型", "wikipedia", "arxiv"), timestamp=START)
+
+    record = store.get(record_id)
+
+    assert record == {"id": record_id, "query": "大语言模型", "timestamp": START,
+                      "sources": ["arxiv", "wikipedia"], "data": _record("大语言模型", "wikipedia", "arxiv")}
+    assert store.get(record_id + 1) is None
+
+
+def test_latest_and_find(store):
+    ids = [store.append(query, _record(query, source), timestamp=START + i * DAY)
+           for i, (query, source) in enumerate([("Transformer", "arxiv"), ("GPT", "wikipedia"),
+                                                ("transformer ", "wikipedia")])]
+
+    assert store.latest("TRANSFORMER")["id"] == ids[2]
+    assert store.latest("没有的查询") is None
+    assert [r["id"] for r in store.find(query="transformer")] == [ids[0], ids[2]]
+    assert [r["id"] for r in store.find(source="wikipedia")] == [ids[1], ids[2]]
+    assert [r["id"] for r in store.find(since=START + DAY)] == ids[1:]
+    assert [r["id"] for r in store.find(until="2025-01-02T08:00:00+08:00")] == ids[:1]
+    assert [r["id"] for r in store.find(limit=2, newest_first=True)] == [ids[2], ids[1]]
+
+
+def test_delete_and_compact(store):
+    ids = [store.append("query", _record("query", "arxiv"), timestamp=START + i) for i in range(3)]
+    store.append("other", _record("other", "arxiv"), timestamp=START + 10)
+
+    assert store.delete(ids[0]) is True
+    assert store.delete(ids[0]) is False
+    assert store.get(ids[0]) is None
+    assert store.stats()["deleted"] == 1
+
+    result = store.compact(keep_latest_per_query=True)
+
+    assert result["records_before"] == 4
+    assert result["records_after"] == 2
+    assert result["bytes_after"] < result["bytes_before"]
+    # 压缩整理后记录ID不变
+    assert store.get(ids[2])["data"] == _record("query", "arxiv")
+    stats = store.stats()
+    assert (stats["records"], stats["deleted"], stats["segments"]) == (2, 0, 1)
+    assert stats["sources"] == {"arxiv": 2}
+
+
+def test_compact_before(store):
+    old = store.append("old", _record("old"), timestamp=START)
+    new = store.append("new", _record("new"), timestamp=START + DAY)
+
+    store.compact(before=START + 1)
+
+    assert store.get(old) is None
+    assert store.get(new)["query"] == "new"
+
+
+def test_segments_roll_over(tmp_path):
+    with ResultStore(tmp_path / "results", segment_max_bytes=200) as store:
+        ids = [store.append(f"query {i}", {"payload": os.urandom(64).hex()}) for i in range(5)]
+
+        assert store.stats()["segments"] == 5
+        assert [store.get(record_id)["query"] for record_id in ids] == [f"query {i}" for i in range(5)]
+
+
+def test_rebuild_index_preserves_ids(tmp_path):
+    directory = tmp_path / "results"
+    with ResultStore(directory, segment_max_bytes=300) as store:
+        ids = [store.append(f"query {i}", _record(f"query {i}", "arxiv"), timestamp=START + i) for i in range(4)]
+        store.delete(ids[1])
+        store.compact()
+        kept = [ids[0], ids[2], ids[3]]
+        expected = [store.get(record_id) for record_id in kept]
+    (directory / "index.sqlite").unlink()
+
+    with ResultStore(directory) as store:
+        assert store.count() == 0
+        assert store.rebuild_index() == 3
+
+        assert [store.get(record_id) for record_id in kept] == expected
+        assert store.stats()["sources"] == {"arxiv": 3}
+        # 重建后新追加的记录不会复用已有ID
+        assert store.append("new", {}) > ids[-1]
+
+
+def test_rebuild_index_assigns_ids_to_legacy_records(store):
+    first = store.append("with id", {}, timestamp=START)
+    # 旧版本写入的记录不带ID
+    legacy = {"query": "legacy", "timestamp": START + 1, "sources": ["wikipedia"], "data": {}}
+    with open(store.directory / "segment-000001.gz", "ab") as f:
+        f.write(gzip.compress(json.dumps(legacy).encode("utf-8") + b"\n"))
+    second = store.append("after legacy", {}, timestamp=START + 2)
+
+    assert store.rebuild_index() == 3
+
+    assert store.get(first)["query"] == "with id"
+    assert store.get(second)["query"] == "after legacy"
+    [record] = store.find(query="legacy")
+    assert record["id"] > second
+    assert record["sources"] == ["wikipedia"]
+
+
+def test_rebuild_index_stops_at_truncated_tail(store):
+    store.append("complete", {}, timestamp=START)
+    with open(store.directory / "segment-000001.gz", "ab") as f:
+        f.write(gzip.compress(b'{"query": "truncated"}')[:10])
+
+    assert store.rebuild_index() == 1
+    assert [record["query"] for record in store.find()] == ["complete"]
+
+
+def test_export(store):
+    for i in range(3):
+        store.append(f"query {i}", {"i": i}, timestamp=START + i * DAY)
+    buffer = io.StringIO()
+
+    assert store.export(buffer, since=START + DAY) == 2
+
+    lines = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert [line["data"]["i"] for line in lines] == [1, 2]
+
+
+def test_import_legacy_file(store, tmp_path):
+    path = tmp_path / "search_result_20250101.json"
+    path.write_text(json.dumps({"query": "大语言模型", "timestamp": "2025-01-01T08:00:00",
+                                "results": _record("大语言模型", "arxiv")}, ensure_ascii=False), encoding="utf-8")
+
+    record = store.get(import_legacy_file(store, path))
+
+    assert record["query"] == "大语言模型"
+    assert record["sources"] == ["arxiv"]
+    assert record["data"] == _record("大语言模型", "arxiv")
+
+
+@pytest.mark.skipif(bool(os.getenv("RESULT_STORE_DIR")), reason="默认目录被RESULT_STORE_DIR覆盖")
+def test_default_dir_relative_to_project_root():
+    project_root = Path(result_store.__file__).resolve().parents[3]
+
+    assert Path(result_store.DEFAULT_STORE_DIR) == project_root / "data" / "results"
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+LangGraph搜索Agent测试
+"""
+
+from datetime import datetime
+
+import pytest
+
+from backend.src.agent.graph import SearchAgent, score_answer_confidence
+
+# 满足快速路径的百科页面（标题与查询完全匹配，摘要足够长）
+DEFINITION_PAGE = {
+    "title": "Transformer",
+    "page_id": 1,
+    "extract": "Transformer是一种基于注意力机制的深度学习模型架构。" * 20,
+    "url": "https://zh.wikipedia.org/?curid=1"
+}
+
+
+def test_score_answer_confidence():
+    assert score_answer_confidence("什么是Transformer", DEFINITION_PAGE) == 1.0
+    assert score_answer_confidence("Transformer", DEFINITION_PAGE) == pytest.approx(0.6)
+    assert score_answer_confidence("什么是Transformer", dict(DEFINITION_PAGE, extract="无内容")) == 0.0
+    assert score_answer_confidence("大语言模型", DEFINITION_PAGE) == 0.0
+
+
+def test_search_with_details(stubs):
+    agent = SearchAgent()
+
+    details = agent.search_with_details("large language model", max_iterations=1,
+                                        allow_fast_path=False, trace="tree")
+
+    assert details["answer"]
+    assert details["iterations"] == 1
+    assert details["coverage"] == 0.9
+    assert details["fast_path"] is False
+    assert {timing["node"] for timing in details["timings"]} == set(agent.tool_map)
+    # Google搜索、反思和总结各调用一次LLM
+    assert details["usage"]["by_stage"].keys() == {"search", "reflect", "answer"}
+    assert details["usage"]["by_source"].keys() == {"Google_Search"}
+    assert [span["name"] for span in details["trace"]] == ["search"]
+
+
+def test_fast_path_prefetch_keeps_trace_and_usage(stubs, spans):
+    """快速路径未命中时，后台预取的工具调用仍归属到本次请求的追踪和用量"""
+    agent = SearchAgent()
+
+    details = agent.search_with_details("large language model", max_iterations=1, trace="tree")
+
+    assert details["fast_path"] is False
+    tool_spans = spans(details["trace"], "tool:")
+    for name in ("arXiv_search", "Google_Scholar_search"):
+        calls = [span for span in tool_spans if span["name"] == f"tool:{name}"
+                 and spans(span["children"], "http.get")]
+        assert len(calls) == 1, name
+    assert details["usage"]["by_source"]["Google_Search"]["calls"] == 1
+    assert details["usage"]["by_stage"].keys() == {"search", "reflect", "answer"}
+
+
+def test_result_cache_skips_upstream(stubs):
+    agent = SearchAgent()
+    agent.search_with_details("transformer", max_iterations=1, allow_fast_path=False)
+    before = {name: dict(counts) for name, counts in stubs.stats.items()}
+
+    agent.search_with_details("transformer", max_iterations=1, allow_fast_path=False)
+
+    for source in ("arxiv", "wikipedia", "serpapi"):
+        assert stubs.stats[source]["requests"] == before[source]["requests"]
+    assert agent.cache.stats()["hits"] >= 3
+
+
+def test_fast_path(stubs, monkeypatch):
+    agent = SearchAgent()
+    monkeypatch.setattr(agent.wikipedia_search, "search_pages", lambda query, max_results=3: [DEFINITION_PAGE])
+
+    details = agent.search_with_details("什么是Transformer")
+
+    assert details["fast_path"] is True
+    assert details["answer"].startswith("**Transformer**")
+    assert details["usage"]["calls"] == 0
+
+
+def test_upstream_errors_still_answer(failing_upstreams):
+    agent = SearchAgent()
+
+    details = agent.search_with_details("large language model", max_iterations=1, allow_fast_path=False)
+
+    assert details["answer"]
+    assert details["iterations"] == 1
+    # 错误信息不写入缓存，下次搜索会重新请求上游（只有不依赖这些上游的Google搜索被缓存）
+    assert list(agent.cache._entries) == [("Google_Search", "large language model")]
+
+
+@pytest.mark.timing
+def test_search_branches_run_in_parallel(slow_upstreams):
+    """各搜索分支并行执行：分支阶段的墙钟时间明显小于各分支耗时之和"""
+    agent = SearchAgent()
+    # 先创建工具实例（导入SDK占用CPU，会拉长同时运行的其他分支）
+    agent.warm_up(ping_llm=False)
+
+    details = agent.search_with_details("transformer", max_iterations=1, allow_fast_path=False)
+
+    timings = details["timings"]
+    starts = [datetime.fromisoformat(timing["started_at"]).timestamp() for timing in timings]
+    ends = [start + timing["duration"] for start, timing in zip(starts, timings)]
+    window = max(ends) - min(starts)
+    total = sum(timing["duration"] for timing in timings)
+    assert total > 0.4
+    assert window < 0.6 * total
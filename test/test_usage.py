@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+LLM用量与费用统计测试
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from backend.src.agent import cassette, tracing, usage
+
+
+@pytest.fixture
+def pricing(monkeypatch):
+    """使用固定的价格表，避免受环境变量影响"""
+    table = {
+        "gemini-2.0-flash": {"input": 0.10, "output": 0.40},
+        "gemini-2.0-flash-lite": {"input": 0.05, "output": 0.20},
+        "gemini": {"input": 1.00, "output": 2.00},
+    }
+    monkeypatch.setattr(usage, "PRICING", table)
+    return table
+
+
+def test_price_for_longest_prefix(pricing):
+    assert usage.price_for("gemini-2.0-flash-001") == pricing["gemini-2.0-flash"]
+    assert usage.price_for("gemini-2.0-flash-lite-001") == pricing["gemini-2.0-flash-lite"]
+    assert usage.price_for("gemini-pro") == pricing["gemini"]
+    assert usage.price_for("claude-3-7-sonnet") is None
+
+
+def test_default_pricing_covers_agent_models():
+    # Gemini版Agent汇总长结果时使用gemini-2.0-pro-001
+    for model in ("gemini-2.0-flash-001", "gemini-2.0-pro-001"):
+        assert usage.price_for(model) is not None
+
+
+def test_compute_cost(pricing):
+    assert usage.compute_cost("gemini-2.0-flash", 1_000_000, 500_000) == pytest.approx(0.3)
+    assert usage.compute_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_load_pricing_overrides(monkeypatch, tmp_path):
+    path = tmp_path / "pricing.json"
+    path.write_text(json.dumps({"gemini-pro": {"input": 9.0, "output": 9.0},
+                                "local-model": {"input": 0.0, "output": 0.0}}), encoding="utf-8")
+    monkeypatch.setenv("LLM_PRICING_FILE", str(path))
+    monkeypatch.setenv("LLM_PRICING", json.dumps({"gemini-pro": {"input": 1.0, "output": 2.0}}))
+
+    pricing = usage.load_pricing()
+
+    # LLM_PRICING优先于LLM_PRICING_FILE，未覆盖的模型保留默认价格
+    assert pricing["gemini-pro"] == {"input": 1.0, "output": 2.0}
+    assert pricing["local-model"] == {"input": 0.0, "output": 0.0}
+    assert pricing["gemini-2.0-flash"] == usage.DEFAULT_PRICING["gemini-2.0-flash"]
+
+
+def test_load_pricing_invalid_json_falls_back(monkeypatch):
+    monkeypatch.delenv("LLM_PRICING_FILE", raising=False)
+    monkeypatch.setenv("LLM_PRICING", "{not json")
+
+    assert usage.load_pricing() == usage.DEFAULT_PRICING
+
+
+def test_aggregates_by_stage_source_and_model(pricing):
+    with usage.track() as tracker:
+        with usage.stage("reflect"):
+            usage.record("models/gemini-2.0-flash", 1000, 100)
+        usage.record("gemini-2.0-flash", 2000, 200, stage="search", source="Google_Search")
+        usage.record("gemini-2.0-flash-lite", 500, None, stage="search")
+
+    summary = tracker.summary()
+
+    assert summary["calls"] == 3
+    assert summary["input_tokens"] == 3500
+    assert summary["output_tokens"] == 300
+    assert summary["total_tokens"] == 3800
+    assert summary["by_stage"]["search"]["calls"] == 2
+    assert summary["by_stage"]["reflect"]["total_tokens"] == 1100
+    # 只有指定来源的调用计入by_source
+    assert summary["by_source"] == {"Google_Search": {
+        "calls": 1, "input_tokens": 2000, "output_tokens": 200, "total_tokens": 2200, "cost_usd": 0.00028}}
+    assert summary["by_model"].keys() == {"gemini-2.0-flash", "gemini-2.0-flash-lite"}
+    assert summary["cost_usd"] == pytest.approx(0.000140 + 0.000280 + 0.000025)
+
+
+def test_unpriced_model_is_flagged(pricing, monkeypatch, caplog):
+    monkeypatch.setattr(usage, "_warned_unpriced", set())
+
+    with usage.track() as tracker:
+        usage.record("gemini-2.0-flash", 100, 10)
+        assert usage.record("claude-3-7-sonnet", 100, 10) == 0.0
+        usage.record("claude-3-7-sonnet", 100, 10)
+
+    assert tracker.summary()["unpriced_models"] == ["claude-3-7-sonnet"]
+    # 每个模型只警告一次
+    assert [record.levelname for record in caplog.records if "claude-3-7-sonnet" in record.message] == ["WARNING"]
+
+
+def test_record_without_tracker_returns_cost(pricing):
+    assert usage.record("gemini-2.0-flash", 1_000_000, 0) == pytest.approx(0.1)
+
+
+def test_tracker_follows_submitted_tasks(pricing):
+    with usage.track() as tracker, ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [tracing.submit(executor, usage.record, "gemini-2.0-flash", 10, 1, "search", "Google_Search")
+                   for _ in range(4)]
+        for future in futures:
+            future.result()
+
+    assert tracker.summary()["by_source"]["Google_Search"]["calls"] == 4
+
+
+def test_record_gemini_reads_usage_metadata(pricing):
+    response = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=12, candidates_token_count=3))
+
+    with usage.track() as tracker:
+        usage.record_gemini("gemini-2.0-flash", response, stage="answer")
+        assert usage.record_gemini("gemini-2.0-flash", SimpleNamespace()) == 0.0
+
+    assert tracker.summary()["by_stage"] == {"answer": {
+        "calls": 1, "input_tokens": 12, "output_tokens": 3, "total_tokens": 15, "cost_usd": 0.000002}}
+
+
+def test_cassette_replay_records_usage(pricing, tmp_path):
+    path = tmp_path / "usage.json"
+
+    def generate():
+        usage.record("gemini-2.0-flash", 100, 10, stage="answer")
+        return "answer"
+
+    with cassette.use(path, "record"):
+        assert cassette.call("gemini.generate_content", ("gemini-2.0-flash", "q"), generate) == "answer"
+
+    # 回放时不执行SDK调用，用量按录制内容计入
+    with cassette.use(path, "replay"), usage.track() as tracker:
+        assert cassette.call("gemini.generate_content", ("gemini-2.0-flash", "q"), lambda: pytest.fail("不应执行")) == "answer"
+
+    summary = tracker.summary()
+    assert summary["by_stage"]["answer"]["input_tokens"] == 100
+    assert summary["cost_usd"] == pytest.approx(0.000014)
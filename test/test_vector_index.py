@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+哈希向量语义检索测试
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backend.src.agent import vector_index
+from backend.src.agent.vector_index import VectorIndex, embed
+
+# 测试文档
+PAPERS = [
+    {"title": "Attention Is All You Need", "summary": "The transformer architecture based on attention.",
+     "link": "https://arxiv.org/abs/1706.03762"},
+    {"title": "Scaling Laws for Neural Language Models", "summary": "Power laws for model size and data.",
+     "link": "https://arxiv.org/abs/2001.08361"},
+    {"title": "大语言模型", "snippet": "大语言模型是由具有大量参数的神经网络组成的语言模型。"},
+]
+
+# IVF测试使用的主题词
+TOPICS = ["transformer attention", "protein folding", "galaxy formation", "reinforcement learning",
+          "quantum computing", "climate modeling", "graph neural networks", "speech recognition"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    with VectorIndex(tmp_path / "vector_index", dim=128) as opened:
+        yield opened
+
+
+def _expected_df(index: VectorIndex) -> np.ndarray:
+    """由已存储的向量重新计算各维度的文档频次"""
+    return (np.asarray(index._matrix[:len(index)]) != 0).sum(axis=0)
+
+
+def test_embed_is_normalized_and_similar_texts_score_higher():
+    vectors = embed(["large language model", "large language models", "protein folding", ""])
+
+    assert vectors.shape == (4, vector_index.DEFAULT_DIM)
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0, atol=1e-5)
+    assert not vectors[3].any()
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_add_and_search(index):
+    assert index.add_documents("arxiv", PAPERS[:2]) == 2
+    assert index.add_documents("wikipedia", PAPERS[2:]) == 1
+
+    results = index.search("transformer attention")
+
+    assert results[0]["title"] == "Attention Is All You Need"
+    assert results[0]["origin"] == "arxiv"
+    assert 0 < results[0]["similarity"] <= 1
+    assert index.search("大语言模型")[0]["origin"] == "wikipedia"
+    assert index.stats()["by_source"] == {"arxiv": 2, "wikipedia": 1}
+
+
+def test_update_keeps_document_frequency_consistent(index):
+    index.add_documents("arxiv", PAPERS)
+    updated = dict(PAPERS[0], summary="Self-attention for sequence transduction.")
+
+    assert index.add_documents("semantic_scholar", [updated, updated]) == 1
+
+    assert len(index) == 3
+    assert np.array_equal(index._df, _expected_df(index))
+    [item] = index.search("sequence transduction", limit=1)
+    assert item["origin"] == "semantic_scholar"
+    assert item["summary"] == updated["summary"]
+
+
+def test_add_documents_skips_items_without_key_or_text(index):
+    assert index.add_documents("arxiv", [{"summary": "no title"}, {"title": ""}, "not a dict"]) == 0
+    assert len(index) == 0
+    assert index.search("anything") == []
+
+
+def test_capacity_grows(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 4)
+    with VectorIndex(tmp_path / "small", dim=64) as index:
+        index.add_documents("arxiv", [{"title": f"{topic} {i}"} for i, topic in enumerate(TOPICS)])
+
+        assert len(index) == len(TOPICS)
+        assert index.stats()["capacity"] >= len(TOPICS)
+        assert np.array_equal(index._df, _expected_df(index))
+        assert index.search("galaxy formation", limit=1)[0]["title"] == "galaxy formation 2"
+
+
+def test_search_batch_matches_single_queries(index):
+    index.add_documents("arxiv", PAPERS)
+    queries = ["transformer attention", "neural scaling laws", "语言模型"]
+
+    batch = index.search_batch(queries, limit=2)
+
+    assert batch == [index.search(query, limit=2) for query in queries]
+    assert all(len(results) <= 2 for results in batch)
+    assert index.search_batch([]) == []
+
+
+def test_min_similarity_filters(index):
+    index.add_documents("arxiv", PAPERS)
+
+    assert index.search("transformer attention", min_similarity=1.01) == []
+
+
+def test_ivf_train_and_probe(tmp_path):
+    docs = [{"title": f"{topic} study {i}", "summary": f"A paper about {topic}."}
+            for topic in TOPICS for i in range(10)]
+    with VectorIndex(tmp_path / "ivf", dim=128) as index:
+        index.add_documents("arxiv", docs)
+        brute = index.search_batch(["protein folding"], limit=5, probes=0)[0]
+
+        stats = index.train(lists=4, iterations=5)
+
+        assert stats["lists"] == 4
+        assert stats["sample"] == len(docs)
+        assert stats["min_list"] + stats["max_list"] <= len(docs)
+        assert index.stats()["ivf_lists"] == 4
+        # 最接近查询的簇已包含暴力检索的前几个结果
+        probed = index.search_batch(["protein folding"], limit=5, probes=1)[0]
+        assert {item["title"] for item in probed} == {item["title"] for item in brute}
+        assert all(item["title"].startswith("protein folding") for item in probed)
+        assert len(index.search_batch(["protein folding"], limit=100, probes=1)[0]) < len(docs)
+
+        # 训练后追加的文档按最近质心归簇，仍可被检索到
+        index.add_documents("arxiv", [{"title": "protein folding with language models"}])
+        assert any(item["title"] == "protein folding with language models"
+                   for item in index.search("protein folding language models"))
+
+    with VectorIndex(tmp_path / "ivf", dim=128) as reopened:
+        assert reopened.stats()["ivf_lists"] == 4
+
+
+def test_train_empty_index_raises(index):
+    with pytest.raises(ValueError, match="索引为空"):
+        index.train()
+
+
+def test_same_directory_shares_instance(tmp_path):
+    directory = tmp_path / "shared"
+    first = VectorIndex(directory, dim=128)
+    second = VectorIndex(tmp_path / "." / "shared", dim=128)
+
+    assert second is first
+    first.add_documents("arxiv", PAPERS[:1])
+    second.add_documents("arxiv", PAPERS[1:])
+    assert len(first) == 3
+    assert np.array_equal(first._df, _expected_df(first))
+    with pytest.raises(ValueError, match="维度"):
+        VectorIndex(directory, dim=64)
+
+    # 全部打开者关闭后才真正关闭，之后重新打开读取持久化的数据
+    second.close()
+    assert first.search("transformer attention")
+    first.close()
+    with VectorIndex(directory, dim=128) as reopened:
+        assert reopened is not first
+        assert len(reopened) == 3
+        assert np.array_equal(reopened._df, _expected_df(reopened))
+
+
+@pytest.mark.skipif(bool(os.getenv("VECTOR_INDEX_DIR")), reason="默认目录被VECTOR_INDEX_DIR覆盖")
+def test_default_dir_relative_to_project_root():
+    project_root = Path(vector_index.__file__).resolve().parents[3]
+
+    assert Path(vector_index.DEFAULT_VECTOR_DIR) == project_root / "data" / "vector_index"
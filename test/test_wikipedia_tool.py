@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Wikipedia搜索工具测试
+"""
+
+import pytest
+import requests
+
+from backend.src.agent import endpoints
+from backend.src.agent.tools.wikipedia_tool import WikipediaSearchTool, strip_snippet_html
+
+
+@pytest.mark.parametrize("snippet, expected", [
+    ("plain text", "plain text"),
+    ('<span class="searchmatch">LLM</span> models', "LLM models"),
+    ('<span class="searchmatch">a</span> <span class="searchmatch">b</span>', "a b"),
+])
+def test_strip_snippet_html(snippet, expected):
+    assert strip_snippet_html(snippet) == expected
+
+
+def test_api_url_by_query_language(monkeypatch):
+    monkeypatch.setenv("WIKIPEDIA_API_URL", "http://en.example/w/api.php")
+    monkeypatch.setenv("WIKIPEDIA_ZH_API_URL", "http://zh.example/w/api.php")
+    tool = WikipediaSearchTool()
+
+    assert tool._api_url("large language model") == "http://en.example/w/api.php"
+    assert tool._api_url("大语言模型") == "http://zh.example/w/api.php"
+
+
+def test_search_pages(stubs):
+    before = stubs.stats["wikipedia"]["requests"]
+
+    pages = WikipediaSearchTool().search_pages("transformer", max_results=2)
+
+    assert len(pages) == 2
+    for page in pages:
+        assert page["title"] and page["extract"]
+        assert page["url"] == f"{stubs.base_url}/wikipedia/?curid={page['page_id']}"
+    # 一次搜索加每个页面一次摘要请求
+    assert stubs.stats["wikipedia"]["requests"] == before + 3
+
+
+def test_search_and_get_content(stubs):
+    text = WikipediaSearchTool().search_and_get_content("大语言模型", max_results=1)
+
+    assert text.startswith("在Wikipedia上找到了1个与'大语言模型'相关的结果")
+    assert "结果 1:" in text
+
+
+def test_format_results_empty():
+    assert WikipediaSearchTool().format_results("nothing", []) == "在Wikipedia上没有找到与'nothing'相关的内容。"
+
+
+def test_search_pages_raises_on_upstream_error(failing_upstreams):
+    with pytest.raises(requests.exceptions.RequestException):
+        WikipediaSearchTool().search_pages("transformer")
+
+
+def test_search_and_get_content_network_error(failing_upstreams):
+    text = WikipediaSearchTool().search_and_get_content("transformer")
+
+    assert text.startswith("搜索Wikipedia时发生网络错误")
+
+
+def test_default_endpoints_without_overrides(monkeypatch):
+    monkeypatch.delenv("WIKIPEDIA_API_URL")
+    monkeypatch.delenv("WIKIPEDIA_ZH_API_URL")
+    tool = WikipediaSearchTool()
+
+    assert tool.base_url == endpoints.DEFAULT_WIKIPEDIA_API_URL
+    assert tool.zh_base_url == endpoints.DEFAULT_WIKIPEDIA_ZH_API_URL